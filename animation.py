@@ -0,0 +1,267 @@
+'''Animated GIFs of an evolution, written straight from the engine.
+
+http://www.w3.org/Graphics/GIF/spec-gif89a.txt
+
+Each frame shows a window of the most recent generations. By default the
+window is swept like an oscilloscope trace: each new generation is drawn
+over the oldest one, so a frame only encodes its new rows and the file
+grows with the new content alone. Passing scroll=True instead redraws the
+whole window each frame with the newest generation at the bottom.
+'''
+from collections import deque
+
+import buffers
+import elementary_cellular_automaton as eca
+
+_HEADER = b'GIF89a'
+_TRAILER = b'\x3b'
+_EXTENSION = 0x21
+_IMAGE_SEPARATOR = 0x2c
+_GRAPHIC_CONTROL_LABEL = 0xf9
+_APPLICATION_LABEL = 0xff
+_NETSCAPE_LOOP = b'NETSCAPE2.0'
+
+# Leave each frame in place for the next one to be drawn over.
+_DISPOSAL_NONE = 1
+
+_MAX_CODE = 4095
+_MAX_CODE_SIZE = 12
+_MAX_SUB_BLOCK = 255
+_MAX_DIMENSION = 0xffff
+
+_DEFAULT_DELAY = 4
+_WHITE = (0xff, 0xff, 0xff)
+
+
+def _little_endian(value):
+    return value.to_bytes(2, 'little')
+
+
+def default_palette(states=2):
+    '''White for dead cells through greys to black for the highest state.'''
+    return [
+        tuple(0xff - 0xff*state // (states - 1) for _ in _WHITE)
+        for state in range(states)]
+
+
+def _colour_table_bits(colours):
+    return max(1, (colours - 1).bit_length())
+
+
+def lzw_compress(pixels, min_code_size):
+    '''GIF's variable code width LZW, giving the packed codes as bytes.'''
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+
+    output = bytearray()
+    buffer = 0
+    buffered_bits = 0
+    code_size = min_code_size + 1
+    next_code = end_code + 1
+    table = {}
+
+    def emit(code):
+        nonlocal buffer, buffered_bits, code_size
+        buffer |= code << buffered_bits
+        buffered_bits += code_size
+        while buffered_bits >= 8:
+            output.append(buffer & 0xff)
+            buffer >>= 8
+            buffered_bits -= 8
+        # The decoder widens its codes as it reaches this code.
+        if next_code >= 1 << code_size and code_size < _MAX_CODE_SIZE:
+            code_size += 1
+
+    emit(clear_code)
+    prefix = None
+    for pixel in pixels:
+        if prefix is None:
+            prefix = pixel
+            continue
+        key = (prefix, pixel)
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+
+        emit(prefix)
+        if next_code >= _MAX_CODE:
+            emit(clear_code)
+            table.clear()
+            code_size = min_code_size + 1
+            next_code = end_code + 1
+        else:
+            table[key] = next_code
+            next_code += 1
+        prefix = pixel
+
+    if prefix is not None:
+        emit(prefix)
+    emit(end_code)
+    if buffered_bits:
+        output.append(buffer & 0xff)
+    return bytes(output)
+
+
+def _sub_blocks(data):
+    for start in range(0, len(data), _MAX_SUB_BLOCK):
+        chunk = data[start:start + _MAX_SUB_BLOCK]
+        yield bytes((len(chunk),)) + chunk
+    yield b'\x00'
+
+
+def _scale_row(cells, scale):
+    if scale == 1:
+        return cells
+    return b''.join(bytes((cell,)) * scale for cell in cells)
+
+
+class GifWriter:
+    '''Writes the header, frames and trailer of an animated GIF to a binary
+    file object.
+    '''
+    __slots__ = ('file', 'width', 'height', 'min_code_size', 'delay')
+
+    def __init__(self, file, width, height, palette, delay=_DEFAULT_DELAY,
+                 loop=True):
+        if not (0 < width <= _MAX_DIMENSION and 0 < height <= _MAX_DIMENSION):
+            raise ValueError('GIF dimensions must be between 1 and '
+                             f'{_MAX_DIMENSION} inclusive.')
+        bits = _colour_table_bits(len(palette))
+        if bits > 8:
+            raise ValueError('A GIF can have at most 256 colours.')
+
+        self.file = file
+        self.width = width
+        self.height = height
+        self.min_code_size = max(2, bits)
+        self.delay = delay
+
+        colour_table = bytearray()
+        for colour in palette:
+            colour_table.extend(colour)
+        colour_table.extend(bytes(3 * ((1 << bits) - len(palette))))
+
+        file.write(_HEADER)
+        file.write(_little_endian(width) + _little_endian(height))
+        file.write(bytes((0x80 | (bits - 1) << 4 | (bits - 1), 0, 0)))
+        file.write(colour_table)
+        if loop:
+            file.write(bytes((_EXTENSION, _APPLICATION_LABEL,
+                              len(_NETSCAPE_LOOP))))
+            file.write(_NETSCAPE_LOOP)
+            file.write(b'\x03\x01' + _little_endian(0) + b'\x00')
+
+    def frame(self, pixels, top=0, height=None, delay=None):
+        '''Write a frame of full width rows of palette indexes, drawn over
+        the previous frame from row top downwards.
+        '''
+        if height is None:
+            height = self.height
+        if delay is None:
+            delay = self.delay
+        if len(pixels) != self.width * height:
+            raise ValueError('The frame does not match its dimensions.')
+        self.file.write(bytes((
+            _EXTENSION, _GRAPHIC_CONTROL_LABEL, 4, _DISPOSAL_NONE << 2)))
+        self.file.write(_little_endian(delay) + b'\x00\x00')
+        self.file.write(bytes((_IMAGE_SEPARATOR,)))
+        self.file.write(
+            _little_endian(0) + _little_endian(top) +
+            _little_endian(self.width) + _little_endian(height) + b'\x00')
+        self.file.write(bytes((self.min_code_size,)))
+        compressed = lzw_compress(pixels, self.min_code_size)
+        self.file.writelines(_sub_blocks(compressed))
+
+    def close(self):
+        self.file.write(_TRAILER)
+
+
+def write_gif(rows, file, width, window, rows_per_frame=1, scale=1,
+              palette=None, delay=_DEFAULT_DELAY, loop=True, scroll=False):
+    '''Animate rows of one byte per cell (each a palette index).
+
+    The first frame shows the first window rows and every later frame adds
+    rows_per_frame more. Returns the number of frames written.
+    '''
+    if window < 1 or rows_per_frame < 1 or scale < 1:
+        raise ValueError('The window, rows per frame and scale must all be '
+                         'strictly positive.')
+    if palette is None:
+        palette = default_palette()
+    pixel_width = width * scale
+    writer = GifWriter(
+        file, pixel_width, window * scale, palette, delay=delay, loop=loop)
+    blank_row = bytes(pixel_width)
+
+    def scaled(row):
+        if len(row) != width:
+            raise ValueError('Every row must be the given width.')
+        return _scale_row(row, scale) * scale
+
+    rows = iter(rows)
+    shown = deque(
+        (scaled(row) for _, row in zip(range(window), rows)),
+        maxlen=window)
+    writer.frame(b''.join(shown) + blank_row * scale * (window - len(shown)))
+    frames = 1
+    generation = len(shown)
+
+    pending = []
+    for row in rows:
+        pending.append(scaled(row))
+        at_wrap = not scroll and (generation + len(pending)) % window == 0
+        if len(pending) < rows_per_frame and not at_wrap:
+            continue
+        if scroll:
+            shown.extend(pending)
+            writer.frame(b''.join(shown))
+        else:
+            top = generation % window
+            writer.frame(
+                b''.join(pending), top=top * scale,
+                height=len(pending) * scale)
+        generation += len(pending)
+        frames += 1
+        pending = []
+
+    if pending:
+        if scroll:
+            shown.extend(pending)
+            writer.frame(b''.join(shown))
+        else:
+            writer.frame(
+                b''.join(pending), top=(generation % window) * scale,
+                height=len(pending) * scale)
+        frames += 1
+
+    writer.close()
+    return frames
+
+
+def rows_to_pixels(rows, width):
+    '''Palette indexes of rows that are packed ints or sequences of
+    states.
+    '''
+    for row in rows:
+        if isinstance(row, int):
+            yield buffers.packed_to_cell_bytes(row, width)
+        else:
+            yield bytes(row)
+
+
+def save_gif(filename, height, width=None, rule=eca._DEFAULT_RULE,
+             starting_line=None, window=None, **kwargs):
+    '''Animate an elementary rule, as calc_grid would lay it out, into the
+    named file. The window defaults to a square one.
+    '''
+    if width is None:
+        width = eca.width_at_given_generation(generation=height)
+    if window is None:
+        window = min(width, height)
+    rows = eca.calc_packed_grid(
+        width=width, height=height, rule=rule, starting_line=starting_line)
+    with open(filename, 'wb') as f:
+        return write_gif(
+            rows_to_pixels(rows, width), f, width=width,
+            window=window, **kwargs)
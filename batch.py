@@ -0,0 +1,274 @@
+'''Run many jobs from a manifest in one process.
+
+The manifest has one JSON object per line, for example
+
+    {"rule": 30, "generations": 100, "output": "rule30.svg"}
+    {"rule": 110, "generations": 50, "seed": [0, 3], "output": "110.txt"}
+
+Each job may give rule, generations, width, radius, states, boundary and
+seed (the x coordinates of the live cells on the first row); whatever is
+left out comes from the command line defaults. Outputs ending in .txt are
+written as text; any other output is written just as the command line
+would write it, so .png and .pgm give greyscale images, .gif an
+animation, .ecah a compressed history and anything else an SVG (gzipped
+if it ends in .svgz). Blank lines and lines starting with # are skipped.
+
+Jobs run on a pool of threads so that they share the compiled rule tables
+and, for small elementary jobs, an engine's cache of evolved rules, and
+write their outputs concurrently. Larger jobs stream their rows straight
+into their outputs.
+'''
+import argparse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import json
+import os
+import sys
+import time
+
+import elementary_cellular_automaton as eca
+from engine import Engine
+import generalised_rules
+
+Job = namedtuple(
+    'Job',
+    'line rule generations width radius states boundary seed output')
+
+JobResult = namedtuple('JobResult', 'line output seconds error')
+
+_JOB_FIELDS = (
+    'rule', 'generations', 'width', 'radius', 'states', 'boundary', 'seed',
+    'output')
+
+_TEXT_EXTENSION = '.txt'
+
+# Only jobs this small share the engine's cache, so that a manifest of
+# large jobs streams its rows instead of keeping every grid it evolved.
+_MAX_CACHED_ROWS = 256
+_MAX_CACHED_CELLS = 1 << 16
+_MAX_CACHED_WINDOWS = 256
+
+
+def _default_workers():
+    return os.cpu_count() or 1
+
+
+def _whole_number(name, value):
+    if isinstance(value, bool):
+        raise ValueError(f'{name} must be a whole number, not {value!r}.')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a whole number, not {value!r}.')
+
+
+def parse_job(text, line, defaults=None):
+    '''Turn a line of the manifest into a Job, filling in any missing
+    settings from the defaults mapping.
+    '''
+    settings = {
+        'rule': eca._DEFAULT_RULE,
+        'generations': eca._DEFAULT_GENERATIONS,
+        'width': None,
+        'radius': generalised_rules.DEFAULT_RADIUS,
+        'states': generalised_rules.DEFAULT_STATES,
+        'boundary': eca.INFINITE,
+        'seed': None,
+    }
+    settings.update(defaults or {})
+
+    values = json.loads(text)
+    if not isinstance(values, dict):
+        raise ValueError('A job must be a JSON object.')
+    unknown = set(values) - set(_JOB_FIELDS)
+    if unknown:
+        raise ValueError(f'Unknown job fields: {", ".join(sorted(unknown))}')
+    settings.update(values)
+
+    output = settings.get('output')
+    if not output:
+        raise ValueError('A job must have an output.')
+    if not isinstance(output, str):
+        raise ValueError(f'output must be a filename, not {output!r}.')
+    if not isinstance(settings['boundary'], str):
+        raise ValueError(
+            f'boundary must be a string, not {settings["boundary"]!r}.')
+    seed = settings['seed']
+    if seed is not None:
+        if not isinstance(seed, (list, tuple)):
+            raise ValueError(
+                f'seed must be a list of x coordinates, not {seed!r}.')
+        seed = tuple(sorted(set(
+            _whole_number('seed', x) for x in seed)))
+    width = settings['width']
+    return Job(
+        line=line,
+        rule=_whole_number('rule', settings['rule']),
+        generations=_whole_number('generations', settings['generations']),
+        width=None if width is None else _whole_number('width', width),
+        radius=_whole_number('radius', settings['radius']),
+        states=_whole_number('states', settings['states']),
+        boundary=settings['boundary'],
+        seed=seed,
+        output=output)
+
+
+def read_manifest(lines, defaults=None):
+    '''Yield a Job, or the error parsing it as a JobResult, for each line.
+    '''
+    for line, text in enumerate(lines, start=1):
+        text = text.strip()
+        if not text or text.startswith('#'):
+            continue
+        try:
+            yield parse_job(text, line, defaults)
+        except ValueError as e:
+            yield JobResult(line=line, output=None, seconds=0.0, error=str(e))
+
+
+def calc_job_rows(job, engine=None):
+    '''The rows of a job, packed ints for elementary rules, and their
+    width.
+    '''
+    generalised_rules.ensure_rule_is_valid(
+        job.rule, radius=job.radius, states=job.states)
+    eca.ensure_boundary_is_valid(job.boundary)
+
+    starting_line = None
+    if job.seed is not None:
+        starting_line = eca.starting_line_from_cells(job.seed)
+
+    elementary = (job.radius, job.states) == (
+        generalised_rules.DEFAULT_RADIUS, generalised_rules.DEFAULT_STATES)
+    if elementary:
+        width = job.width
+        if width is None:
+            width = eca.width_at_given_generation(job.generations)
+        cached = job.generations <= _MAX_CACHED_ROWS and \
+            width * job.generations <= _MAX_CACHED_CELLS
+        if not cached:
+            calc_packed_grid = eca.calc_packed_grid
+        elif engine is None:
+            calc_packed_grid = Engine().calc_packed_grid
+        else:
+            calc_packed_grid = engine.calc_packed_grid
+        rows = calc_packed_grid(
+            width=width, height=job.generations, rule=job.rule,
+            starting_line=starting_line, boundary=job.boundary)
+        return rows, width
+
+    width = job.width
+    if width is None:
+        width = generalised_rules.width_at_given_generation(
+            job.generations, job.radius)
+    rows = generalised_rules.calc_window(
+        lower=eca.find_x_coordinates(width=width).start, width=width,
+        height=job.generations, rule=job.rule, radius=job.radius,
+        states=job.states, starting_line=starting_line,
+        boundary=job.boundary)
+    return rows, width
+
+
+def calc_job_grid(job, engine=None):
+    rows, width = calc_job_rows(job, engine)
+    return list(eca.rows_to_grid(rows, width))
+
+
+@lru_cache(maxsize=None)
+def _output_defaults():
+    return vars(eca._make_parser().parse_args([]))
+
+
+def write_rows(rows, width, job):
+    '''Write a job's rows, packed ints or sequences of states, as text or
+    in whichever format the command line would write its output in.
+    '''
+    eca.ensure_output_is_drawable(
+        job.output, width, job.generations, job.states)
+    if job.output.endswith(_TEXT_EXTENSION):
+        with open(job.output, 'w') as f:
+            lines = (
+                generalised_rules.grid_to_text([row])
+                for row in eca.rows_to_grid(rows, width))
+            # As grid_to_text of the whole grid, with a newline after it.
+            f.write(next(lines, ''))
+            for line in lines:
+                f.write('\n' + line)
+            f.write('\n')
+        return
+    settings = argparse.Namespace(**_output_defaults())
+    settings.output = job.output
+    settings.generations = job.generations
+    settings.states = job.states
+    eca._write_output(rows, width, settings)
+
+
+def run_job(job, engine=None):
+    start = time.perf_counter()
+    error = None
+    try:
+        write_rows(*calc_job_rows(job, engine), job)
+    except Exception as e:
+        # One bad job must not stop the others, nor the summary.
+        error = f'{type(e).__name__}: {e}'
+    return JobResult(
+        line=job.line, output=job.output,
+        seconds=time.perf_counter() - start, error=error)
+
+
+def run_batch(lines, workers=None, defaults=None):
+    '''Run every job of the manifest, giving their results in manifest
+    order.
+    '''
+    if workers is None:
+        workers = _default_workers()
+    if workers < 1:
+        raise ValueError('At least one worker is needed.')
+
+    entries = list(read_manifest(lines, defaults))
+    engine = Engine(max_windows=_MAX_CACHED_WINDOWS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = [
+            entry if isinstance(entry, JobResult)
+            else executor.submit(run_job, entry, engine)
+            for entry in entries]
+        return [
+            entry if isinstance(entry, JobResult) else entry.result()
+            for entry in pending]
+
+
+def summarise(results, seconds):
+    failures = [result for result in results if result.error]
+    return {
+        'jobs': len(results),
+        'succeeded': len(results) - len(failures),
+        'failed': len(failures),
+        'seconds': seconds,
+        'results': [result._asdict() for result in results],
+    }
+
+
+def main(manifest, workers=None, summary=None, defaults=None):
+    '''Run the manifest (a filename, or - for stdin) and report how it
+    went, returning the process exit status.
+    '''
+    start = time.perf_counter()
+    if manifest == '-':
+        results = run_batch(sys.stdin, workers, defaults)
+    else:
+        with open(manifest) as f:
+            results = run_batch(f, workers, defaults)
+    report = summarise(results, time.perf_counter() - start)
+
+    if summary is not None:
+        with open(summary, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+    for result in results:
+        if result.error:
+            print(f'line {result.line}: {result.error}', file=sys.stderr)
+    print(f'{report["succeeded"]} of {report["jobs"]} jobs succeeded '
+          f'in {report["seconds"]:.3f}s.', file=sys.stderr)
+    return 1 if report['failed'] else 0
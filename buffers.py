@@ -0,0 +1,198 @@
+'''Rows and grids of cells held as bytes, so that NumPy, files and sockets
+can take them whole instead of converting one cell at a time.
+
+Two layouts are offered:
+
+* bits: eight cells to a byte, the leftmost cell in the lowest bit of the
+  first byte, as read by numpy.unpackbits(..., bitorder='little');
+* cells: one byte per cell, 0 for dead and 1 for live.
+
+Both are exposed as read-only memoryviews, the cells layout also through
+the buffer protocol (Python 3.12 onwards) and __array_interface__, so
+numpy.asarray and numpy.frombuffer need no copying loop.
+'''
+import elementary_cellular_automaton as eca
+
+_DIGITS_TO_CELLS = bytes.maketrans(b'01', b'\x00\x01')
+_CELLS_TO_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+_CELL_TYPESTR = '|u1'
+
+
+def bytes_per_row(width):
+    return (width + 7) // 8
+
+
+def packed_to_bits(packed, width):
+    return packed.to_bytes(bytes_per_row(width), 'little')
+
+
+def packed_to_cell_bytes(packed, width):
+    if width == 0:
+        return b''
+    digits = format(packed, f'0{width}b')[::-1]
+    return digits.encode('ascii').translate(_DIGITS_TO_CELLS)
+
+
+def cell_bytes_to_packed(cells):
+    cells = bytes(cells)
+    if not cells:
+        return 0
+    return int(cells.translate(_CELLS_TO_DIGITS)[::-1], 2)
+
+
+def _shaped(data, shape):
+    view = memoryview(data)
+    if 0 in shape:
+        return view
+    return view.cast('B', shape)
+
+
+class PackedRow:
+    '''A row of width cells packed into an int, leftmost cell lowest.'''
+    __slots__ = ('packed', 'width', '_cell_bytes')
+
+    def __init__(self, packed, width):
+        self.packed = packed
+        self.width = width
+        self._cell_bytes = None
+
+    @classmethod
+    def from_cells(cls, cells):
+        cells = tuple(cells)
+        return cls(eca.cells_to_packed(cells), len(cells))
+
+    def __len__(self):
+        return self.width
+
+    def __iter__(self):
+        return eca.packed_to_cells(self.packed, self.width)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.width
+        if not (0 <= index < self.width):
+            raise IndexError('row index out of range')
+        return bool(self.packed >> index & 1)
+
+    def __eq__(self, other):
+        if not isinstance(other, PackedRow):
+            return NotImplemented
+        return (self.packed, self.width) == (other.packed, other.width)
+
+    def __hash__(self):
+        return hash((self.packed, self.width))
+
+    def __repr__(self):
+        return f'PackedRow({self.packed:#x}, width={self.width})'
+
+    @property
+    def cell_bytes(self):
+        if self._cell_bytes is None:
+            self._cell_bytes = packed_to_cell_bytes(self.packed, self.width)
+        return self._cell_bytes
+
+    def bits(self):
+        return memoryview(packed_to_bits(self.packed, self.width))
+
+    def cells(self):
+        return memoryview(self.cell_bytes)
+
+    def __buffer__(self, flags):
+        return self.cells()
+
+    @property
+    def __array_interface__(self):
+        return {
+            'version': 3,
+            'shape': (self.width,),
+            'typestr': _CELL_TYPESTR,
+            'data': self.cell_bytes,
+        }
+
+
+class PackedGrid:
+    '''Rows of equal width, as packed ints.'''
+    __slots__ = ('packed_rows', 'width', '_cell_bytes')
+
+    def __init__(self, packed_rows, width):
+        self.packed_rows = tuple(packed_rows)
+        self.width = width
+        self._cell_bytes = None
+
+    @classmethod
+    def from_grid(cls, grid):
+        rows = [PackedRow.from_cells(row) for row in grid]
+        width = rows[0].width if rows else 0
+        if any(row.width != width for row in rows):
+            raise ValueError('All rows of a grid must be the same width.')
+        return cls((row.packed for row in rows), width)
+
+    @property
+    def height(self):
+        return len(self.packed_rows)
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        return (PackedRow(packed, self.width) for packed in self.packed_rows)
+
+    def __getitem__(self, index):
+        return PackedRow(self.packed_rows[index], self.width)
+
+    def __eq__(self, other):
+        if not isinstance(other, PackedGrid):
+            return NotImplemented
+        return ((self.packed_rows, self.width) ==
+                (other.packed_rows, other.width))
+
+    def __hash__(self):
+        return hash((self.packed_rows, self.width))
+
+    def __repr__(self):
+        return f'PackedGrid(height={self.height}, width={self.width})'
+
+    @property
+    def cell_bytes(self):
+        if self._cell_bytes is None:
+            self._cell_bytes = b''.join(
+                packed_to_cell_bytes(packed, self.width)
+                for packed in self.packed_rows)
+        return self._cell_bytes
+
+    def bits(self):
+        '''A (height, bytes per row) view, each row padded to whole bytes.
+        '''
+        data = b''.join(
+            packed_to_bits(packed, self.width)
+            for packed in self.packed_rows)
+        return _shaped(data, (self.height, bytes_per_row(self.width)))
+
+    def cells(self):
+        '''A (height, width) view of one byte per cell.'''
+        return _shaped(self.cell_bytes, (self.height, self.width))
+
+    def __buffer__(self, flags):
+        return self.cells()
+
+    @property
+    def __array_interface__(self):
+        return {
+            'version': 3,
+            'shape': (self.height, self.width),
+            'typestr': _CELL_TYPESTR,
+            'data': self.cell_bytes,
+        }
+
+
+def calc_grid(width, height, rule=eca._DEFAULT_RULE, starting_line=None,
+              boundary=eca.INFINITE):
+    '''As elementary_cellular_automaton.calc_grid, as a PackedGrid.'''
+    if width is None:
+        width = eca.width_at_given_generation(generation=height)
+    return PackedGrid(
+        eca.calc_packed_grid(
+            width=width, height=height, rule=rule,
+            starting_line=starting_line, boundary=boundary),
+        width)
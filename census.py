@@ -0,0 +1,252 @@
+'''The cycles and transients of every rule on rings of each width.
+
+http://en.wikipedia.org/wiki/Elementary_cellular_automaton
+
+A ring of width cells has 2**width states, each of which the rule maps to
+exactly one successor, so the state transition graph is made of cycles
+with trees of transient states leading into them. Every state's successor
+is found at once by applying the rule to bit planes, the jth holding cell
+j of every state, and the graph is then walked once to find its cycles
+and how far each state is from one.
+
+Rules of the same symmetry class have identically shaped graphs, so only
+the canonical rule of each class is walked, the widths and classes being
+shared out between processes.
+'''
+from array import array
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import os
+import sys
+
+import elementary_cellular_automaton as eca
+import rule_symmetry
+
+CensusReport = namedtuple(
+    'CensusReport',
+    'rule width states cycles cyclic_states periods max_transient '
+    'gardens_of_eden')
+
+MAX_WIDTH = 24
+
+_DEFAULT_MAX_WIDTH = 8
+
+_STATE_TYPECODE = 'I'
+_STATE_BYTES = 4
+
+# The planes of the lowest cells, which repeat within a byte.
+_BYTE_PLANES = (0b10101010, 0b11001100, 0b11110000)
+
+_UNVISITED = 0
+_ON_PATH = 1
+_VISITED = 2
+
+
+def _identity_plane(cell, states):
+    '''Bit s set wherever state s has the cell live.'''
+    run = 1 << cell
+    if run < 8:
+        pattern = bytes((_BYTE_PLANES[cell],))
+    else:
+        pattern = bytes(run // 8) + b'\xff' * (run // 8)
+    repeats = max(states // (len(pattern) * 8), 1)
+    return int.from_bytes(pattern * repeats, 'little') & ((1 << states) - 1)
+
+
+def _spread(plane, states):
+    '''Move bit s of the plane to the lowest bit of the sth field.'''
+    digits = format(plane, f'0{states}b')[::-1]
+    fields = digits.replace('0', '\0' * _STATE_BYTES).replace(
+        '1', '\1' + '\0' * (_STATE_BYTES - 1))
+    return int.from_bytes(fields.encode('latin-1'), 'little')
+
+
+def ensure_width_is_valid(width):
+    if not (1 <= width <= MAX_WIDTH):
+        raise ValueError(
+            f'Ring width {width} must be between 1 and {MAX_WIDTH} '
+            'inclusive.')
+
+
+def transition_table(rule, width):
+    '''An array giving the successor of each packed state of the ring.'''
+    eca.ensure_wolfram_code_is_valid(rule)
+    ensure_width_is_valid(width)
+    states = 1 << width
+    mask = (1 << states) - 1
+    planes = [_identity_plane(cell, states) for cell in range(width)]
+
+    successors = 0
+    for cell in range(width):
+        plane = eca._apply_rule_packed(
+            left=planes[cell - 1],
+            centre=planes[cell],
+            right=planes[(cell + 1) % width],
+            rule=rule,
+            mask=mask)
+        successors |= _spread(plane, states) << cell
+
+    table = array(_STATE_TYPECODE)
+    table.frombytes(successors.to_bytes(states * _STATE_BYTES, 'little'))
+    if sys.byteorder != 'little':
+        table.byteswap()
+    return table
+
+
+def analyse(successors):
+    '''The cycle lengths, with how many states lie on a cycle, the longest
+    run of transient states leading into one, and how many states have no
+    predecessor.
+    '''
+    states = len(successors)
+    status = bytearray(states)
+    distance = array(_STATE_TYPECODE, bytes(states * _STATE_BYTES))
+    periods = Counter()
+    max_transient = 0
+
+    for start in range(states):
+        if status[start]:
+            continue
+        path = []
+        state = start
+        while not status[state]:
+            status[state] = _ON_PATH
+            path.append(state)
+            state = successors[state]
+
+        if status[state] == _ON_PATH:
+            first = path.index(state)
+            periods[len(path) - first] += 1
+            for cyclic in path[first:]:
+                status[cyclic] = _VISITED
+            del path[first:]
+            steps = 0
+        else:
+            steps = distance[state]
+
+        for transient in reversed(path):
+            steps += 1
+            distance[transient] = steps
+            status[transient] = _VISITED
+        max_transient = max(max_transient, steps)
+
+    return (
+        tuple(sorted(periods.items())),
+        sum(period * count for period, count in periods.items()),
+        max_transient,
+        states - len(set(successors)))
+
+
+def census_of(rule, width):
+    periods, cyclic_states, max_transient, gardens_of_eden = analyse(
+        transition_table(rule, width))
+    return CensusReport(
+        rule=rule,
+        width=width,
+        states=1 << width,
+        cycles=sum(count for _, count in periods),
+        cyclic_states=cyclic_states,
+        periods=periods,
+        max_transient=max_transient,
+        gardens_of_eden=gardens_of_eden)
+
+
+def _census_task(task):
+    return census_of(*task)
+
+
+def census(widths, rules=eca.WOLFRAM_CODES, workers=None):
+    '''A CensusReport for each rule and width, keyed by (rule, width).
+
+    The canonical rules are analysed on up to workers processes (by
+    default one per CPU, or none at all for a single worker), the rest of
+    each class being filled in from them.
+    '''
+    widths = sorted(set(widths), reverse=True)
+    for width in widths:
+        ensure_width_is_valid(width)
+    rules = list(rules)
+    canonical = {rule: rule_symmetry.canonical_rule(rule)[0] for rule in rules}
+    # Widest first, so that the longest tasks are not left until last.
+    tasks = [
+        (rule, width)
+        for width in widths for rule in sorted(set(canonical.values()))]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError('At least one worker is needed.')
+    if workers == 1:
+        reports = list(map(_census_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            reports = list(executor.map(_census_task, tasks))
+
+    by_task = {(report.rule, report.width): report for report in reports}
+    return {
+        (rule, width): by_task[canonical[rule], width]._replace(rule=rule)
+        for rule in sorted(rules) for width in reversed(widths)}
+
+
+def format_report(report):
+    periods = ' '.join(
+        f'{period}x{count}' for period, count in report.periods)
+    return (
+        f'rule {report.rule} width {report.width}: '
+        f'{report.cycles} cycles ({periods}), '
+        f'{report.cyclic_states} of {report.states} states cyclic, '
+        f'longest transient {report.max_transient}, '
+        f'{report.gardens_of_eden} Gardens of Eden')
+
+
+def _make_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Count the cycles and transients of elementary rules '
+        'on rings of every width up to a maximum.')
+    parser.add_argument(
+        '-w', '--max-width',
+        type=eca._validate_positive,
+        default=_DEFAULT_MAX_WIDTH,
+        help=f'Widest ring to census, at most {MAX_WIDTH} '
+        f'(default: {_DEFAULT_MAX_WIDTH}).')
+    parser.add_argument(
+        '-r', '--rule',
+        type=eca._validate_rule_code,
+        action='append',
+        dest='rules',
+        help='A Wolfram code to census, which may be given more than once '
+        '(default: all of them).')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of processes to share the work between '
+        '(default: the number of CPUs).')
+    return parser
+
+
+def main(args=None):
+    parser = _make_parser()
+    settings = parser.parse_args(args)
+    rules = settings.rules
+    if rules is None:
+        rules = eca.WOLFRAM_CODES
+    for rule in rules:
+        if not eca.is_wolfram_code_valid(rule):
+            parser.error(f'{rule} is not a Wolfram code.')
+    if settings.max_width > MAX_WIDTH:
+        parser.error(f'The widest ring that can be censused is {MAX_WIDTH}.')
+    if settings.workers is not None and settings.workers < 1:
+        parser.error('At least one worker is needed.')
+
+    reports = census(
+        range(1, settings.max_width + 1), rules, workers=settings.workers)
+    for report in reports.values():
+        print(format_report(report))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
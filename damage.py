@@ -0,0 +1,170 @@
+'''Damage spreading: evolving a configuration alongside copies of it with
+single cells flipped, measuring how far the difference spreads.
+
+http://en.wikipedia.org/wiki/Lyapunov_exponent
+
+All the copies are stepped in lockstep on packed rows, and the XOR of
+each with the unperturbed row (the damage) is measured in the same pass.
+'''
+from collections import namedtuple
+import math
+
+import elementary_cellular_automaton as eca
+
+DamageStep = namedtuple(
+    'DamageStep', 'generation row damages distances')
+
+DamageMetrics = namedtuple(
+    'DamageMetrics',
+    'flip final peak mean lyapunov left_speed right_speed extinct_at')
+
+
+def popcount(packed):
+    return bin(packed).count('1')
+
+
+def damage_bounds(damage):
+    '''The lowest and one past the highest damaged cell indexes.'''
+    if not damage:
+        return None
+    return (damage & -damage).bit_length() - 1, damage.bit_length()
+
+
+def _slope(points):
+    '''The least squares gradient through (x, y) points.'''
+    count = len(points)
+    if count < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / count
+    mean_y = sum(y for _, y in points) / count
+    variance = sum((x - mean_x)**2 for x, _ in points)
+    if not variance:
+        return 0.0
+    return sum((x - mean_x)*(y - mean_y) for x, y in points) / variance
+
+
+class _Accumulator:
+    __slots__ = ('flip', 'distances', 'first_bounds', 'last_bounds',
+                 'last_generation', 'extinct_at')
+
+    def __init__(self, flip):
+        self.flip = flip
+        self.distances = []
+        self.first_bounds = None
+        self.last_bounds = None
+        self.last_generation = 0
+        self.extinct_at = None
+
+    def add(self, generation, damage, distance):
+        self.distances.append(distance)
+        bounds = damage_bounds(damage)
+        if bounds is None:
+            if self.extinct_at is None:
+                self.extinct_at = generation
+            return
+        if self.first_bounds is None:
+            self.first_bounds = bounds
+        self.last_bounds = bounds
+        self.last_generation = generation
+
+    def metrics(self):
+        distances = self.distances
+        left_speed = right_speed = 0.0
+        if self.last_generation:
+            left_speed = (
+                self.first_bounds[0] - self.last_bounds[0]
+            ) / self.last_generation
+            right_speed = (
+                self.last_bounds[1] - self.first_bounds[1]
+            ) / self.last_generation
+        return DamageMetrics(
+            flip=self.flip,
+            final=distances[-1] if distances else 0,
+            peak=max(distances, default=0),
+            mean=sum(distances) / len(distances) if distances else 0.0,
+            lyapunov=_slope([
+                (generation, math.log(distance))
+                for generation, distance in enumerate(distances)
+                if distance]),
+            left_speed=left_speed,
+            right_speed=right_speed,
+            extinct_at=self.extinct_at)
+
+
+class DamageRun:
+    '''An unperturbed evolution over a finite lattice, centred as per
+    find_x_coordinates, stepped together with one copy per flipped x.
+
+    Iterating yields a DamageStep per generation, the damages being the
+    packed XOR of each copy with the unperturbed row, and records the
+    metrics as it goes.
+    '''
+    __slots__ = ('rule', 'width', 'boundary', 'flips', 'lower',
+                 '_starting_row', '_accumulators')
+
+    def __init__(self, width, rule=eca._DEFAULT_RULE, flips=(0,),
+                 starting_line=None, boundary=eca.PERIODIC):
+        eca.ensure_wolfram_code_is_valid(rule)
+        eca.ensure_boundary_is_valid(boundary)
+        if boundary == eca.INFINITE:
+            raise ValueError('Damage runs need a finite lattice.')
+        if starting_line is None:
+            starting_line = eca.a_single_cell
+
+        xs = eca.find_x_coordinates(width=width)
+        for flip in flips:
+            if flip not in xs:
+                raise ValueError(f'Cell {flip} is outside the lattice.')
+
+        self.rule = rule
+        self.width = width
+        self.boundary = boundary
+        self.flips = tuple(flips)
+        self.lower = xs.start
+        self._starting_row = eca.cells_to_packed(map(starting_line, xs))
+        self._accumulators = None
+
+    def __iter__(self):
+        self._accumulators = [_Accumulator(flip) for flip in self.flips]
+        row = self._starting_row
+        copies = [row ^ (1 << (flip - self.lower)) for flip in self.flips]
+        generation = 0
+        while True:
+            damages = tuple(copy ^ row for copy in copies)
+            distances = tuple(map(popcount, damages))
+            for accumulator, damage, distance in zip(
+                    self._accumulators, damages, distances):
+                accumulator.add(generation, damage, distance)
+            yield DamageStep(generation, row, damages, distances)
+
+            row = eca.step_packed_bounded(
+                row, self.width, self.rule, self.boundary)
+            copies = [
+                eca.step_packed_bounded(
+                    copy, self.width, self.rule, self.boundary)
+                for copy in copies]
+            generation += 1
+
+    def steps(self, generations):
+        return (step for _, step in zip(range(generations), self))
+
+    def metrics(self):
+        '''DamageMetrics for each flip over the generations iterated so far.
+
+        lyapunov is the gradient of the log of the damaged cell count over
+        the generations where any damage remains, and the speeds are how
+        many cells per generation the damage has spread either side.
+        '''
+        if self._accumulators is None:
+            raise ValueError('The run has not been iterated.')
+        return [accumulator.metrics() for accumulator in self._accumulators]
+
+
+def measure_damage(width, generations, rule=eca._DEFAULT_RULE, flips=(0,),
+                   starting_line=None, boundary=eca.PERIODIC):
+    run = DamageRun(
+        width=width, rule=rule, flips=flips,
+        starting_line=starting_line, boundary=boundary)
+    for _ in run.steps(generations):
+        pass
+    return run.metrics()
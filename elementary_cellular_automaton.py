@@ -1,5 +1,6 @@
-import argparse
+import sys
 from functools import lru_cache
+from itertools import islice
 
 # http://en.wikipedia.org/wiki/Elementary_cellular_automaton
 
@@ -40,8 +41,9 @@ def index_to_num(index):
 
 def int_to_neighbours(int_neighbours):
     assert int_neighbours in _NEIGHBOURHOOD_CONFIGURATION_INDEXES
-    # bin assumes two choices
-    return (bool(int(b)) for b in bin(int_neighbours)[2:])
+    # binary assumes two choices
+    digits = format(int_neighbours, f'0{_NEIGHBOURHOOD_SIZE}b')
+    return (bool(int(b)) for b in digits)
 
 
 def neighbours_to_int(neighbours):
@@ -50,23 +52,46 @@ def neighbours_to_int(neighbours):
     return bool_sequence_to_int(neighbours)
 
 
-NEIGHBOURHOOD_CONFIGURATIONS = tuple(
-    map(index_to_num, _NEIGHBOURHOOD_CONFIGURATION_INDEXES))
+def _make_neighbourhood_configurations():
+    return tuple(map(index_to_num, _NEIGHBOURHOOD_CONFIGURATION_INDEXES))
+
+
+def _make_neighbourhoods():
+    return tuple(
+        tuple(int_to_neighbours(index))
+        for index in _NEIGHBOURHOOD_CONFIGURATION_INDEXES)
+
+
+# Built on first access, as this module is imported by every run of the
+# command line.
+_LAZY_TABLES = {
+    'NEIGHBOURHOOD_CONFIGURATIONS': _make_neighbourhood_configurations,
+    'NEIGHBOURHOODS': _make_neighbourhoods,
+}
+
+
+def __getattr__(name):
+    try:
+        make_table = _LAZY_TABLES[name]
+    except KeyError:
+        raise AttributeError(
+            f'module {__name__!r} has no attribute {name!r}') from None
+    table = make_table()
+    globals()[name] = table
+    return table
 
-NEIGHBOURHOODS = tuple(
-    map(int_to_neighbours, _NEIGHBOURHOOD_CONFIGURATION_INDEXES))
 
 NUM_OF_WOLFRAM_CODES = _NUMBER_OF_CHOICES**_NUM_NEIGHBOURHOOD_CONFIGURATIONS
 LOW_WOLFRAM_CODE = 0
 HIGH_WOLFRAM_CODE = NUM_OF_WOLFRAM_CODES - 1
 
-WOLFRAM_CODES = tuple(
-    range(LOW_WOLFRAM_CODE, NUM_OF_WOLFRAM_CODES))
+WOLFRAM_CODES = range(LOW_WOLFRAM_CODE, NUM_OF_WOLFRAM_CODES)
 
 
 def is_wolfram_code_valid(num_rule):
     '''http://en.wikipedia.org/wiki/Wolfram_code
     '''
+    # Membership of a range is a constant time comparison for ints.
     return num_rule in WOLFRAM_CODES
 
 
@@ -79,6 +104,10 @@ def ensure_wolfram_code_is_valid(wolfram_code):
 
 _DEFAULT_RULE = 30
 
+_ANIMATION_EXTENSION = '.gif'
+_RASTER_EXTENSIONS = ('.png', '.pgm')
+_HISTORY_EXTENSION = '.ecah'
+
 _symbolchar = {
     True: '#',
     False: ' ',
@@ -103,14 +132,18 @@ def symbols_to_string(symbols):
     return ''.join(symbols_to_chars(symbols))
 
 
-def to_svg(data, side=10, foreground='#000000', background='#ffffff'):
-    side = int(side)
-    if side <= 0:
+def ensure_side_is_valid(side):
+    if int(side) != side or side <= 0:
         raise ValueError('Only strictly positive whole numbers shall '
                          'be accepted as side lengths.')
 
+
+def to_svg(data, side=10, foreground='#000000', background='#ffffff'):
+    side = int(side)
+    ensure_side_is_valid(side)
+
     data = list(map(list, data))
-    item_count = len(data[0])
+    item_count = len(data[0]) if data else 0
     line_count = len(data)
     width = item_count * side
     height = line_count * side
@@ -124,25 +157,14 @@ def to_svg(data, side=10, foreground='#000000', background='#ffffff'):
     yield ''
     yield f'\t<g fill="{foreground}">'
 
-    def rect(width, height):
-        def shape(x, y):
-            x_scaled = x*width
-            y_scaled = y*height
-            return f'\t\t<rect x="{x_scaled}" y="{y_scaled}" ' + \
-                f'width="{width}" height="{height}" />'
-        return shape
-
-    def square(dimension):
-        return rect(dimension, dimension)
-
-    draw = square(side)
-
     for y, y_item in enumerate(data):
         yield f'\t\t<!-- Line: {y} -->'
 
+        y_scaled = y * side
         for x, x_item in enumerate(y_item):
             if x_item:
-                yield draw(x, y)
+                yield f'\t\t<rect x="{x * side}" y="{y_scaled}" ' \
+                    f'width="{side}" height="{side}" />'
 
         yield ''
 
@@ -153,13 +175,25 @@ def to_svg(data, side=10, foreground='#000000', background='#ffffff'):
 
 
 def _validate_rule_code(rule):
-    # TODO: rewrite with ensureWolframCodeIsValid
+    import argparse
+
+    # The upper bound depends on --radius and --states so is checked
+    # once all the arguments are parsed.
     value = int(rule)
     min = 0
-    max = 0xff
-    if not (min <= value <= max):
+    if value < min:
+        raise argparse.ArgumentTypeError(
+            f'Rule {value} must be at least {min}.')
+    return value
+
+
+def _validate_positive(text):
+    import argparse
+
+    value = int(text)
+    if value <= 0:
         raise argparse.ArgumentTypeError(
-            f'Rule {value} must be between {min} and {max} inclusive.')
+            f'{value} must be strictly positive.')
     return value
 
 
@@ -167,6 +201,29 @@ def a_single_cell(x):
     return x == 0
 
 
+# How many derived starting lines are remembered, so that repeated requests
+# share cached results without every seed ever seen being kept.
+STARTING_LINE_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=STARTING_LINE_CACHE_SIZE)
+def _live_cells_starting_line(live_cells):
+    def starting_line(x):
+        return x in live_cells
+    return starting_line
+
+
+def starting_line_from_cells(live_cells):
+    '''A starting line with the given x coordinates live, the same
+    function being returned for the same cells so that cached results
+    can be shared.
+    '''
+    live_cells = frozenset(live_cells)
+    if live_cells == {0}:
+        return a_single_cell
+    return _live_cells_starting_line(live_cells)
+
+
 @lru_cache(maxsize=None)
 def find_cell_value(x, y, rule, starting_line=None):
     ensure_wolfram_code_is_valid(rule)
@@ -234,11 +291,236 @@ def calc_grid(width, height, rule=_DEFAULT_RULE, starting_line=None):
                for cell in grid_line)
 
 
+def cells_to_packed(cells):
+    '''Pack a row of cells into an int, leftmost cell in the lowest bit.'''
+    packed = 0
+    for index, cell in enumerate(cells):
+        if cell:
+            packed |= 1 << index
+    return packed
+
+
+def packed_to_cells(packed, width):
+    return (bool(packed >> index & 1) for index in range(width))
+
+
+def reverse_packed(packed, width):
+    if width <= 0:
+        return 0
+    return int(format(packed, f'0{width}b')[::-1], 2)
+
+
+@lru_cache(maxsize=None)
+def _rule_minterms(rule):
+    '''The neighbourhood indexes that produce a live cell, or those that
+    produce a dead one (flagged as inverted) when they are fewer.
+    '''
+    ensure_wolfram_code_is_valid(rule)
+    live = tuple(
+        index for index in _NEIGHBOURHOOD_CONFIGURATION_INDEXES
+        if index_to_num(index) & rule)
+    if len(live) * 2 <= _NUM_NEIGHBOURHOOD_CONFIGURATIONS:
+        return live, False
+    dead = tuple(
+        index for index in _NEIGHBOURHOOD_CONFIGURATION_INDEXES
+        if not index_to_num(index) & rule)
+    return dead, True
+
+
+def _apply_rule_packed(left, centre, right, rule, mask):
+    minterms, inverted = _rule_minterms(rule)
+    operands = (
+        (right ^ mask, right),
+        (centre ^ mask, centre),
+        (left ^ mask, left),
+    )
+    result = 0
+    for index in minterms:
+        result |= (operands[2][index >> 2 & 1] &
+                   operands[1][index >> 1 & 1] &
+                   operands[0][index & 1])
+    if inverted:
+        result ^= mask
+    return result
+
+
+def step_packed_row(packed, width, rule):
+    '''Evolve a packed row of the given width by one generation.
+
+    The edge cells lack a neighbour so the result is two cells narrower,
+    its lowest bit being the cell above the second lowest bit of the input.
+    '''
+    new_width = width - _NEIGHBOURHOOD_SCOPE*2
+    if new_width <= 0:
+        return 0
+    mask = (1 << new_width) - 1
+    return _apply_rule_packed(
+        left=packed & mask,
+        centre=(packed >> 1) & mask,
+        right=(packed >> 2) & mask,
+        rule=rule,
+        mask=mask)
+
+
+def step_background(background, rule):
+    '''The next state of an infinite row of identical cells.'''
+    index = _NUM_NEIGHBOURHOOD_CONFIGURATIONS - 1 if background else 0
+    return bool(index_to_num(index) & rule)
+
+
+def background_after(background, rule, generations):
+    # A map from {False, True} to itself repeats every two applications
+    # after the first.
+    if generations > 2:
+        generations = 1 + (generations - 1) % 2
+    for _ in range(generations):
+        background = step_background(background, rule)
+    return background
+
+
+def step_packed_in_background(packed, width, rule, background):
+    '''Evolve a packed row lying within an infinite row of identical
+    background cells, the result being a cell wider on each side.
+    '''
+    scope = _NEIGHBOURHOOD_SCOPE*2
+    padded = packed << scope
+    if background:
+        padded |= ((1 << scope) - 1) * (1 | 1 << (width + scope))
+    return step_packed_row(padded, width + scope*2, rule)
+
+
+def trim_packed(packed, lower, upper, background):
+    '''Narrow the cells from lower to upper-1 to those that differ from
+    the background, giving the packed cells and their new bounds.
+    '''
+    mask = (1 << (upper - lower)) - 1
+    differences = (packed ^ mask if background else packed) & mask
+    if not differences:
+        return 0, lower, lower
+    start = (differences & -differences).bit_length() - 1
+    stop = differences.bit_length()
+    return ((packed >> start) & ((1 << (stop - start)) - 1),
+            lower + start, lower + stop)
+
+
+def window_of_packed(packed, lower, upper, background, window):
+    '''The cells of the window range, given those from lower to upper-1
+    with the background everywhere else.
+    '''
+    mask = (1 << len(window)) - 1
+    row = mask if background else 0
+    start = max(lower, window.start)
+    stop = min(upper, window.stop)
+    if start < stop:
+        segment_mask = ((1 << (stop - start)) - 1) << (start - window.start)
+        segment = (packed >> (start - lower)) << (start - window.start)
+        row = (row & ~segment_mask) | (segment & segment_mask)
+    return row
+
+
+INFINITE = 'infinite'
+PERIODIC = 'periodic'
+FIXED = 'fixed'
+
+BOUNDARIES = (INFINITE, PERIODIC, FIXED)
+
+
+def ensure_boundary_is_valid(boundary):
+    if boundary not in BOUNDARIES:
+        raise ValueError(f'Boundary {boundary!r} is invalid, '
+                         f'use one of {", ".join(BOUNDARIES)}')
+
+
+def pad_packed(packed, width, scope, boundary):
+    '''Widen a row by scope cells either side, wrapping around for a
+    periodic boundary or with dead cells for a fixed one.
+    '''
+    if boundary == FIXED or width == 0:
+        return packed << scope
+    if boundary != PERIODIC:
+        ensure_boundary_is_valid(boundary)
+        raise ValueError('An infinite boundary cannot be padded.')
+
+    copies = -(-scope // width)
+    tiled = 0
+    for _ in range(copies*2 + 1):
+        tiled = (tiled << width) | packed
+    start = copies*width - scope
+    return (tiled >> start) & ((1 << (width + scope*2)) - 1)
+
+
+def step_packed_bounded(packed, width, rule, boundary=PERIODIC):
+    '''Evolve a packed row by one generation keeping its width.'''
+    return step_packed_row(
+        pad_packed(packed, width, _NEIGHBOURHOOD_SCOPE, boundary),
+        width + _NEIGHBOURHOOD_SCOPE*2, rule)
+
+
+def calc_packed_window(lower, width, height, rule=_DEFAULT_RULE,
+                       starting_line=None, boundary=INFINITE):
+    '''Rows of the cells from x=lower to x=lower+width-1 as packed ints.
+
+    With an infinite boundary the first row is widened by the light cone of
+    the window so that every generation shown matches find_cell_value
+    exactly; otherwise the window is the whole lattice.
+    '''
+    ensure_wolfram_code_is_valid(rule)
+    ensure_boundary_is_valid(boundary)
+    if width < 0:
+        raise ValueError('width must be positive')
+    if height < 0:
+        raise ValueError('height must be positive')
+    if height == 0:
+        return
+
+    if starting_line is None:
+        starting_line = a_single_cell
+
+    if boundary != INFINITE:
+        row = cells_to_packed(
+            starting_line(x) for x in range(lower, lower + width))
+        for y in range(height):
+            yield row
+            if y < height - 1:
+                row = step_packed_bounded(row, width, rule, boundary)
+        return
+
+    margin = (height - 1) * _NEIGHBOURHOOD_SCOPE
+    row_width = width + margin*2
+    row = cells_to_packed(
+        starting_line(x) for x in range(lower - margin,
+                                        lower - margin + row_width))
+    mask = (1 << width) - 1
+
+    for y in range(height):
+        yield (row >> (margin - y*_NEIGHBOURHOOD_SCOPE)) & mask
+        if y < height - 1:
+            row = step_packed_row(row, row_width, rule)
+            row_width -= _NEIGHBOURHOOD_SCOPE*2
+
+
+def calc_packed_grid(width, height, rule=_DEFAULT_RULE, starting_line=None,
+                     boundary=INFINITE):
+    '''The packed equivalent of calc_grid.'''
+    if width is None:
+        width = width_at_given_generation(generation=height)
+    x_values = find_x_coordinates(width=width)
+    return calc_packed_window(
+        lower=x_values.start, width=width, height=height,
+        rule=rule, starting_line=starting_line, boundary=boundary)
+
+
+def packed_grid_to_grid(packed_rows, width):
+    return (packed_to_cells(packed, width) for packed in packed_rows)
+
+
 def grid_to_text(grid):
     return '\n'.join(map(symbols_to_string, grid))
 
 
 def _make_parser():
+    import argparse
+
     parser = argparse.ArgumentParser(
         description='Generate Wolfram elementary cellular automaton patterns.'
     )
@@ -264,23 +546,310 @@ def _make_parser():
     parser.add_argument(
         '-o', '--output',
         metavar='FILE',
-        help='Where to output the SVG to; if unspecified, '
+        help='Where to output the SVG (gzipped, if the name ends in .svgz, '
+        'or an animated GIF, if it ends '
+        f'in {_ANIMATION_EXTENSION}, or a greyscale image, if it ends in '
+        f'{" or ".join(_RASTER_EXTENSIONS)}, or a compressed history, if '
+        f'it ends in {_HISTORY_EXTENSION}) to; if unspecified, '
         'the output will be shown on screen.')
+    parser.add_argument(
+        '--radius',
+        type=int,
+        default=_NEIGHBOURHOOD_SCOPE,
+        help='How many cells either side make up the neighbourhood '
+        f'(default: {_NEIGHBOURHOOD_SCOPE}).')
+    parser.add_argument(
+        '--states',
+        type=int,
+        default=_NUMBER_OF_CHOICES,
+        help='Number of cell colours; more than two selects totalistic '
+        f'rules (default: {_NUMBER_OF_CHOICES}).')
+    parser.add_argument(
+        '--boundary',
+        choices=BOUNDARIES,
+        default=None,
+        help='How the edges of the view behave (default: '
+        f'{INFINITE}, or {PERIODIC} when reversible).')
+    parser.add_argument(
+        '--reversible',
+        action='store_true',
+        help='Use the second-order form of the rule, XORing each new '
+        'generation with the one before it.')
+    parser.add_argument(
+        '--ether',
+        action='store_true',
+        help='Only evolve the cells differing from the periodic background '
+        'found in the first generation (needs a periodic boundary).')
+    parser.add_argument(
+        '--window',
+        type=_validate_positive,
+        default=None,
+        help='Generations shown in each frame of an animation '
+        '(default: half the width or generations, whichever is less).')
+    parser.add_argument(
+        '--rows-per-frame',
+        type=_validate_positive,
+        default=1,
+        help='New generations drawn by each frame of an animation '
+        '(default: 1).')
+    parser.add_argument(
+        '--row-stride',
+        type=_validate_positive,
+        default=1,
+        help='Only output every nth generation (default: 1).')
+    parser.add_argument(
+        '--downsample',
+        type=_validate_positive,
+        default=1,
+        help='Shade each pixel of a greyscale image by the density of a '
+        'square block of this many cells across (default: 1).')
+    parser.add_argument(
+        '--replay',
+        metavar='HISTORY',
+        help='Read the generations back from a history written earlier '
+        'instead of evolving them.')
+    parser.add_argument(
+        '--codec',
+        choices=('zlib', 'lzma'),
+        default='zlib',
+        help='How a history is compressed (default: zlib).')
+    parser.add_argument(
+        '--prefetch',
+        metavar='DEPTH',
+        type=_validate_positive,
+        default=None,
+        help='Evolve on a background thread up to this many batches of '
+        'rows ahead of the output, reporting which was the bottleneck.')
+    parser.add_argument(
+        '--batch',
+        metavar='MANIFEST',
+        help='Run every job of a JSON lines manifest (- for stdin), '
+        'using the other options as defaults.')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of batch jobs to run at once '
+        '(default: the number of CPUs).')
+    parser.add_argument(
+        '--summary',
+        metavar='FILE',
+        help='Where to write the JSON timings and failures of a batch.')
     return parser
 
 
-if __name__ == '__main__':
-    parser = _make_parser()
-    settings = parser.parse_args()
+# Options a manifest's jobs take no notice of.
+_NOT_BATCH_OPTIONS = (
+    'output', 'reversible', 'ether', 'window', 'rows_per_frame',
+    'row_stride', 'downsample', 'replay', 'codec', 'prefetch')
+
+
+def _batch_defaults(settings):
+    return {
+        'rule': settings.rule,
+        'generations': settings.generations,
+        'width': settings.width,
+        'radius': settings.radius,
+        'states': settings.states,
+        'boundary': settings.boundary or INFINITE,
+    }
 
-    grid = calc_grid(
-        width=settings.width,
+
+def _calc_rows_from_settings(settings):
+    '''The rows, packed ints for binary rules or bytes of states for
+    totalistic ones, and their width.
+    '''
+    import generalised_rules
+
+    width = settings.width
+    if settings.reversible:
+        import reversible
+        if width is None:
+            width = width_at_given_generation(generation=settings.generations)
+        run = reversible.SecondOrderRun(
+            width=width,
+            rule=settings.rule,
+            boundary=settings.boundary or PERIODIC)
+        return run.packed_rows(settings.generations), width
+
+    if settings.ether:
+        import ether
+        if width is None:
+            width = width_at_given_generation(generation=settings.generations)
+        rows = ether.calc_packed_window(
+            lower=find_x_coordinates(width=width).start,
+            width=width,
+            height=settings.generations,
+            rule=settings.rule)
+        return rows, width
+
+    if width is None:
+        width = generalised_rules.width_at_given_generation(
+            settings.generations, settings.radius)
+    rows = generalised_rules.calc_window(
+        lower=find_x_coordinates(width=width).start,
+        width=width,
         height=settings.generations,
-        rule=settings.rule)
+        rule=settings.rule,
+        radius=settings.radius,
+        states=settings.states,
+        boundary=settings.boundary or INFINITE)
+    return rows, width
+
+
+def rows_to_grid(rows, width):
+    '''Cells of rows that are either packed ints or sequences of states.'''
+    return (
+        packed_to_cells(row, width) if isinstance(row, int) else row
+        for row in rows)
+
+
+def _write_animation(rows, width, settings):
+    import animation
+
+    window = settings.window
+    if window is None:
+        window = max(min(width, settings.generations) // 2, 1)
+    with open(settings.output, 'wb') as f:
+        animation.write_gif(
+            animation.rows_to_pixels(rows, width), f,
+            width=width, window=window,
+            rows_per_frame=settings.rows_per_frame,
+            palette=animation.default_palette(settings.states))
+
+
+def _write_raster(rows, width, settings):
+    import raster
+
+    raster.write_raster(
+        rows, settings.output, width=width,
+        generations=settings.generations,
+        downsample=settings.downsample,
+        row_stride=settings.row_stride,
+        states=settings.states)
+
+
+def main(args=None):
+    import generalised_rules
+
+    parser = _make_parser()
+    settings = parser.parse_args(args)
+
+    if settings.batch is not None:
+        import batch
+        for dest in _NOT_BATCH_OPTIONS:
+            if getattr(settings, dest) != parser.get_default(dest):
+                option = '--' + dest.replace('_', '-')
+                parser.error(f'{option} is not supported with --batch.')
+        if settings.workers is not None and settings.workers < 1:
+            parser.error('--workers must be at least 1.')
+        return batch.main(
+            settings.batch, workers=settings.workers,
+            summary=settings.summary, defaults=_batch_defaults(settings))
+
+    try:
+        generalised_rules.ensure_rule_is_valid(
+            settings.rule, radius=settings.radius, states=settings.states)
+    except ValueError as e:
+        parser.error(str(e))
+    if settings.reversible:
+        if settings.boundary == INFINITE:
+            parser.error('--reversible needs a finite boundary.')
+        if (settings.radius, settings.states) != (
+                _NEIGHBOURHOOD_SCOPE, _NUMBER_OF_CHOICES):
+            parser.error('--reversible only supports elementary rules.')
+    if settings.ether:
+        if settings.reversible or settings.boundary != PERIODIC or (
+                settings.radius, settings.states) != (
+                    _NEIGHBOURHOOD_SCOPE, _NUMBER_OF_CHOICES):
+            parser.error('--ether needs an elementary rule and a periodic '
+                         'boundary.')
+
+    try:
+        ensure_output_is_drawable(
+            settings.output, 1, 1, settings.states)
+    except ValueError as e:
+        parser.error(str(e))
+    raster_output = settings.output is not None and \
+        settings.output.endswith(_RASTER_EXTENSIONS)
+    if settings.downsample != 1 and not raster_output:
+        parser.error('--downsample only applies to greyscale images.')
+
+    if settings.replay is not None:
+        import history
+        try:
+            reader = history.open_history(settings.replay)
+        except (OSError, ValueError) as e:
+            parser.error(f'Cannot replay {settings.replay}: {e}')
+        with reader:
+            settings.generations = len(reader)
+            settings.states = _NUMBER_OF_CHOICES
+            _ensure_image_is_not_empty(parser, reader.width, settings)
+            _write_rows(iter(reader), reader.width, settings)
+        return
+
+    rows, width = _calc_rows_from_settings(settings)
+    _ensure_image_is_not_empty(parser, width, settings)
+    _write_rows(rows, width, settings)
+
+
+def _ensure_image_is_not_empty(parser, width, settings):
+    try:
+        ensure_output_is_drawable(
+            settings.output, width, settings.generations, settings.states)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def ensure_output_is_drawable(output, width, generations, states):
+    '''Raise ValueError if the output file cannot hold the evolution.'''
+    if output is None:
+        return
+    if output.endswith(_RASTER_EXTENSIONS + (_ANIMATION_EXTENSION,)) and \
+            (width == 0 or generations == 0):
+        raise ValueError(
+            'An image needs at least one cell and one generation.')
+    if output.endswith(_HISTORY_EXTENSION) and states != _NUMBER_OF_CHOICES:
+        raise ValueError('Histories only hold two state rules.')
+
+
+def _write_rows(rows, width, settings):
+    if settings.prefetch is None:
+        _write_output(rows, width, settings)
+        return
+
+    import pipeline
+    prefetcher = pipeline.Prefetcher(rows, depth=settings.prefetch)
+    try:
+        _write_output(prefetcher, width, settings)
+    finally:
+        prefetcher.close()
+    print(pipeline.format_stats(prefetcher.stats()), file=sys.stderr)
+
+
+def _write_output(rows, width, settings):
+    import generalised_rules
+
+    if settings.output is not None and \
+            settings.output.endswith(_RASTER_EXTENSIONS):
+        _write_raster(rows, width, settings)
+        return
+    rows = islice(rows, 0, None, settings.row_stride)
 
     if settings.output is None:
-        print(grid_to_text(grid))
+        print(generalised_rules.grid_to_text(rows_to_grid(rows, width)))
+    elif settings.output.endswith(_HISTORY_EXTENSION):
+        import history
+        history.save_history(
+            settings.output, rows, width, codec=settings.codec)
+    elif settings.output.endswith(_ANIMATION_EXTENSION):
+        _write_animation(rows, width, settings)
     else:
-        svg = '\n'.join(to_svg(grid))
-        with open(settings.output, 'w') as f:
-            f.write(svg)
+        import svg
+        svg.write_svg(
+            rows, settings.output, width,
+            -(-settings.generations // settings.row_stride))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
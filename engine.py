@@ -0,0 +1,128 @@
+'''An engine object holding its own caches, for sharing between threads.
+
+The module level functions cache what they evolve in process-wide
+lru_caches. An Engine instead keeps a bounded cache of evolved windows per
+instance, guarded by a lock that is only held to look up and store
+results, never while evolving, so threads (truly parallel ones on a
+free-threaded build) only contend for the dictionary. Two threads asking
+for the same window at once may both evolve it, but the first result
+stored is the one both are given.
+
+Rules of a symmetry class share their cached windows, as in rule_symmetry.
+'''
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+
+import elementary_cellular_automaton as eca
+import rule_symmetry
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses size max_size')
+
+DEFAULT_MAX_WINDOWS = 1024
+
+
+class Engine:
+    '''Evolves elementary rules, remembering up to max_windows of the
+    most recently used windows.
+    '''
+    __slots__ = ('max_windows', '_lock', '_windows', '_hits', '_misses')
+
+    def __init__(self, max_windows=DEFAULT_MAX_WINDOWS):
+        if max_windows < 0:
+            raise ValueError('max_windows must be positive')
+        self.max_windows = max_windows
+        self._lock = threading.Lock()
+        self._windows = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def _cached_window(self, lower, width, height, rule, starting_line,
+                       boundary=eca.INFINITE):
+        key = (lower, width, height, rule, starting_line, boundary)
+        with self._lock:
+            rows = self._windows.get(key)
+            if rows is not None:
+                self._windows.move_to_end(key)
+                self._hits += 1
+                return rows
+            self._misses += 1
+
+        rows = tuple(eca.calc_packed_window(
+            lower=lower, width=width, height=height, rule=rule,
+            starting_line=starting_line, boundary=boundary))
+
+        with self._lock:
+            rows = self._windows.setdefault(key, rows)
+            self._windows.move_to_end(key)
+            while len(self._windows) > self.max_windows:
+                self._windows.popitem(last=False)
+        return rows
+
+    def calc_packed_window(self, lower, width, height,
+                           rule=eca._DEFAULT_RULE, starting_line=None,
+                           boundary=eca.INFINITE):
+        '''As elementary_cellular_automaton.calc_packed_window, as a tuple.
+        '''
+        eca.ensure_wolfram_code_is_valid(rule)
+        eca.ensure_boundary_is_valid(boundary)
+        if width < 0:
+            raise ValueError('width must be positive')
+        if height < 0:
+            raise ValueError('height must be positive')
+        if starting_line is None:
+            starting_line = eca.a_single_cell
+
+        if boundary != eca.INFINITE:
+            # Reflecting a finite lattice would also move its edges.
+            return self._cached_window(
+                lower, width, height, rule, starting_line, boundary)
+        return tuple(rule_symmetry.transformed_window(
+            lower, width, height, rule, starting_line, self._cached_window))
+
+    def calc_packed_grid(self, width, height, rule=eca._DEFAULT_RULE,
+                         starting_line=None, boundary=eca.INFINITE):
+        '''As elementary_cellular_automaton.calc_packed_grid, as a tuple.'''
+        if width is None:
+            width = eca.width_at_given_generation(generation=height)
+        return self.calc_packed_window(
+            lower=eca.find_x_coordinates(width=width).start,
+            width=width, height=height, rule=rule,
+            starting_line=starting_line, boundary=boundary)
+
+    def find_cell_value(self, x, y, rule=eca._DEFAULT_RULE,
+                        starting_line=None):
+        '''As elementary_cellular_automaton.find_cell_value.'''
+        if y < 0:
+            eca.ensure_wolfram_code_is_valid(rule)
+            return False
+        rows = self.calc_packed_window(
+            lower=x, width=1, height=y + 1, rule=rule,
+            starting_line=starting_line)
+        return bool(rows[-1])
+
+    def run_many(self, jobs, workers=None):
+        '''Evolve each job, a mapping of calc_packed_grid's arguments, on a
+        pool of threads, giving the grids in the order of the jobs.
+        '''
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError('At least one worker is needed.')
+        jobs = list(jobs)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda job: self.calc_packed_grid(**job), jobs))
+
+    def cache_info(self):
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits, misses=self._misses,
+                size=len(self._windows), max_size=self.max_windows)
+
+    def cache_clear(self):
+        with self._lock:
+            self._windows.clear()
+            self._hits = 0
+            self._misses = 0
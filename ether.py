@@ -0,0 +1,362 @@
+'''Evolution over a periodic background (an ether), computing only the
+defects in it.
+
+http://en.wikipedia.org/wiki/Rule_110#The_ether
+
+Rules such as 110 and 54 settle into a background that repeats every few
+cells, across which gliders travel. A row that repeats every period cells
+steps to another that does, found by stepping a single tile of period
+cells as a ring, so the ether is held as that tile alone. Only the
+defects, the intervals where the cells differ from the ether, are evolved
+cell by cell, each growing by at most a cell either side a generation and
+trimmed back to where it still differs. Defects are merged when their
+light cones meet and split again where ether opens up between them, and
+cells are only expanded from the tile when a window is rendered.
+
+Lattice coordinates run from 0 to width-1 on a ring (whose width must be
+a multiple of the period), or over every integer on an infinite lattice.
+'''
+from collections import Counter, namedtuple
+import re
+
+import elementary_cellular_automaton as eca
+
+Defect = namedtuple('Defect', 'lower upper packed')
+
+DEFAULT_MAX_PERIOD = 32
+DEFAULT_MIN_GAP = 32
+DEFAULT_SPLIT_EVERY = 16
+
+# Defects closer than this would need each other's cells to step.
+_MIN_SEPARATION = 2
+
+
+def _mask(width):
+    return (1 << width) - 1
+
+
+def _rotate(tile, period, shift):
+    '''Bit j of the result is bit (j + shift) mod period of the tile.'''
+    shift %= period
+    return ((tile >> shift) | (tile << (period - shift))) & _mask(period)
+
+
+def background_window(tile, period, lower, width):
+    '''The packed cells from x=lower of the row repeating the tile, whose
+    bit i is every cell x with x mod period equal to i.
+    '''
+    if width <= 0:
+        return 0
+    row = _rotate(tile, period, lower)
+    length = period
+    while length < width:
+        row |= row << length
+        length *= 2
+    return row & _mask(width)
+
+
+def step_tile(tile, period, rule):
+    return eca.step_packed_bounded(tile, period, rule, eca.PERIODIC)
+
+
+def tile_orbit(tile, period, rule, limit=1 << 12):
+    '''The generations before the ether starts repeating, and how often
+    it then repeats, or None if that takes more than limit generations.
+    '''
+    seen = {}
+    for generation in range(limit):
+        if tile in seen:
+            return seen[tile], generation - seen[tile]
+        seen[tile] = generation
+        tile = step_tile(tile, period, rule)
+    return None
+
+
+def _agreement(packed, width, period, ring):
+    '''The fraction of cells equal to the one period cells to their right.
+    '''
+    if ring:
+        return 1 - bin(packed ^ _rotate(packed, width, period)).count('1') \
+            / width
+    compared = width - period
+    return 1 - bin((packed ^ (packed >> period)) & _mask(compared)).count(
+        '1') / compared
+
+
+def detect_ether(packed, width, lower=0, ring=False,
+                 max_period=DEFAULT_MAX_PERIOD):
+    '''The tile and period of the background most of the row repeats.
+
+    The row's lowest bit is the cell at x=lower. Periods run from one to
+    max_period, only including those dividing the width of a ring, the
+    one with the most cells agreeing with the cell a period along being
+    chosen, then the tile occurring most often.
+    '''
+    if width <= 0:
+        raise ValueError('An ether can only be found in a non-empty row.')
+    periods = [
+        period for period in range(1, min(max_period, width) + 1)
+        if (width % period == 0 if ring else period < width or width == 1)]
+    if width == 1:
+        return packed & 1, 1
+    period = max(
+        periods,
+        key=lambda period: (
+            _agreement(packed, width, period, ring), -period))
+    chunks = Counter(
+        (packed >> start) & _mask(period)
+        for start in range(0, width - period + 1, period))
+    chunk, _ = max(chunks.items(), key=lambda item: (item[1], -item[0]))
+    return _rotate(chunk, period, -lower), period
+
+
+class EtherRun:
+    '''An evolution over an ether given by its tile and period, with the
+    given Defects, on a ring of lattice_width cells or an infinite lattice
+    if that is None.
+    '''
+    __slots__ = ('rule', 'period', 'lattice_width', 'generation',
+                 'min_gap', 'split_every', 'tile', '_defects', '_dense')
+
+    def __init__(self, rule, tile, period, defects=(), lattice_width=None,
+                 min_gap=DEFAULT_MIN_GAP, split_every=DEFAULT_SPLIT_EVERY):
+        eca.ensure_wolfram_code_is_valid(rule)
+        if period < 1:
+            raise ValueError('period must be strictly positive')
+        if lattice_width is not None and (
+                lattice_width < 1 or lattice_width % period):
+            raise ValueError(
+                f'A ring of {lattice_width} cells cannot hold an ether '
+                f'repeating every {period}.')
+        if min_gap < _MIN_SEPARATION or split_every < 1:
+            raise ValueError(
+                f'min_gap must be at least {_MIN_SEPARATION} and '
+                'split_every strictly positive.')
+        self.rule = rule
+        self.period = period
+        self.lattice_width = lattice_width
+        self.generation = 0
+        self.min_gap = min_gap
+        self.split_every = split_every
+        self.tile = tile & _mask(period)
+        self._dense = None
+        self._defects = []
+        for defect in defects:
+            self._defects.extend(self._trimmed(*defect))
+        self._merge()
+
+    @classmethod
+    def from_row(cls, rule, packed, width, ring=True,
+                 max_period=DEFAULT_MAX_PERIOD, **kwargs):
+        '''Find the ether of a row of cells from x=0, taking every cell of
+        an infinite lattice beyond the row to be ether.
+        '''
+        tile, period = detect_ether(
+            packed, width, ring=ring, max_period=max_period)
+        run = cls(
+            rule, tile, period, [Defect(0, width, packed)],
+            lattice_width=width if ring else None, **kwargs)
+        run._split()
+        return run
+
+    def _background(self, lower, width):
+        return background_window(self.tile, self.period, lower, width)
+
+    def _trimmed(self, lower, upper, packed):
+        '''The defect less any ether at its ends, if anything is left.'''
+        diff = packed ^ self._background(lower, upper - lower)
+        if not diff:
+            return []
+        low = (diff & -diff).bit_length() - 1
+        high = diff.bit_length()
+        return [Defect(lower + low, lower + high,
+                       (packed >> low) & _mask(high - low))]
+
+    def _join(self, first, second):
+        gap = second.lower - first.upper
+        width = first.upper - first.lower
+        return Defect(
+            first.lower, max(first.upper, second.upper),
+            first.packed |
+            self._background(first.upper, gap) << width |
+            second.packed << (second.lower - first.lower))
+
+    def _merge(self):
+        '''Join any defects too close to step apart, going dense if a ring
+        has no ether left between them.
+        '''
+        if self._dense is not None:
+            return
+        ring = self.lattice_width
+        defects = self._defects
+        if ring is not None:
+            defects = [
+                Defect(defect.lower % ring,
+                       defect.upper - defect.lower + defect.lower % ring,
+                       defect.packed)
+                for defect in defects]
+        defects.sort()
+
+        merged = []
+        for defect in defects:
+            if merged and defect.lower - merged[-1].upper < _MIN_SEPARATION:
+                merged[-1] = self._join(merged[-1], defect)
+            else:
+                merged.append(defect)
+
+        if ring is not None and merged:
+            while len(merged) > 1 and (
+                    merged[0].lower + ring - merged[-1].upper <
+                    _MIN_SEPARATION):
+                first = merged.pop(0)
+                merged[-1] = self._join(
+                    merged[-1],
+                    Defect(first.lower + ring, first.upper + ring,
+                           first.packed))
+            only = merged[0]
+            if len(merged) == 1 and \
+                    ring - (only.upper - only.lower) < _MIN_SEPARATION:
+                self._dense = self._ring_row(merged)
+                merged = []
+        self._defects = merged
+
+    def _ring_row(self, defects):
+        '''The cells of the whole ring from x=0.'''
+        return self.window(0, self.lattice_width, defects)
+
+    def _split(self):
+        '''Separate defects where at least min_gap cells of ether lie
+        between them, and leave dense stepping where the ring has enough
+        ether to start from.
+        '''
+        gaps = re.compile(f'0{{{self.min_gap},}}')
+        if self._dense is not None:
+            ring = self.lattice_width
+            diff = self._dense ^ self._background(0, ring)
+            if not diff:
+                self._dense = None
+                return
+            digits = format(diff, f'0{ring}b')[::-1]
+            longest = max(
+                (match for match in gaps.finditer(digits + digits)
+                 if match.start() < ring),
+                key=lambda match: match.end() - match.start(),
+                default=None)
+            if longest is None:
+                return
+            start = longest.end() % ring
+            width = ring - min(longest.end() - longest.start(), ring)
+            self._defects = [Defect(
+                start, start + width,
+                background_window(self._dense, ring, start, width))]
+            self._dense = None
+
+        split = []
+        for defect in self._defects:
+            width = defect.upper - defect.lower
+            diff = defect.packed ^ self._background(defect.lower, width)
+            start = 0
+            for match in gaps.finditer(format(diff, f'0{width}b')[::-1]):
+                split.append(Defect(
+                    defect.lower + start, defect.lower + match.start(),
+                    (defect.packed >> start) & _mask(match.start() - start)))
+                start = match.end()
+            split.append(Defect(
+                defect.lower + start, defect.upper,
+                (defect.packed >> start) & _mask(width - start)))
+        self._defects = split
+
+    def _step_defect(self, defect, following_tile):
+        width = defect.upper - defect.lower
+        padded = (
+            self._background(defect.lower - 2, 2) |
+            defect.packed << 2 |
+            self._background(defect.upper, 2) << (width + 2))
+        stepped = eca.step_packed_row(padded, width + 4, self.rule)
+        lower = defect.lower - 1
+        diff = stepped ^ background_window(
+            following_tile, self.period, lower, width + 2)
+        if not diff:
+            return []
+        low = (diff & -diff).bit_length() - 1
+        high = diff.bit_length()
+        return [Defect(lower + low, lower + high,
+                       (stepped >> low) & _mask(high - low))]
+
+    def step(self, generations=1):
+        for _ in range(generations):
+            following_tile = step_tile(self.tile, self.period, self.rule)
+            if self._dense is not None:
+                self._dense = eca.step_packed_bounded(
+                    self._dense, self.lattice_width, self.rule, eca.PERIODIC)
+            else:
+                self._defects = [
+                    stepped
+                    for defect in self._defects
+                    for stepped in self._step_defect(defect, following_tile)]
+            self.tile = following_tile
+            self.generation += 1
+            if self.generation % self.split_every == 0:
+                self._split()
+            self._merge()
+
+    def defects(self):
+        '''The (lower, upper) extent of each defect, upper exclusive, or of
+        the whole ring when no ether is left to skip.
+        '''
+        if self._dense is not None:
+            return [(0, self.lattice_width)]
+        return [(defect.lower, defect.upper) for defect in self._defects]
+
+    def window(self, lower, width, defects=None):
+        '''The packed cells of the current generation from x=lower.'''
+        ring = self.lattice_width
+        if self._dense is not None and defects is None:
+            return background_window(self._dense, ring, lower, width)
+        if defects is None:
+            defects = self._defects
+
+        cells = self._background(lower, width)
+        upper = lower + width
+        offsets = (0,) if ring is None else (-ring, 0, ring)
+        for defect in defects:
+            for offset in offsets:
+                start = max(defect.lower + offset, lower)
+                stop = min(defect.upper + offset, upper)
+                if start >= stop:
+                    continue
+                mask = _mask(stop - start)
+                bits = (defect.packed >> (start - defect.lower - offset)) \
+                    & mask
+                cells = (cells & ~(mask << (start - lower))) | \
+                    bits << (start - lower)
+        return cells
+
+    def cell(self, x):
+        return bool(self.window(x, 1))
+
+
+def calc_packed_window(lower, width, height, rule=eca._DEFAULT_RULE,
+                       starting_line=None, boundary=eca.PERIODIC, **kwargs):
+    '''As elementary_cellular_automaton.calc_packed_window over a ring,
+    skipping whatever ether is found in the first row.
+    '''
+    eca.ensure_wolfram_code_is_valid(rule)
+    if boundary != eca.PERIODIC:
+        raise ValueError('Ether skipping needs a periodic boundary.')
+    if width < 0:
+        raise ValueError('width must be positive')
+    if height < 0:
+        raise ValueError('height must be positive')
+    if starting_line is None:
+        starting_line = eca.a_single_cell
+    if width == 0:
+        yield from (0 for _ in range(height))
+        return
+
+    row = eca.cells_to_packed(map(starting_line, range(lower, lower + width)))
+    run = EtherRun.from_row(rule, row, width, **kwargs)
+    for generation in range(height):
+        if generation:
+            run.step()
+        yield run.window(0, width)
@@ -0,0 +1,272 @@
+'''Binary rules with a larger neighbourhood radius and k-colour totalistic
+rules, both compiled into lookup tables.
+
+http://mathworld.wolfram.com/ElementaryCellularAutomaton.html
+http://mathworld.wolfram.com/TotalisticCellularAutomaton.html
+
+With two states the rule code is read like a Wolfram code over the
+2**(2*radius + 1) neighbourhoods, so radius 1 gives the elementary rules.
+With more states the code's base-k digits give the new state for each
+possible total of the neighbourhood, lowest total first.
+'''
+from functools import lru_cache
+from itertools import accumulate, chain
+from operator import sub
+
+import elementary_cellular_automaton as eca
+
+DEFAULT_RADIUS = 1
+DEFAULT_STATES = 2
+
+_STATE_CHARS = ' #23456789abcdefghijklmnopqrstuvwxyz'
+
+MIN_RADIUS = 1
+MIN_STATES = 2
+MAX_STATES = len(_STATE_CHARS)
+
+_CONSTANT_REGISTERS = 2
+
+
+def neighbourhood_size(radius):
+    return radius*2 + 1
+
+
+def is_totalistic(states):
+    return states > 2
+
+
+def number_of_totals(radius, states):
+    return neighbourhood_size(radius)*(states - 1) + 1
+
+
+def number_of_rules(radius=DEFAULT_RADIUS, states=DEFAULT_STATES):
+    if is_totalistic(states):
+        return states**number_of_totals(radius, states)
+    return 2**(2**neighbourhood_size(radius))
+
+
+def ensure_shape_is_valid(radius, states):
+    if radius < MIN_RADIUS:
+        raise ValueError(f'Radius {radius} must be at least {MIN_RADIUS}.')
+    if not (MIN_STATES <= states <= MAX_STATES):
+        raise ValueError(f'States {states} must be between {MIN_STATES} '
+                         f'and {MAX_STATES} inclusive.')
+
+
+def ensure_rule_is_valid(rule, radius=DEFAULT_RADIUS, states=DEFAULT_STATES):
+    ensure_shape_is_valid(radius, states)
+    high = number_of_rules(radius, states) - 1
+    if not (0 <= rule <= high):
+        raise ValueError(
+            f'Rule {rule} must be between 0 and {high} inclusive.')
+
+
+@lru_cache(maxsize=None)
+def compile_rule(rule, radius=DEFAULT_RADIUS, states=DEFAULT_STATES):
+    '''The new state for each neighbourhood index (binary rules, the
+    leftmost neighbour being the highest bit) or each neighbourhood total
+    (totalistic rules).
+    '''
+    ensure_rule_is_valid(rule, radius, states)
+    if is_totalistic(states):
+        return bytes(
+            rule // states**total % states
+            for total in range(number_of_totals(radius, states)))
+    return bytes(
+        rule >> index & 1
+        for index in range(2**neighbourhood_size(radius)))
+
+
+def _compile_program(table, variable, program, registers):
+    '''Shannon-expand a binary lookup table into multiplexer operations,
+    sharing identical sub-tables, and return the register of the result.
+    '''
+    if not any(table):
+        return 0
+    if all(table):
+        return 1
+    if table in registers:
+        return registers[table]
+
+    half = len(table) // 2
+    low = _compile_program(table[:half], variable + 1, program, registers)
+    high = _compile_program(table[half:], variable + 1, program, registers)
+    if low == high:
+        register = low
+    else:
+        program.append((variable, low, high))
+        register = _CONSTANT_REGISTERS + len(program) - 1
+    registers[table] = register
+    return register
+
+
+@lru_cache(maxsize=None)
+def compile_packed_rule(rule, radius=DEFAULT_RADIUS):
+    '''A straight line program evaluating a binary rule on packed rows.'''
+    program = []
+    result = _compile_program(
+        compile_rule(rule, radius, 2), 0, program, {})
+    return tuple(program), result
+
+
+def _run_program(compiled, operands, mask):
+    program, result = compiled
+    registers = [0, mask]
+    for variable, low, high in program:
+        low_value = registers[low]
+        registers.append(
+            low_value ^ ((low_value ^ registers[high]) & operands[variable]))
+    return registers[result]
+
+
+def step_packed_row(packed, width, rule, radius=DEFAULT_RADIUS):
+    '''As elementary_cellular_automaton.step_packed_row for a binary rule
+    of any radius, the result being radius cells narrower on each side.
+    '''
+    new_width = width - radius*2
+    if new_width <= 0:
+        return 0
+    mask = (1 << new_width) - 1
+    operands = tuple(
+        (packed >> offset) & mask
+        for offset in range(neighbourhood_size(radius)))
+    return _run_program(compile_packed_rule(rule, radius), operands, mask)
+
+
+def step_totalistic_row(row, rule, radius=DEFAULT_RADIUS,
+                        states=DEFAULT_STATES):
+    '''Evolve a row of one byte per cell, sliding the neighbourhood total
+    along rather than summing each neighbourhood afresh.
+    '''
+    size = neighbourhood_size(radius)
+    if len(row) < size:
+        return b''
+    table = compile_rule(rule, radius, states)
+    totals = accumulate(chain(
+        (sum(row[:size]),),
+        map(sub, row[size:], row)))
+    return bytes(map(table.__getitem__, totals))
+
+
+def pad_totalistic_row(row, scope, boundary):
+    '''As elementary_cellular_automaton.pad_packed for rows of one byte
+    per cell.
+    '''
+    if boundary == eca.FIXED or not row:
+        return bytes(scope) + row + bytes(scope)
+    if boundary != eca.PERIODIC:
+        eca.ensure_boundary_is_valid(boundary)
+        raise ValueError('An infinite boundary cannot be padded.')
+
+    copies = -(-scope // len(row))
+    start = copies*len(row) - scope
+    return (row * (copies*2 + 1))[start:start + len(row) + scope*2]
+
+
+def step_bounded_row(row, width, rule, radius=DEFAULT_RADIUS,
+                     states=DEFAULT_STATES, boundary=eca.PERIODIC):
+    '''Evolve a row by one generation keeping its width.'''
+    if is_totalistic(states):
+        return step_totalistic_row(
+            pad_totalistic_row(row, radius, boundary), rule, radius, states)
+    return step_packed_row(
+        eca.pad_packed(row, width, radius, boundary),
+        width + radius*2, rule, radius)
+
+
+def _state(value, states):
+    state = int(value)
+    if not (0 <= state < states):
+        raise ValueError(
+            f'Cell state {state} must be between 0 and {states - 1} '
+            'inclusive.')
+    return state
+
+
+def calc_window(lower, width, height, rule, radius=DEFAULT_RADIUS,
+                states=DEFAULT_STATES, starting_line=None,
+                boundary=eca.INFINITE):
+    '''Rows from x=lower to x=lower+width-1, packed ints for binary rules or
+    bytes of one state per cell for totalistic ones.
+    '''
+    ensure_rule_is_valid(rule, radius, states)
+    eca.ensure_boundary_is_valid(boundary)
+    if width < 0:
+        raise ValueError('width must be positive')
+    if height < 0:
+        raise ValueError('height must be positive')
+    if height == 0:
+        return
+
+    if starting_line is None:
+        starting_line = eca.a_single_cell
+
+    if boundary != eca.INFINITE:
+        xs = range(lower, lower + width)
+        if is_totalistic(states):
+            row = bytes(_state(starting_line(x), states) for x in xs)
+        else:
+            row = eca.cells_to_packed(
+                _state(starting_line(x), states) for x in xs)
+        for y in range(height):
+            yield row
+            if y < height - 1:
+                row = step_bounded_row(
+                    row, width, rule, radius, states, boundary)
+        return
+
+    margin = (height - 1) * radius
+    row_width = width + margin*2
+    xs = range(lower - margin, lower - margin + row_width)
+
+    if is_totalistic(states):
+        row = bytes(_state(starting_line(x), states) for x in xs)
+        for y in range(height):
+            start = margin - y*radius
+            yield row[start:start + width]
+            if y < height - 1:
+                row = step_totalistic_row(row, rule, radius, states)
+        return
+
+    row = eca.cells_to_packed(_state(starting_line(x), states) for x in xs)
+    mask = (1 << width) - 1
+    for y in range(height):
+        yield (row >> (margin - y*radius)) & mask
+        if y < height - 1:
+            row = step_packed_row(row, row_width, rule, radius)
+            row_width -= radius*2
+
+
+def width_at_given_generation(generation, radius=DEFAULT_RADIUS):
+    '''Holds only for pyramid based rules like rule 30.'''
+    return (eca.width_at_given_generation(generation) - 1)*radius + 1
+
+
+def calc_grid(width, height, rule, radius=DEFAULT_RADIUS,
+              states=DEFAULT_STATES, starting_line=None,
+              boundary=eca.INFINITE):
+    '''As elementary_cellular_automaton.calc_grid, giving each row as a
+    sequence of cell states.
+    '''
+    if width is None:
+        width = width_at_given_generation(height, radius)
+    rows = calc_window(
+        lower=eca.find_x_coordinates(width=width).start,
+        width=width, height=height, rule=rule,
+        radius=radius, states=states, starting_line=starting_line,
+        boundary=boundary)
+    if is_totalistic(states):
+        return rows
+    return eca.packed_grid_to_grid(rows, width)
+
+
+def state_to_char(state):
+    index = int(state)
+    if not (0 <= index < MAX_STATES):
+        raise ValueError('%r is not a valid state value.' % state)
+    return _STATE_CHARS[index]
+
+
+def grid_to_text(grid):
+    return '\n'.join(
+        ''.join(map(state_to_char, row)) for row in grid)
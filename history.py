@@ -0,0 +1,227 @@
+'''A compact file format for long histories of packed rows.
+
+Rows are stored in blocks, each starting with a keyframe (the row as it
+is) followed by every later row XORed with the one before it. Rules that
+settle down or send a few gliders across a still background change only
+a handful of cells a generation, so the deltas are nearly all zero bytes
+and the compressor (zlib or lzma) shrinks them to almost nothing. An
+index of the blocks at the end of the file lets any generation be read
+by decoding a single block.
+
+The layout is a header, the compressed blocks, the index and a footer:
+
+    header  b'ECAH', version, codec, width, rows per block
+    blocks  one compressed run of rows, bytes_per_row bytes each
+    index   (offset, rows, length) of each block
+    footer  offset of the index, number of blocks, b'ECAH'
+'''
+import lzma
+import struct
+import zlib
+
+import buffers
+import elementary_cellular_automaton as eca
+
+EXTENSION = '.ecah'
+
+ZLIB = 'zlib'
+LZMA = 'lzma'
+CODECS = (ZLIB, LZMA)
+
+DEFAULT_BLOCK_ROWS = 256
+
+_MAGIC = b'ECAH'
+_VERSION = 1
+_HEADER = struct.Struct('>4sBBII')
+_INDEX_ENTRY = struct.Struct('>QII')
+_FOOTER = struct.Struct('>QI4s')
+
+_COMPRESSORS = {
+    ZLIB: (zlib.compress, zlib.decompress),
+    LZMA: (lzma.compress, lzma.decompress),
+}
+
+
+def ensure_codec_is_valid(codec):
+    if codec not in CODECS:
+        raise ValueError(
+            f'Codec {codec!r} must be one of {", ".join(CODECS)}.')
+
+
+class HistoryWriter:
+    '''Appends packed rows of the given width to a binary file object.'''
+    __slots__ = ('file', 'width', 'block_rows', 'codec', 'rows',
+                 '_row_bytes', '_block', '_pending_rows', '_previous',
+                 '_index')
+
+    def __init__(self, file, width, block_rows=DEFAULT_BLOCK_ROWS,
+                 codec=ZLIB):
+        ensure_codec_is_valid(codec)
+        if width < 0:
+            raise ValueError('width must be positive')
+        if block_rows < 1:
+            raise ValueError('A block must hold at least one row.')
+        self.file = file
+        self.width = width
+        self.block_rows = block_rows
+        self.codec = codec
+        self.rows = 0
+        self._row_bytes = buffers.bytes_per_row(width)
+        self._block = bytearray()
+        self._pending_rows = 0
+        self._previous = 0
+        self._index = []
+        file.write(_HEADER.pack(
+            _MAGIC, _VERSION, CODECS.index(codec), width, block_rows))
+
+    def append(self, packed):
+        if packed >> self.width:
+            raise ValueError(
+                f'The row has cells beyond its width of {self.width}.')
+        keyframe = self.rows % self.block_rows == 0
+        delta = packed if keyframe else packed ^ self._previous
+        self._block.extend(delta.to_bytes(self._row_bytes, 'little'))
+        self._previous = packed
+        self.rows += 1
+        self._pending_rows += 1
+        if self._pending_rows == self.block_rows:
+            self._write_block()
+
+    def extend(self, rows):
+        for packed in rows:
+            self.append(packed)
+
+    def _write_block(self):
+        if not self._pending_rows:
+            return
+        compress, _ = _COMPRESSORS[self.codec]
+        data = compress(bytes(self._block))
+        self._index.append((self.file.tell(), self._pending_rows, len(data)))
+        self.file.write(data)
+        self._block.clear()
+        self._pending_rows = 0
+
+    def close(self):
+        '''Write out the last block and the index.'''
+        self._write_block()
+        index_offset = self.file.tell()
+        for entry in self._index:
+            self.file.write(_INDEX_ENTRY.pack(*entry))
+        self.file.write(_FOOTER.pack(index_offset, len(self._index), _MAGIC))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+
+
+class HistoryReader:
+    '''Reads packed rows back from a seekable binary file object, in order
+    or by generation.
+    '''
+    __slots__ = ('file', 'width', 'block_rows', 'codec', 'rows',
+                 '_row_bytes', '_index', '_cached_block', '_cached_rows')
+
+    def __init__(self, file):
+        self.file = file
+        header = file.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError('The file is too short to be a history.')
+        magic, version, codec, self.width, self.block_rows = \
+            _HEADER.unpack(header)
+        if magic != _MAGIC:
+            raise ValueError('The file is not a history.')
+        if version != _VERSION:
+            raise ValueError(f'History version {version} is not supported.')
+        if codec >= len(CODECS):
+            raise ValueError(f'Unknown codec {codec}.')
+        self.codec = CODECS[codec]
+        self._row_bytes = buffers.bytes_per_row(self.width)
+
+        size = file.seek(0, 2)
+        if size < _HEADER.size + _FOOTER.size:
+            raise ValueError('The history is incomplete.')
+        file.seek(size - _FOOTER.size)
+        index_offset, blocks, magic = _FOOTER.unpack(
+            file.read(_FOOTER.size))
+        if magic != _MAGIC:
+            raise ValueError('The history is incomplete.')
+        index_size = blocks * _INDEX_ENTRY.size
+        if index_offset + index_size > size - _FOOTER.size:
+            raise ValueError('The history is incomplete.')
+        file.seek(index_offset)
+        self._index = list(_INDEX_ENTRY.iter_unpack(file.read(index_size)))
+        self.rows = sum(rows for _, rows, _ in self._index)
+        self._cached_block = None
+        self._cached_rows = None
+
+    def __len__(self):
+        return self.rows
+
+    def _decode_block(self, block):
+        offset, rows, length = self._index[block]
+        self.file.seek(offset)
+        _, decompress = _COMPRESSORS[self.codec]
+        data = decompress(self.file.read(length))
+        row_bytes = self._row_bytes
+        if not row_bytes:
+            return [0] * rows
+        decoded = []
+        packed = 0
+        for start in range(0, rows * row_bytes, row_bytes):
+            packed ^= int.from_bytes(
+                data[start:start + row_bytes], 'little')
+            decoded.append(packed)
+        return decoded
+
+    def _rows_of_block(self, block):
+        if self._cached_block != block:
+            self._cached_rows = self._decode_block(block)
+            self._cached_block = block
+        return self._cached_rows
+
+    def __iter__(self):
+        for block in range(len(self._index)):
+            yield from self._rows_of_block(block)
+
+    def __getitem__(self, generation):
+        if generation < 0:
+            generation += self.rows
+        if not (0 <= generation < self.rows):
+            raise IndexError('generation out of range')
+        block, row = divmod(generation, self.block_rows)
+        return self._rows_of_block(block)[row]
+
+    def grid(self):
+        '''The rows as cells, as calc_grid gives them.'''
+        return eca.packed_grid_to_grid(self, self.width)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def save_history(filename, rows, width, block_rows=DEFAULT_BLOCK_ROWS,
+                 codec=ZLIB):
+    '''Write packed rows to the named file, returning how many there were.
+    '''
+    with open(filename, 'wb') as f:
+        with HistoryWriter(f, width, block_rows, codec) as writer:
+            writer.extend(rows)
+        return writer.rows
+
+
+def open_history(filename):
+    f = open(filename, 'rb')
+    try:
+        return HistoryReader(f)
+    except BaseException:
+        f.close()
+        raise
@@ -0,0 +1,141 @@
+'''Evolving rows on a background thread while they are being written.
+
+A Prefetcher runs the engine ahead of the writer, handing rows over in
+batches through a bounded queue, so that time spent blocked on a disk or
+a terminal is also spent computing the generations to come. Its stats
+show which side waited on the other: a producer that is often blocked on
+a full queue means the output is the bottleneck, a consumer that often
+finds the queue empty means the evolution is.
+'''
+from collections import namedtuple
+from itertools import islice
+import queue
+import threading
+import time
+
+DEFAULT_DEPTH = 8
+DEFAULT_BATCH_SIZE = 64
+
+COMPUTE = 'compute'
+OUTPUT = 'output'
+
+# How often a blocked producer checks whether it has been stopped.
+_POLL_SECONDS = 0.1
+
+_DONE = object()
+
+
+class PipelineStats(namedtuple(
+        'PipelineStats',
+        'rows batches compute_seconds producer_blocked_seconds '
+        'consumer_waiting_seconds')):
+    __slots__ = ()
+
+    @property
+    def bottleneck(self):
+        '''Whichever of COMPUTE and OUTPUT the other side waited on more.'''
+        if self.producer_blocked_seconds > self.consumer_waiting_seconds:
+            return OUTPUT
+        return COMPUTE
+
+
+class _Failure:
+    __slots__ = ('error',)
+
+    def __init__(self, error):
+        self.error = error
+
+
+class Prefetcher:
+    '''Iterates over rows evolved up to depth batches of batch_size rows
+    ahead on a background thread.
+    '''
+    __slots__ = ('depth', 'batch_size', '_rows', '_queue', '_stop',
+                 '_thread', '_produced', '_batches', '_compute_seconds',
+                 '_blocked_seconds', '_waiting_seconds')
+
+    def __init__(self, rows, depth=DEFAULT_DEPTH,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        if depth < 1 or batch_size < 1:
+            raise ValueError('The depth and batch size must both be '
+                             'strictly positive.')
+        self.depth = depth
+        self.batch_size = batch_size
+        self._rows = rows
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._thread = None
+        self._produced = 0
+        self._batches = 0
+        self._compute_seconds = 0.0
+        self._blocked_seconds = 0.0
+        self._waiting_seconds = 0.0
+
+    def _put(self, item):
+        start = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=_POLL_SECONDS)
+                    return
+                except queue.Full:
+                    pass
+        finally:
+            self._blocked_seconds += time.perf_counter() - start
+
+    def _produce(self):
+        try:
+            rows = iter(self._rows)
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                batch = list(islice(rows, self.batch_size))
+                self._compute_seconds += time.perf_counter() - start
+                if not batch:
+                    break
+                self._produced += len(batch)
+                self._batches += 1
+                self._put(batch)
+            self._put(_DONE)
+        except Exception as e:
+            self._put(_Failure(e))
+
+    def __iter__(self):
+        if self._thread is not None:
+            raise ValueError('A Prefetcher can only be iterated once.')
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                start = time.perf_counter()
+                item = self._queue.get()
+                self._waiting_seconds += time.perf_counter() - start
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield from item
+        finally:
+            self.close()
+
+    def close(self):
+        '''Stop the producer, leaving any rows it had run ahead with.'''
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self):
+        return PipelineStats(
+            rows=self._produced,
+            batches=self._batches,
+            compute_seconds=self._compute_seconds,
+            producer_blocked_seconds=self._blocked_seconds,
+            consumer_waiting_seconds=self._waiting_seconds)
+
+
+def format_stats(stats):
+    return (
+        f'{stats.rows} rows in {stats.batches} batches: '
+        f'{stats.compute_seconds:.3f}s computing, '
+        f'{stats.producer_blocked_seconds:.3f}s waiting on the output, '
+        f'{stats.consumer_waiting_seconds:.3f}s waiting on the engine; '
+        f'the {stats.bottleneck} is the bottleneck.')
@@ -0,0 +1,184 @@
+'''Predecessors of a row under an elementary rule, and Gardens of Eden: rows
+with none.
+
+http://en.wikipedia.org/wiki/Garden_of_Eden_(cellular_automaton)
+
+A predecessor is a path through the de Bruijn graph whose nodes are pairs
+of adjacent cells, each step adding a cell to the right and producing the
+rule's output for the three cells spanned. Counting the ways to finish a
+path from each node, right to left, takes time linear in the width and
+lets preimages be enumerated without ever backtracking out of a dead end,
+or sampled uniformly.
+
+With an infinite boundary a row of width cells has predecessors of
+width+2 cells, as in step_packed_row; with a finite one the predecessors
+are over the same lattice.
+'''
+import random
+
+import elementary_cellular_automaton as eca
+
+_PAIRS = range(4)
+_CELLS = (0, 1)
+_DEAD = (0,)
+
+
+def _following_pair(pair, cell):
+    return (pair << 1 | cell) & 3
+
+
+def _output(rule, pair, cell):
+    return rule >> (pair << 1 | cell) & 1
+
+
+def _completions(row, width, rule, last_cells, accepts):
+    '''For each step i and pair, the number of ways to finish the path.'''
+    counts = [None] * (width + 1)
+    counts[width] = [int(accepts(pair)) for pair in _PAIRS]
+    for i in reversed(range(width)):
+        bit = row >> i & 1
+        following = counts[i + 1]
+        cells = last_cells if i == width - 1 else _CELLS
+        counts[i] = [
+            sum(following[_following_pair(pair, cell)]
+                for cell in cells if _output(rule, pair, cell) == bit)
+            for pair in _PAIRS]
+    return counts
+
+
+def _accept_any(pair):
+    return True
+
+
+def _accept_only(start):
+    def accepts(pair):
+        return pair == start
+    return accepts
+
+
+def _branches(row, width, rule, boundary):
+    '''The starting pairs of the paths, each with the packed cells it
+    contributes, their count, and the completions table to follow.
+
+    Also gives whether the cell added by the last step belongs to the
+    predecessor, rather than being past the edge of the lattice.
+    '''
+    eca.ensure_wolfram_code_is_valid(rule)
+    eca.ensure_boundary_is_valid(boundary)
+    if width < 0:
+        raise ValueError('width must be positive')
+    if row >> width:
+        raise ValueError(f'The row has cells beyond its width of {width}.')
+
+    if boundary == eca.INFINITE:
+        counts = _completions(row, width, rule, _CELLS, _accept_any)
+        return [
+            (pair, pair >> 1 | (pair & 1) << 1, 2, counts)
+            for pair in _PAIRS], True
+
+    if width == 0:
+        return [], False
+
+    if boundary == eca.FIXED:
+        # The cell left of the lattice is dead, as is the one to its right.
+        counts = _completions(row, width, rule, _DEAD, _accept_any)
+        return [(pair, pair & 1, 1, counts) for pair in (0b00, 0b01)], False
+
+    # Periodic: the path starts from the last cell and the first, and
+    # must come back round to them.
+    return [
+        (pair, pair & 1, 1,
+         _completions(row, width, rule, _CELLS, _accept_only(pair)))
+        for pair in _PAIRS], False
+
+
+def count_preimages(row, width, rule=eca._DEFAULT_RULE,
+                    boundary=eca.INFINITE):
+    '''The number of rows stepping to the packed row.'''
+    branches, _ = _branches(row, width, rule, boundary)
+    if not branches and boundary != eca.INFINITE:
+        return 1
+    return sum(counts[0][pair] for pair, _, _, counts in branches)
+
+
+def is_garden_of_eden(row, width, rule=eca._DEFAULT_RULE,
+                      boundary=eca.INFINITE):
+    return not count_preimages(row, width, rule, boundary)
+
+
+def _choices(row, width, rule, i, pair, counts, last_cells):
+    cells = last_cells if i == width - 1 else _CELLS
+    bit = row >> i & 1
+    for cell in cells:
+        following = _following_pair(pair, cell)
+        if _output(rule, pair, cell) == bit and counts[i + 1][following]:
+            yield cell, following
+
+
+def _last_cells(boundary):
+    return _DEAD if boundary == eca.FIXED else _CELLS
+
+
+def preimages(row, width, rule=eca._DEFAULT_RULE, boundary=eca.INFINITE):
+    '''Lazily yield every row, packed, stepping to the packed row.'''
+    branches, keep_last = _branches(row, width, rule, boundary)
+    if not branches and boundary != eca.INFINITE:
+        yield 0
+        return
+    last_cells = _last_cells(boundary)
+
+    for pair, packed, position, counts in branches:
+        if not counts[0][pair]:
+            continue
+        stack = [(0, pair, packed, position)]
+        while stack:
+            i, pair, packed, position = stack.pop()
+            if i == width:
+                yield packed
+                continue
+            choices = list(_choices(
+                row, width, rule, i, pair, counts, last_cells))
+            # Pushed in reverse so that dead cells are tried first.
+            for cell, following in reversed(choices):
+                if i == width - 1 and not keep_last:
+                    stack.append((i + 1, following, packed, position))
+                else:
+                    stack.append((i + 1, following,
+                                  packed | cell << position, position + 1))
+
+
+def _weighted_choice(rng, weighted):
+    '''Pick from (weight, item) pairs in proportion to their weights.'''
+    target = rng.randrange(sum(weight for weight, _ in weighted))
+    for weight, item in weighted:
+        if target < weight:
+            return item
+        target -= weight
+    raise AssertionError('Unreachable')
+
+
+def sample_preimage(row, width, rule=eca._DEFAULT_RULE,
+                    boundary=eca.INFINITE, rng=random):
+    '''A predecessor of the packed row chosen uniformly at random, or None
+    for a Garden of Eden.
+    '''
+    branches, keep_last = _branches(row, width, rule, boundary)
+    if not branches and boundary != eca.INFINITE:
+        return 0
+    branches = [
+        (branch[3][0][branch[0]], branch) for branch in branches
+        if branch[3][0][branch[0]]]
+    if not branches:
+        return None
+    last_cells = _last_cells(boundary)
+
+    pair, packed, position, counts = _weighted_choice(rng, branches)
+    for i in range(width):
+        cell, pair = _weighted_choice(rng, [
+            (counts[i + 1][following], (cell, following))
+            for cell, following in _choices(
+                row, width, rule, i, pair, counts, last_cells)])
+        if i < width - 1 or keep_last:
+            packed |= cell << position
+            position += 1
+    return packed
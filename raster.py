@@ -0,0 +1,225 @@
+'''Greyscale overview images of long evolutions, as PNG or PGM.
+
+http://www.w3.org/TR/png/
+http://netpbm.sourceforge.net/doc/pgm.html
+
+Every row_stride-th generation is kept and each pixel is the density of a
+downsample by downsample block of the kept cells, white where every cell
+is dead through to black where every cell is in the highest state. Rows
+are consumed as the engine produces them and only the running column
+totals of the current block are held, so memory stays proportional to
+the width however many generations are drawn.
+'''
+from array import array
+from itertools import islice
+import struct
+import sys
+import zlib
+
+import buffers
+import elementary_cellular_automaton as eca
+
+PNG_EXTENSION = '.png'
+PGM_EXTENSION = '.pgm'
+EXTENSIONS = (PNG_EXTENSION, PGM_EXTENSION)
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_GREYSCALE = 0
+_PNG_NO_FILTER = b'\x00'
+_IDAT_SIZE = 1 << 16
+
+_WHITE = 0xff
+
+# Typecodes of unsigned arrays by their item size.
+_FIELD_TYPECODES = {2: 'H', 4: 'I', 8: 'Q'}
+
+
+def _ceiling_division(numerator, denominator):
+    return -(-numerator // denominator)
+
+
+def raster_size(width, generations, downsample=1, row_stride=1):
+    '''The width and height in pixels of the image of an evolution.'''
+    if downsample < 1 or row_stride < 1:
+        raise ValueError('The downsample and row stride must both be '
+                         'strictly positive.')
+    return (
+        _ceiling_division(width, downsample),
+        _ceiling_division(
+            _ceiling_division(generations, row_stride), downsample))
+
+
+def _field_bytes(most):
+    for size in sorted(_FIELD_TYPECODES):
+        if most < 1 << (size * 8):
+            return size
+    raise ValueError('The blocks are too large to total.')
+
+
+class _ColumnTotals:
+    '''Running totals of the states in each column, held in fixed width
+    fields of an int so that adding a row is a single addition.
+    '''
+    __slots__ = ('width', 'size', 'total')
+
+    def __init__(self, width, most):
+        self.width = width
+        self.size = _field_bytes(most)
+        self.total = 0
+
+    def add(self, cells):
+        fields = bytearray(self.size * self.width)
+        fields[::self.size] = cells
+        self.total += int.from_bytes(fields, 'little')
+
+    def take(self):
+        '''The totals, as an array, starting them again from zero.'''
+        totals = array(_FIELD_TYPECODES[self.size])
+        totals.frombytes(
+            self.total.to_bytes(self.size * self.width, 'little'))
+        if sys.byteorder != 'little':
+            totals.byteswap()
+        self.total = 0
+        return totals
+
+
+def _cells(row, width):
+    if isinstance(row, int):
+        return buffers.packed_to_cell_bytes(row, width)
+    return bytes(row)
+
+
+def density_rows(rows, width, downsample=1, row_stride=1, states=2):
+    '''Yield the greyscale pixels of each row of the image, as bytes.
+
+    The rows are packed ints or sequences of states, as the engines give.
+    '''
+    raster_size(width, 0, downsample, row_stride)
+    most_state = states - 1
+    totals = _ColumnTotals(width, downsample * downsample * most_state)
+    blocks = [
+        range(start, min(start + downsample, width))
+        for start in range(0, width, downsample)]
+
+    def pixels(block_rows):
+        counts = totals.take()
+        return bytes(
+            _WHITE - _WHITE * sum(counts[block.start:block.stop]) // (
+                len(block) * block_rows * most_state)
+            for block in blocks)
+
+    block_rows = 0
+    for row in islice(rows, 0, None, row_stride):
+        totals.add(_cells(row, width))
+        block_rows += 1
+        if block_rows == downsample:
+            yield pixels(block_rows)
+            block_rows = 0
+    if block_rows:
+        yield pixels(block_rows)
+
+
+def _png_chunk(kind, data):
+    return (
+        struct.pack('>I', len(data)) + kind + data +
+        struct.pack('>I', zlib.crc32(kind + data)))
+
+
+class PngWriter:
+    '''Writes an 8-bit greyscale PNG a row at a time to a binary file
+    object.
+    '''
+    __slots__ = ('file', 'width', 'height', 'rows', '_compressor',
+                 '_pending')
+
+    def __init__(self, file, width, height):
+        if width < 1 or height < 1:
+            raise ValueError('An image must be at least one pixel across.')
+        self.file = file
+        self.width = width
+        self.height = height
+        self.rows = 0
+        self._compressor = zlib.compressobj()
+        self._pending = bytearray()
+
+        file.write(_PNG_SIGNATURE)
+        file.write(_png_chunk(b'IHDR', struct.pack(
+            '>IIBBBBB', width, height, 8, _PNG_GREYSCALE, 0, 0, 0)))
+
+    def _flush(self, data):
+        self._pending.extend(data)
+        if len(self._pending) >= _IDAT_SIZE:
+            self.file.write(_png_chunk(b'IDAT', bytes(self._pending)))
+            self._pending.clear()
+
+    def row(self, pixels):
+        if len(pixels) != self.width:
+            raise ValueError('Every row must be the width of the image.')
+        self.rows += 1
+        self._flush(self._compressor.compress(_PNG_NO_FILTER + pixels))
+
+    def close(self):
+        if self.rows != self.height:
+            raise ValueError(
+                f'{self.rows} rows were written of {self.height}.')
+        self._pending.extend(self._compressor.flush())
+        self.file.write(_png_chunk(b'IDAT', bytes(self._pending)))
+        self.file.write(_png_chunk(b'IEND', b''))
+
+
+class PgmWriter:
+    '''Writes a binary greyscale PGM a row at a time to a binary file
+    object.
+    '''
+    __slots__ = ('file', 'width', 'height', 'rows')
+
+    def __init__(self, file, width, height):
+        if width < 1 or height < 1:
+            raise ValueError('An image must be at least one pixel across.')
+        self.file = file
+        self.width = width
+        self.height = height
+        self.rows = 0
+        file.write(f'P5\n{width} {height}\n{_WHITE}\n'.encode('ascii'))
+
+    def row(self, pixels):
+        if len(pixels) != self.width:
+            raise ValueError('Every row must be the width of the image.')
+        self.rows += 1
+        self.file.write(pixels)
+
+    def close(self):
+        if self.rows != self.height:
+            raise ValueError(
+                f'{self.rows} rows were written of {self.height}.')
+
+
+def write_raster(rows, filename, width, generations, downsample=1,
+                 row_stride=1, states=2):
+    '''Draw generations rows into a PNG, or a PGM unless the name ends in
+    .png.
+    '''
+    image_width, image_height = raster_size(
+        width, generations, downsample, row_stride)
+    writer_type = PngWriter if filename.endswith(PNG_EXTENSION) \
+        else PgmWriter
+    with open(filename, 'wb') as f:
+        writer = writer_type(f, image_width, image_height)
+        for pixels in density_rows(
+                islice(rows, generations), width, downsample, row_stride,
+                states):
+            writer.row(pixels)
+        writer.close()
+    return image_width, image_height
+
+
+def save_raster(filename, height, width=None, rule=eca._DEFAULT_RULE,
+                starting_line=None, **kwargs):
+    '''Draw an elementary rule, as calc_grid would lay it out, into the
+    named file.
+    '''
+    if width is None:
+        width = eca.width_at_given_generation(generation=height)
+    rows = eca.calc_packed_grid(
+        width=width, height=height, rule=rule, starting_line=starting_line)
+    return write_raster(rows, filename, width, height, **kwargs)
@@ -0,0 +1,102 @@
+'''Second-order rules, where each generation is the rule applied to the
+current one XORed with the previous one.
+
+http://en.wikipedia.org/wiki/Reversible_cellular_automaton#Second-order_cellular_automata
+
+Every such rule (Wolfram's rule NNR) is reversible, since the previous
+generation is the rule applied to the current one XORed with the next.
+Runs therefore only hold two packed rows, whichever direction they step.
+'''
+import elementary_cellular_automaton as eca
+
+
+def step_forward(previous, current, width, rule, boundary=eca.PERIODIC):
+    '''The current and next rows given the previous and current ones.'''
+    following = eca.step_packed_bounded(current, width, rule, boundary)
+    return current, following ^ previous
+
+
+def step_backward(current, following, width, rule, boundary=eca.PERIODIC):
+    '''The previous and current rows given the current and next ones.'''
+    previous = eca.step_packed_bounded(current, width, rule, boundary)
+    return previous ^ following, current
+
+
+def _starting_row(starting_line, xs):
+    return eca.cells_to_packed(map(starting_line, xs))
+
+
+def _no_cells(x):
+    return False
+
+
+class SecondOrderRun:
+    '''A second-order evolution over a finite lattice, centred as per
+    find_x_coordinates, which can be stepped either way.
+
+    Generation 0 comes from starting_line and generation -1 from
+    previous_line (all dead by default).
+    '''
+    __slots__ = (
+        'rule', 'width', 'boundary', 'generation', 'previous', 'current')
+
+    def __init__(self, width, rule=eca._DEFAULT_RULE, starting_line=None,
+                 previous_line=None, boundary=eca.PERIODIC):
+        eca.ensure_wolfram_code_is_valid(rule)
+        eca.ensure_boundary_is_valid(boundary)
+        if boundary == eca.INFINITE:
+            raise ValueError('Second-order runs need a finite lattice.')
+        if starting_line is None:
+            starting_line = eca.a_single_cell
+        if previous_line is None:
+            previous_line = _no_cells
+
+        xs = eca.find_x_coordinates(width=width)
+        self.rule = rule
+        self.width = width
+        self.boundary = boundary
+        self.generation = 0
+        self.current = _starting_row(starting_line, xs)
+        self.previous = _starting_row(previous_line, xs)
+
+    def forward(self, generations=1):
+        if generations < 0:
+            return self.backward(-generations)
+        for _ in range(generations):
+            self.previous, self.current = step_forward(
+                self.previous, self.current,
+                self.width, self.rule, self.boundary)
+        self.generation += generations
+        return self.current
+
+    def backward(self, generations=1):
+        if generations < 0:
+            return self.forward(-generations)
+        for _ in range(generations):
+            self.previous, self.current = step_backward(
+                self.previous, self.current,
+                self.width, self.rule, self.boundary)
+        self.generation -= generations
+        return self.current
+
+    def packed_rows(self, height):
+        '''Yield the current row and the following ones, height in all,
+        leaving the run at the last of them.
+        '''
+        for y in range(height):
+            if y:
+                self.forward()
+            yield self.current
+
+    def rows(self, height):
+        return eca.packed_grid_to_grid(self.packed_rows(height), self.width)
+
+
+def calc_grid(width, height, rule=eca._DEFAULT_RULE, starting_line=None,
+              previous_line=None, boundary=eca.PERIODIC):
+    if width is None:
+        width = eca.width_at_given_generation(generation=height)
+    run = SecondOrderRun(
+        width=width, rule=rule, starting_line=starting_line,
+        previous_line=previous_line, boundary=boundary)
+    return run.rows(height)
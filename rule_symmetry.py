@@ -0,0 +1,150 @@
+'''Equivalence of the elementary rules under reflection and complement.
+
+http://en.wikipedia.org/wiki/Elementary_cellular_automaton#Reflections_and_complements
+
+Each of the 256 Wolfram codes belongs to one of 88 classes whose members
+evolve identically up to a left-right reflection and/or swapping live and
+dead cells, so only one representative of each class needs evolving.
+'''
+from functools import lru_cache
+
+import elementary_cellular_automaton as eca
+
+IDENTITY = (False, False)
+MIRROR = (True, False)
+COMPLEMENT = (False, True)
+MIRROR_COMPLEMENT = (True, True)
+
+TRANSFORMS = (IDENTITY, MIRROR, COMPLEMENT, MIRROR_COMPLEMENT)
+
+_LAST_INDEX = eca._NUM_NEIGHBOURHOOD_CONFIGURATIONS - 1
+
+
+def _mirror_index(index):
+    # Unpacking yields the rightmost neighbour first, so reading it back
+    # in that order swaps left and right.
+    return eca.neighbours_to_int(
+        eca.packed_to_cells(index, eca._NEIGHBOURHOOD_SIZE))
+
+
+def mirror_rule(rule):
+    '''The rule that evolves the left-right reflection of a pattern.'''
+    eca.ensure_wolfram_code_is_valid(rule)
+    return sum(
+        eca.index_to_num(_mirror_index(index))
+        for index in eca._NEIGHBOURHOOD_CONFIGURATION_INDEXES
+        if eca.index_to_num(index) & rule)
+
+
+def complement_rule(rule):
+    '''The rule that evolves a pattern with live and dead cells swapped.'''
+    eca.ensure_wolfram_code_is_valid(rule)
+    return sum(
+        eca.index_to_num(_LAST_INDEX - index)
+        for index in eca._NEIGHBOURHOOD_CONFIGURATION_INDEXES
+        if not eca.index_to_num(index) & rule)
+
+
+def apply_transform(rule, transform):
+    mirrored, complemented = transform
+    if mirrored:
+        rule = mirror_rule(rule)
+    if complemented:
+        rule = complement_rule(rule)
+    return rule
+
+
+@lru_cache(maxsize=None)
+def canonical_rule(rule):
+    '''The smallest equivalent rule and the transform that turns it back
+    into the given rule.
+    '''
+    eca.ensure_wolfram_code_is_valid(rule)
+    return min(
+        (apply_transform(rule, transform), transform)
+        for transform in TRANSFORMS)
+
+
+def rule_class(rule):
+    return tuple(sorted(set(
+        apply_transform(rule, transform) for transform in TRANSFORMS)))
+
+
+def equivalence_classes():
+    return tuple(sorted(set(map(rule_class, eca.WOLFRAM_CODES))))
+
+
+# Bounded, as the starting lines come from callers and a long running
+# process would otherwise keep every one it was ever given.
+@lru_cache(maxsize=eca.STARTING_LINE_CACHE_SIZE)
+def mirrored_starting_line(starting_line):
+    if starting_line is eca.a_single_cell:
+        return starting_line
+
+    def mirrored(x):
+        return starting_line(-x)
+    return mirrored
+
+
+@lru_cache(maxsize=eca.STARTING_LINE_CACHE_SIZE)
+def complemented_starting_line(starting_line):
+    def complemented(x):
+        return not starting_line(x)
+    return complemented
+
+
+@lru_cache(maxsize=1024)
+def _canonical_packed_window(lower, width, height, rule, starting_line):
+    return tuple(eca.calc_packed_window(
+        lower=lower, width=width, height=height,
+        rule=rule, starting_line=starting_line))
+
+
+def transformed_window(lower, width, height, rule, starting_line,
+                       canonical_window):
+    '''Rows of the window evolved by the rule, taken from
+    canonical_window(lower, width, height, canonical, starting_line) called
+    for the canonical rule of its class.
+    '''
+    if starting_line is None:
+        starting_line = eca.a_single_cell
+
+    canonical, (mirrored, complemented) = canonical_rule(rule)
+    if complemented:
+        starting_line = complemented_starting_line(starting_line)
+    if mirrored:
+        starting_line = mirrored_starting_line(starting_line)
+        lower = 1 - lower - width
+
+    rows = canonical_window(lower, width, height, canonical, starting_line)
+
+    mask = (1 << width) - 1
+    for row in rows:
+        if mirrored:
+            row = eca.reverse_packed(row, width)
+        if complemented:
+            row ^= mask
+        yield row
+
+
+def calc_packed_window(lower, width, height, rule=eca._DEFAULT_RULE,
+                       starting_line=None):
+    '''As elementary_cellular_automaton.calc_packed_window but evolving the
+    canonical rule of the class, sharing its results between the members.
+    '''
+    return transformed_window(
+        lower, width, height, rule, starting_line, _canonical_packed_window)
+
+
+def calc_packed_grids(width, height, rules=eca.WOLFRAM_CODES,
+                      starting_line=None):
+    '''Packed grids, as per calc_packed_grid, for each of the rules.'''
+    if width is None:
+        width = eca.width_at_given_generation(generation=height)
+    lower = eca.find_x_coordinates(width=width).start
+    return {
+        rule: tuple(calc_packed_window(
+            lower=lower, width=width, height=height,
+            rule=rule, starting_line=starting_line))
+        for rule in rules
+    }
@@ -0,0 +1,135 @@
+'''Evolution that only computes the interval of cells differing from the
+background, for localised seeds on wide or infinite lattices.
+
+Each generation the active interval can grow by at most one cell either
+side (the light cone) and is trimmed back to the cells that actually
+differ, so a single cell seed on a lattice of 10**7 cells costs next to
+nothing until its pattern has spread. Once the pattern reaches the edges
+of a finite lattice the whole lattice is evolved instead.
+'''
+import elementary_cellular_automaton as eca
+
+
+class ActiveRow:
+    '''A generation whose cells from lower to upper-1 are packed, every
+    other cell being the background.
+    '''
+    __slots__ = ('packed', 'lower', 'upper', 'background')
+
+    def __init__(self, packed, lower, upper, background):
+        self.packed = packed
+        self.lower = lower
+        self.upper = upper
+        self.background = background
+
+    def __len__(self):
+        return self.upper - self.lower
+
+    def __eq__(self, other):
+        if not isinstance(other, ActiveRow):
+            return NotImplemented
+        return (
+            (self.packed, self.lower, self.upper, self.background) ==
+            (other.packed, other.lower, other.upper, other.background))
+
+    def __repr__(self):
+        return (f'ActiveRow(packed={self.packed:#x}, lower={self.lower}, '
+                f'upper={self.upper}, background={self.background})')
+
+    def cell(self, x):
+        if self.lower <= x < self.upper:
+            return bool(self.packed >> (x - self.lower) & 1)
+        return self.background
+
+    def to_packed(self, window):
+        '''The packed cells of the window range.'''
+        return eca.window_of_packed(
+            self.packed, self.lower, self.upper, self.background, window)
+
+
+def _fits(lower, upper, lattice, background, boundary):
+    '''Whether the next generation can be computed as if the lattice were
+    infinite.
+    '''
+    if lattice is None:
+        return True
+    if not (lattice.start <= lower - 1 and upper + 1 <= lattice.stop):
+        return False
+    # Beyond a fixed boundary the cells are dead rather than background.
+    return boundary == eca.PERIODIC or not background
+
+
+def evolve_active(rule=eca._DEFAULT_RULE, starting_line=None,
+                  seed_support=None, background=False, lattice=None,
+                  boundary=eca.FIXED):
+    '''Yield an ActiveRow for each generation, without end.
+
+    The lattice is a range of x coordinates, or None for an infinite one.
+    seed_support is the interval, as a range or a (start, stop) pair,
+    outside which starting_line gives the background; it defaults to the
+    single cell of the default starting line, or the whole of a finite
+    lattice.
+    '''
+    eca.ensure_wolfram_code_is_valid(rule)
+    eca.ensure_boundary_is_valid(boundary)
+    if lattice is not None and boundary == eca.INFINITE:
+        lattice = None
+
+    if starting_line is None:
+        starting_line = eca.a_single_cell
+        if seed_support is None:
+            seed_support = range(0, 1)
+            background = False
+    if seed_support is None:
+        if lattice is None:
+            raise ValueError(
+                'An infinite lattice needs the support of the seed.')
+        seed_support = lattice
+    lower, upper = (seed_support.start, seed_support.stop) \
+        if isinstance(seed_support, range) else seed_support
+    if lattice is not None:
+        lower = max(lower, lattice.start)
+        upper = max(min(upper, lattice.stop), lower)
+
+    background = bool(background)
+    packed, lower, upper = eca.trim_packed(
+        eca.cells_to_packed(map(starting_line, range(lower, upper))),
+        lower, upper, background)
+
+    while True:
+        yield ActiveRow(packed, lower, upper, background)
+
+        if _fits(lower, upper, lattice, background, boundary):
+            packed = eca.step_packed_in_background(
+                packed, upper - lower, rule, background)
+            lower, upper = lower - 1, upper + 1
+        else:
+            packed = eca.step_packed_bounded(
+                eca.window_of_packed(
+                    packed, lower, upper, background, lattice),
+                len(lattice), rule, boundary)
+            lower, upper = lattice.start, lattice.stop
+        background = eca.step_background(background, rule)
+        packed, lower, upper = eca.trim_packed(
+            packed, lower, upper, background)
+
+
+def calc_packed_window(lower, width, height, rule=eca._DEFAULT_RULE,
+                       starting_line=None, boundary=eca.INFINITE,
+                       seed_support=None, background=False):
+    '''As elementary_cellular_automaton.calc_packed_window, evolving only
+    the active cells.
+    '''
+    if height < 0:
+        raise ValueError('height must be positive')
+    window = range(lower, lower + width)
+    lattice = None if boundary == eca.INFINITE else window
+    if lattice is None and starting_line is not None and seed_support is None:
+        # Cells beyond the window's light cone cannot affect it.
+        margin = max(height - 1, 0)
+        seed_support = range(lower - margin, lower + width + margin)
+    rows = evolve_active(
+        rule=rule, starting_line=starting_line, seed_support=seed_support,
+        background=background, lattice=lattice, boundary=boundary)
+    for _, row in zip(range(height), rows):
+        yield row.to_packed(window)
@@ -0,0 +1,135 @@
+'''Streaming SVG output for evolutions too large to hold as strings.
+
+http://www.w3.org/TR/SVG11/struct.html#UseElement
+
+to_svg spells out a whole rect for every live cell and yields each line
+separately to be joined at the end. A SvgWriter instead defines the cell
+once, as a unit square in defs, scales the group holding the cells by the
+side length, and draws each live cell as a use of that square at its own
+column and row. Each row is formatted as a single string and the strings
+are written in large chunks through a buffered text stream, gzipped when
+the name ends in .svgz, so only a chunk is ever held in memory.
+'''
+import gzip
+from itertools import islice
+import re
+
+import elementary_cellular_automaton as eca
+
+SVG_EXTENSION = '.svg'
+SVGZ_EXTENSION = '.svgz'
+
+DEFAULT_SIDE = 10
+DEFAULT_FOREGROUND = '#000000'
+DEFAULT_BACKGROUND = '#ffffff'
+
+# How many characters are gathered before they are written.
+_CHUNK_SIZE = 1 << 16
+
+_CELL_ID = 'c'
+
+_LIVE = re.compile('1')
+
+
+def _live_cells(row, width):
+    '''The columns of the live cells of a packed int or sequence of states.
+    '''
+    if isinstance(row, int):
+        if row >> width:
+            raise ValueError(
+                f'The row has cells beyond its width of {width}.')
+        return [match.start() for match in _LIVE.finditer(
+            format(row, 'b')[::-1])]
+    row = list(row)
+    if len(row) != width:
+        raise ValueError('Every row must be the width of the image.')
+    return [x for x, cell in enumerate(row) if cell]
+
+
+class SvgWriter:
+    '''Writes an SVG of width by height cells a row at a time to a text
+    file object.
+    '''
+    __slots__ = ('file', 'width', 'height', 'side', 'rows', '_chunk',
+                 '_chunk_size')
+
+    def __init__(self, file, width, height, side=DEFAULT_SIDE,
+                 foreground=DEFAULT_FOREGROUND,
+                 background=DEFAULT_BACKGROUND):
+        eca.ensure_side_is_valid(side)
+        if width < 0 or height < 0:
+            raise ValueError('The width and height must be positive.')
+        self.file = file
+        self.width = width
+        self.height = height
+        self.side = side
+        self.rows = 0
+        self._chunk = []
+        self._chunk_size = 0
+
+        pixel_width = width * side
+        pixel_height = height * side
+        self._write(
+            '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+            '<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN" '
+            '"http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">\n'
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            'xmlns:xlink="http://www.w3.org/1999/xlink" version="1.1" '
+            f'width="{pixel_width}px" height="{pixel_height}px">\n'
+            f'\t<rect width="{pixel_width}" height="{pixel_height}" '
+            f'fill="{background}" />\n'
+            '\t<defs>\n'
+            f'\t\t<rect id="{_CELL_ID}" width="1" height="1" />\n'
+            '\t</defs>\n'
+            f'\t<g fill="{foreground}" transform="scale({side})" '
+            'shape-rendering="crispEdges">\n')
+
+    def _write(self, text):
+        self._chunk.append(text)
+        self._chunk_size += len(text)
+        if self._chunk_size >= _CHUNK_SIZE:
+            self._flush()
+
+    def _flush(self):
+        self.file.write(''.join(self._chunk))
+        self._chunk.clear()
+        self._chunk_size = 0
+
+    def row(self, cells):
+        '''Draw the next row, a packed int or a sequence of states, any
+        that are non-zero being drawn in the foreground colour.
+        '''
+        if self.rows == self.height:
+            raise ValueError(f'All {self.height} rows have been written.')
+        live = _live_cells(cells, self.width)
+        y = self.rows
+        self.rows += 1
+        if live:
+            self._write(''.join([
+                f'\t\t<use xlink:href="#{_CELL_ID}" x="{x}" y="{y}" />\n'
+                for x in live]))
+
+    def close(self):
+        if self.rows != self.height:
+            raise ValueError(
+                f'{self.rows} rows were written of {self.height}.')
+        self._write('\t</g>\n</svg>\n')
+        self._flush()
+
+
+def open_svg(filename):
+    '''A text stream to write the named file through, gzipped if the name
+    ends in .svgz.
+    '''
+    if filename.endswith(SVGZ_EXTENSION):
+        return gzip.open(filename, 'wt', encoding='utf-8')
+    return open(filename, 'w', encoding='utf-8')
+
+
+def write_svg(rows, filename, width, height, **kwargs):
+    '''Draw the first height rows into the named file.'''
+    with open_svg(filename) as f:
+        writer = SvgWriter(f, width, height, **kwargs)
+        for row in islice(rows, height):
+            writer.row(row)
+        writer.close()
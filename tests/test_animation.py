@@ -0,0 +1,176 @@
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+
+import animation
+import elementary_cellular_automaton as eca
+
+
+def lzw_decompress(data, min_code_size):
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+    position = 0
+    code_size = min_code_size + 1
+    table = None
+    previous = None
+    output = bytearray()
+    while True:
+        code = 0
+        for bit in range(code_size):
+            byte = data[(position + bit) // 8]
+            code |= ((byte >> ((position + bit) % 8)) & 1) << bit
+        position += code_size
+        if code == clear_code:
+            table = [bytes((i,)) for i in range(clear_code)] + [b'', b'']
+            code_size = min_code_size + 1
+            previous = None
+            continue
+        if code == end_code:
+            return bytes(output)
+        if code < len(table):
+            entry = table[code]
+            if previous is not None:
+                table.append(previous + entry[:1])
+        else:
+            entry = previous + previous[:1]
+            table.append(entry)
+        output.extend(entry)
+        previous = entry
+        if len(table) == 1 << code_size and code_size < 12:
+            code_size += 1
+
+
+def decode_frames(data):
+    '''The full canvas after each frame, as a list of rows.'''
+    assert data[:6] == b'GIF89a'
+    width = int.from_bytes(data[6:8], 'little')
+    height = int.from_bytes(data[8:10], 'little')
+    position = 13 + 3 * (2 << (data[10] & 7))
+    canvas = [bytearray(width) for _ in range(height)]
+    frames = []
+    while data[position] != 0x3b:
+        if data[position] == 0x21:
+            position += 2
+            while data[position]:
+                position += data[position] + 1
+            position += 1
+            continue
+        assert data[position] == 0x2c
+        top = int.from_bytes(data[position + 3:position + 5], 'little')
+        frame_width = int.from_bytes(data[position + 5:position + 7], 'little')
+        min_code_size = data[position + 10]
+        position += 11
+        compressed = bytearray()
+        while data[position]:
+            compressed.extend(
+                data[position + 1:position + 1 + data[position]])
+            position += data[position] + 1
+        position += 1
+        pixels = lzw_decompress(compressed, min_code_size)
+        for offset in range(0, len(pixels), frame_width):
+            canvas[top + offset // frame_width][:] = \
+                pixels[offset:offset + frame_width]
+        frames.append([bytes(row) for row in canvas])
+    return frames
+
+
+def write(rows, **kwargs):
+    f = io.BytesIO()
+    frames = animation.write_gif(rows, f, **kwargs)
+    return frames, f.getvalue()
+
+
+class TestLzwCompress(unittest.TestCase):
+    def test_round_trip(self):
+        rng = random.Random(34)
+        for min_code_size, colours in [(2, 2), (2, 4), (3, 7), (8, 256)]:
+            for length in [0, 1, 2, 100, 20000]:
+                pixels = bytes(
+                    rng.randrange(colours) for _ in range(length))
+                compressed = animation.lzw_compress(pixels, min_code_size)
+                self.assertEqual(
+                    lzw_decompress(compressed, min_code_size), pixels)
+
+    def test_table_reset(self):
+        rng = random.Random(34)
+        pixels = bytes(rng.getrandbits(1) for _ in range(200000))
+        compressed = animation.lzw_compress(pixels, 2)
+        self.assertEqual(lzw_decompress(compressed, 2), pixels)
+
+
+class TestWriteGif(unittest.TestCase):
+    def setUp(self):
+        self.rows = [
+            bytes(row) for row in animation.rows_to_pixels(
+                eca.calc_packed_grid(width=21, height=13), 21)]
+
+    def test_sweep(self):
+        frames, data = write(
+            self.rows, width=21, window=5, rows_per_frame=2)
+        decoded = decode_frames(data)
+        self.assertEqual(len(decoded), frames)
+        self.assertEqual(decoded[0], self.rows[:5])
+        # Generations 5 and 6 are drawn over 0 and 1.
+        self.assertEqual(decoded[1], self.rows[5:7] + self.rows[2:5])
+        # The sweep wraps around at generation 10 whatever the frame size.
+        self.assertEqual(decoded[3], self.rows[5:10])
+        self.assertEqual(decoded[-1], self.rows[10:13] + self.rows[8:10])
+
+    def test_sweep_only_encodes_new_rows(self):
+        _, few = write(self.rows[:6], width=21, window=5)
+        _, many = write(self.rows, width=21, window=5)
+        _, whole = write(self.rows, width=21, window=5, scroll=True)
+        self.assertLess(len(many) - len(few), len(whole) - len(few))
+
+    def test_scroll(self):
+        frames, data = write(self.rows, width=21, window=5, scroll=True)
+        decoded = decode_frames(data)
+        self.assertEqual(frames, 9)
+        for frame, canvas in enumerate(decoded):
+            self.assertEqual(canvas, self.rows[frame:frame + 5])
+
+    def test_short(self):
+        _, data = write(self.rows[:2], width=21, window=5)
+        self.assertEqual(
+            decode_frames(data), [self.rows[:2] + [bytes(21)] * 3])
+
+    def test_scale(self):
+        _, data = write(self.rows[:2], width=21, window=2, scale=3)
+        decoded = decode_frames(data)[0]
+        self.assertEqual(len(decoded), 6)
+        self.assertEqual(decoded[3][30:33], b'\x01\x01\x01')
+
+    def test_states(self):
+        rows = [bytes([0, 1, 2]), bytes([2, 1, 0])]
+        _, data = write(
+            rows, width=3, window=2,
+            palette=animation.default_palette(3))
+        self.assertEqual(decode_frames(data), [rows])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            write(self.rows, width=21, window=0)
+        with self.assertRaises(ValueError):
+            write(self.rows, width=20, window=3)
+
+
+class TestDefaultPalette(unittest.TestCase):
+    def test(self):
+        self.assertEqual(
+            animation.default_palette(3),
+            [(255, 255, 255), (128, 128, 128), (0, 0, 0)])
+
+
+class TestMain(unittest.TestCase):
+    def test_empty_animation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'a.gif')
+            for args in [['-g', '0'], ['-w', '0']]:
+                with self.subTest(args=args):
+                    with contextlib.redirect_stderr(io.StringIO()):
+                        with self.assertRaises(SystemExit):
+                            eca.main(args + ['-o', output])
+                    self.assertFalse(os.path.exists(output))
@@ -1,3 +1,5 @@
+import contextlib
+import io
 import unittest
 
 from elementary_cellular_automaton import _make_parser
@@ -27,3 +29,42 @@ class TestMakeParser(unittest.TestCase):
         self.assertEqual(settings.generations, 10)
         self.assertEqual(settings.rule, 35)
         self.assertEqual(settings.output, 'b.svg')
+
+    def test_radius_and_states(self):
+        parser = _make_parser()
+        settings = parser.parse_args(
+            [
+                '--radius', '2',
+                '--states', '3',
+                '--rule', '1000',
+            ])
+        self.assertEqual(settings.radius, 2)
+        self.assertEqual(settings.states, 3)
+        self.assertEqual(settings.rule, 1000)
+
+    def test_defaults_are_elementary(self):
+        settings = _make_parser().parse_args([])
+        self.assertEqual(settings.radius, 1)
+        self.assertEqual(settings.states, 2)
+
+    def test_animation_options(self):
+        settings = _make_parser().parse_args(
+            ['--window', '40', '--rows-per-frame', '4', '-o', 'a.gif'])
+        self.assertEqual(settings.window, 40)
+        self.assertEqual(settings.rows_per_frame, 4)
+
+    def test_animation_options_must_be_positive(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                _make_parser().parse_args(['--window', '0'])
+
+    def test_raster_options(self):
+        settings = _make_parser().parse_args(
+            ['--row-stride', '10', '--downsample', '4', '-o', 'a.png'])
+        self.assertEqual(settings.row_stride, 10)
+        self.assertEqual(settings.downsample, 4)
+
+    def test_raster_option_defaults(self):
+        settings = _make_parser().parse_args([])
+        self.assertEqual(settings.row_stride, 1)
+        self.assertEqual(settings.downsample, 1)
@@ -0,0 +1,242 @@
+import contextlib
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import batch
+import elementary_cellular_automaton as eca
+import generalised_rules
+import history
+import svg
+
+
+class TestParseJob(unittest.TestCase):
+    def test_defaults(self):
+        job = batch.parse_job('{"output": "a.svg"}', line=1)
+        self.assertEqual(job.rule, 30)
+        self.assertEqual(job.generations, 6)
+        self.assertIsNone(job.width)
+        self.assertIsNone(job.seed)
+
+    def test_given_defaults(self):
+        job = batch.parse_job(
+            '{"output": "a.svg", "seed": [2, -1, 2]}', line=3,
+            defaults={'rule': 90, 'generations': 9})
+        self.assertEqual((job.line, job.rule, job.generations), (3, 90, 9))
+        self.assertEqual(job.seed, (-1, 2))
+
+    def test_missing_output(self):
+        with self.assertRaises(ValueError):
+            batch.parse_job('{"rule": 30}', line=1)
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            batch.parse_job('{"output": "a.svg", "colour": 1}', line=1)
+
+    def test_field_types(self):
+        for text in ['{"output": "a.svg", "rule": null}',
+                     '{"output": "a.svg", "seed": 3}',
+                     '{"output": "a.svg", "seed": ["x"]}',
+                     '{"output": "a.svg", "generations": true}',
+                     '{"output": "a.svg", "boundary": 1}',
+                     '{"output": 5}']:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    batch.parse_job(text, line=1)
+
+    def test_not_an_object(self):
+        with self.assertRaises(ValueError):
+            batch.parse_job('[1, 2]', line=1)
+
+
+class TestRunBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def read(self, name):
+        with open(self.path(name)) as f:
+            return f.read()
+
+    def svg(self, rows, width, height):
+        f = io.StringIO()
+        writer = svg.SvgWriter(f, width, height)
+        for row in rows:
+            writer.row(row)
+        writer.close()
+        return f.getvalue()
+
+    def test_jobs(self):
+        lines = [
+            json.dumps({'rule': rule, 'output': self.path(f'{rule}.txt')})
+            for rule in eca.WOLFRAM_CODES
+        ]
+        lines.insert(10, '# a comment')
+        lines.insert(20, '')
+        results = batch.run_batch(lines, workers=4)
+
+        self.assertEqual(len(results), 256)
+        self.assertFalse([result for result in results if result.error])
+        for rule in eca.WOLFRAM_CODES:
+            expected = eca.grid_to_text(
+                eca.calc_grid(width=13, height=6, rule=rule)) + '\n'
+            self.assertEqual(self.read(f'{rule}.txt'), expected)
+
+    def test_svg_and_seed(self):
+        lines = [json.dumps({
+            'rule': 30, 'generations': 3, 'seed': [0],
+            'output': self.path('a.svg')})]
+        results = batch.run_batch(lines, workers=1)
+        self.assertIsNone(results[0].error)
+        self.assertEqual(self.read('a.svg'), self.svg(
+            eca.calc_packed_grid(width=7, height=3), 7, 3))
+
+    def test_svgz(self):
+        lines = [json.dumps({
+            'rule': 90, 'generations': 4, 'radius': 1, 'states': 3,
+            'output': self.path('a.svgz')})]
+        results = batch.run_batch(lines, workers=1)
+        self.assertIsNone(results[0].error)
+        with gzip.open(self.path('a.svgz'), 'rt', encoding='utf-8') as f:
+            text = f.read()
+        grid = [list(row) for row in generalised_rules.calc_grid(
+            width=None, height=4, rule=90, states=3)]
+        self.assertEqual(text, self.svg(grid, len(grid[0]), 4))
+
+    def test_failures_are_reported_in_order(self):
+        lines = [
+            '{"rule": 300, "output": "%s"}' % self.path('a.txt'),
+            'not json',
+            '{"rule": 1, "states": 3, "output": "%s"}' % self.path('b.txt'),
+        ]
+        results = batch.run_batch(lines, workers=2)
+        self.assertEqual([result.line for result in results], [1, 2, 3])
+        self.assertIn('255', results[0].error)
+        self.assertIsNotNone(results[1].error)
+        self.assertIsNone(results[2].error)
+
+    def test_outputs_match_the_command_line(self):
+        cases = [
+            ({'rule': 90, 'generations': 20}, 'a.png'),
+            ({'rule': 90, 'generations': 20}, 'a.pgm'),
+            ({'rule': 30, 'generations': 12}, 'a.gif'),
+            ({'rule': 110, 'generations': 40}, 'a.ecah'),
+            ({'rule': 10, 'generations': 9, 'states': 3}, 'b.png'),
+            ({'rule': 10, 'generations': 9, 'states': 3}, 'b.gif'),
+            ({'rule': 30, 'generations': 5, 'radius': 2}, 'c.ecah'),
+        ]
+        lines = [
+            json.dumps(dict(values, output=self.path(name)))
+            for values, name in cases]
+        results = batch.run_batch(lines, workers=2)
+        self.assertEqual([result.error for result in results],
+                         [None] * len(cases))
+
+        for values, name in cases:
+            args = ['-o', self.path('cli-' + name)]
+            for key, value in values.items():
+                args += ['--' + key, str(value)]
+            eca.main(args)
+            with self.subTest(name=name):
+                with open(self.path(name), 'rb') as batch_file, \
+                        open(self.path('cli-' + name), 'rb') as cli_file:
+                    self.assertEqual(batch_file.read(), cli_file.read())
+
+        with history.open_history(self.path('a.ecah')) as reader:
+            self.assertEqual(
+                list(reader),
+                list(eca.calc_packed_grid(width=81, height=40, rule=110)))
+
+    def test_unwritable_outputs_fail(self):
+        lines = [
+            json.dumps({'states': 3, 'rule': 10,
+                        'output': self.path('a.ecah')}),
+            json.dumps({'generations': 0, 'output': self.path('a.png')}),
+            json.dumps({'width': 0, 'output': self.path('a.gif')}),
+        ]
+        results = batch.run_batch(lines, workers=1)
+        self.assertIn('two state', results[0].error)
+        self.assertIn('at least one cell', results[1].error)
+        self.assertIn('at least one cell', results[2].error)
+        for name in ['a.ecah', 'a.png', 'a.gif']:
+            self.assertFalse(os.path.exists(self.path(name)))
+
+    def test_large_jobs_stream_past_the_cache(self):
+        engine = batch.Engine()
+        small = batch.parse_job('{"output": "a.txt"}', line=1)
+        large = batch.parse_job(
+            '{"output": "a.txt", "generations": 1000}', line=2)
+        batch.calc_job_rows(small, engine)
+        self.assertEqual(engine.cache_info().size, 1)
+        rows, width = batch.calc_job_rows(large, engine)
+        self.assertNotIsInstance(rows, (list, tuple))
+        self.assertEqual(engine.cache_info().size, 1)
+        self.assertEqual(
+            list(rows), list(eca.calc_packed_grid(width=2001, height=1000)))
+
+    def test_empty_grids(self):
+        lines = [
+            json.dumps({'generations': 0, 'output': self.path('a.svg')}),
+            json.dumps({'generations': 0, 'output': self.path('a.txt')}),
+        ]
+        results = batch.run_batch(lines, workers=1)
+        self.assertEqual([result.error for result in results], [None, None])
+        self.assertEqual(self.read('a.txt'), '\n')
+
+    def test_unexpected_errors_fail_the_job(self):
+        job = batch.parse_job('{"output": "a.txt"}', line=1)
+        result = batch.run_job(job._replace(seed=3))
+        self.assertEqual(result.line, 1)
+        self.assertTrue(result.error.startswith('TypeError: '))
+
+    def test_no_workers(self):
+        with self.assertRaises(ValueError):
+            batch.run_batch([], workers=0)
+
+
+class TestMain(unittest.TestCase):
+    def test_summary(self):
+        with tempfile.TemporaryDirectory() as directory:
+            manifest = os.path.join(directory, 'manifest.jsonl')
+            summary = os.path.join(directory, 'summary.json')
+            output = os.path.join(directory, 'out.txt')
+            with open(manifest, 'w') as f:
+                f.write(json.dumps({'output': output}) + '\n')
+                f.write('{"rule": -1, "output": "x.txt"}\n')
+                f.write('{"rule": null, "output": "x.txt"}\n')
+                f.write('{"seed": 3, "output": "x.txt"}\n')
+
+            with contextlib.redirect_stderr(io.StringIO()):
+                status = eca.main([
+                    '--batch', manifest, '--summary', summary,
+                    '--rule', '90', '--generations', '3'])
+
+            with open(summary) as f:
+                report = json.load(f)
+            with open(output) as f:
+                text = f.read()
+
+        self.assertEqual(status, 1)
+        self.assertEqual(
+            (report['jobs'], report['succeeded'], report['failed']),
+            (4, 1, 3))
+        self.assertEqual(text, '   #   \n  # #  \n #   # \n')
+
+    def test_options_batch_ignores(self):
+        for option in [['--ether'], ['--downsample', '2'],
+                       ['--replay', 'x.ecah'], ['--row-stride', '2'],
+                       ['--prefetch', '4'], ['--window', '3'],
+                       ['--rows-per-frame', '2'], ['--codec', 'lzma'],
+                       ['-o', 'a.svg'], ['--reversible']]:
+            with self.subTest(option=option):
+                with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                    with self.assertRaises(SystemExit):
+                        eca.main(['--batch', 'm.jsonl'] + option)
+                self.assertIn('not supported with --batch',
+                              stderr.getvalue())
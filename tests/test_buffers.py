@@ -0,0 +1,94 @@
+import unittest
+
+import buffers
+import elementary_cellular_automaton as eca
+
+
+class TestConversions(unittest.TestCase):
+    def test_packed_to_bits(self):
+        self.assertEqual(buffers.packed_to_bits(0x1ff, 9), b'\xff\x01')
+
+    def test_packed_to_cell_bytes(self):
+        self.assertEqual(
+            buffers.packed_to_cell_bytes(0b1101, 5), b'\x01\x00\x01\x01\x00')
+
+    def test_empty(self):
+        self.assertEqual(buffers.packed_to_cell_bytes(0, 0), b'')
+        self.assertEqual(buffers.cell_bytes_to_packed(b''), 0)
+
+    def test_round_trip(self):
+        for packed in range(64):
+            cells = buffers.packed_to_cell_bytes(packed, 6)
+            self.assertEqual(buffers.cell_bytes_to_packed(cells), packed)
+
+
+class TestPackedRow(unittest.TestCase):
+    def test_cells(self):
+        row = buffers.PackedRow.from_cells([True, False, True])
+        self.assertEqual(len(row), 3)
+        self.assertEqual(list(row), [True, False, True])
+        self.assertEqual(bytes(row.cells()), b'\x01\x00\x01')
+        self.assertTrue(row.cells().readonly)
+        self.assertEqual(bytes(row.bits()), b'\x05')
+
+    def test_indexing(self):
+        row = buffers.PackedRow(0b10, 2)
+        self.assertFalse(row[0])
+        self.assertTrue(row[-1])
+        with self.assertRaises(IndexError):
+            row[2]
+
+    def test_array_interface(self):
+        interface = buffers.PackedRow(0b110, 3).__array_interface__
+        self.assertEqual(interface['shape'], (3,))
+        self.assertEqual(interface['typestr'], '|u1')
+        self.assertEqual(bytes(interface['data']), b'\x00\x01\x01')
+
+
+class TestPackedGrid(unittest.TestCase):
+    def test_matches_calc_grid(self):
+        grid = buffers.calc_grid(width=11, height=6, rule=30)
+        self.assertEqual(
+            eca.grid_to_text(grid),
+            eca.grid_to_text(eca.calc_grid(width=11, height=6, rule=30)))
+
+    def test_views(self):
+        grid = buffers.PackedGrid.from_grid([
+            [False, True, False],
+            [True, True, True],
+        ])
+        cells = grid.cells()
+        self.assertEqual(cells.shape, (2, 3))
+        self.assertEqual(cells.tolist(), [[0, 1, 0], [1, 1, 1]])
+        bits = grid.bits()
+        self.assertEqual(bits.shape, (2, 1))
+        self.assertEqual(bits.tolist(), [[2], [7]])
+        self.assertEqual(grid.__array_interface__['shape'], (2, 3))
+
+    def test_writes_without_conversion(self):
+        grid = buffers.calc_grid(width=5, height=2, rule=30)
+        self.assertEqual(
+            bytes(grid.cells()),
+            b'\x00\x00\x01\x00\x00' b'\x00\x01\x01\x01\x00')
+
+    def test_empty(self):
+        grid = buffers.PackedGrid([], 4)
+        self.assertEqual(len(grid), 0)
+        self.assertEqual(bytes(grid.cells()), b'')
+
+    def test_ragged(self):
+        with self.assertRaises(ValueError):
+            buffers.PackedGrid.from_grid([[True], [True, False]])
+
+    def test_equality(self):
+        self.assertEqual(
+            buffers.calc_grid(width=5, height=3),
+            buffers.PackedGrid.from_grid(eca.calc_grid(width=5, height=3)))
+
+
+@unittest.skipUnless(hasattr(memoryview, '__buffer__'),
+                     'The buffer protocol for classes needs Python 3.12.')
+class TestBufferProtocol(unittest.TestCase):
+    def test(self):
+        grid = buffers.calc_grid(width=5, height=2, rule=30)
+        self.assertEqual(memoryview(grid).shape, (2, 5))
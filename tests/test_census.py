@@ -0,0 +1,113 @@
+import contextlib
+import io
+import unittest
+
+import census
+import elementary_cellular_automaton as eca
+
+
+def _brute_force_table(rule, width):
+    return [
+        eca.step_packed_bounded(state, width, rule, eca.PERIODIC)
+        for state in range(1 << width)]
+
+
+def _brute_force_census(rule, width):
+    successors = _brute_force_table(rule, width)
+    cyclic = set()
+    for state in range(len(successors)):
+        for _ in range(len(successors)):
+            state = successors[state]
+        cyclic.add(state)
+        seen = successors[state]
+        while seen != state:
+            cyclic.add(seen)
+            seen = successors[seen]
+    transients = []
+    for state in range(len(successors)):
+        steps = 0
+        while state not in cyclic:
+            state = successors[state]
+            steps += 1
+        transients.append(steps)
+    return (
+        len(cyclic), max(transients),
+        len(successors) - len(set(successors)))
+
+
+class TestTransitionTable(unittest.TestCase):
+    def test_matches_step_packed_bounded(self):
+        for width in range(1, 8):
+            for rule in eca.WOLFRAM_CODES:
+                self.assertEqual(
+                    list(census.transition_table(rule, width)),
+                    _brute_force_table(rule, width),
+                    f'rule {rule} width {width}')
+
+    def test_invalid_width(self):
+        for width in [0, census.MAX_WIDTH + 1]:
+            with self.assertRaises(ValueError):
+                census.transition_table(30, width)
+
+
+class TestCensusOf(unittest.TestCase):
+    def test_matches_brute_force(self):
+        for width in [1, 4, 7]:
+            for rule in eca.WOLFRAM_CODES:
+                report = census.census_of(rule, width)
+                self.assertEqual(
+                    (report.cyclic_states, report.max_transient,
+                     report.gardens_of_eden),
+                    _brute_force_census(rule, width),
+                    f'rule {rule} width {width}')
+
+    def test_identity(self):
+        report = census.census_of(204, 3)
+        self.assertEqual(report.periods, ((1, 8),))
+        self.assertEqual(report.cycles, 8)
+        self.assertEqual(report.max_transient, 0)
+        self.assertEqual(report.gardens_of_eden, 0)
+
+    def test_shift(self):
+        # Rule 170 rotates the ring, so the orbits are its necklaces.
+        self.assertEqual(
+            census.census_of(170, 4).periods, ((1, 2), (2, 1), (4, 3)))
+
+
+class TestCensus(unittest.TestCase):
+    def test_classes_share_reports(self):
+        reports = census.census(range(1, 6), workers=1)
+        self.assertEqual(len(reports), 256 * 5)
+        for (rule, width), report in reports.items():
+            self.assertEqual(report.rule, rule)
+            self.assertEqual(report, census.census_of(rule, width))
+
+    def test_workers(self):
+        rules = [30, 86, 110, 137]
+        self.assertEqual(
+            census.census([3, 6], rules, workers=2),
+            census.census([3, 6], rules, workers=1))
+
+    def test_no_workers(self):
+        with self.assertRaises(ValueError):
+            census.census([3], workers=0)
+
+
+class TestMain(unittest.TestCase):
+    def test(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(
+                census.main(['-w', '2', '-r', '204', '--workers', '1']), 0)
+        self.assertEqual(output.getvalue().splitlines(), [
+            'rule 204 width 1: 2 cycles (1x2), 2 of 2 states cyclic, '
+            'longest transient 0, 0 Gardens of Eden',
+            'rule 204 width 2: 4 cycles (1x4), 4 of 4 states cyclic, '
+            'longest transient 0, 0 Gardens of Eden',
+        ])
+
+    def test_no_workers(self):
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            with self.assertRaises(SystemExit):
+                census.main(['-w', '2', '--workers', '0'])
+        self.assertIn('At least one worker', stderr.getvalue())
@@ -0,0 +1,295 @@
+'''Every engine against the reference find_cell_value semantics.
+
+The golden digests pin the output of every elementary rule on large grids
+so that later optimisations cannot drift unnoticed. Regenerate them, only
+after checking a change of output is intended, with
+
+    make golden-digests
+'''
+import hashlib
+import json
+import os
+import random
+import unittest
+
+import batch
+import buffers
+import damage
+import elementary_cellular_automaton as eca
+import engine
+import ether
+import generalised_rules
+import rule_symmetry
+import sparse
+import views
+
+_GOLDEN_DIGESTS = os.path.join(
+    os.path.dirname(__file__), 'golden_digests.json')
+
+_GOLDEN_SIZE = 1000
+_GOLDEN_SEED = 36
+
+_TRIALS_PER_RULE = 3
+
+_ENGINE = engine.Engine()
+
+
+def _random_starting_line(rng, width):
+    span = width + 2
+    cells = {x for x in range(-span, span + 1) if rng.getrandbits(1)}
+    return eca.starting_line_from_cells(cells)
+
+
+def _random_case(rng):
+    '''A width (None for calc_grid's pyramid), height and starting line.'''
+    height = rng.randrange(0, 16)
+    width = None if rng.random() < 0.25 else rng.randrange(0, 36)
+    starting_line = None
+    if rng.random() < 0.75:
+        starting_line = _random_starting_line(
+            rng, width if width is not None else 2*height)
+    return width, height, starting_line
+
+
+def _reference_grid(width, height, rule, starting_line):
+    return [
+        eca.cells_to_packed(row)
+        for row in eca.calc_grid(
+            width=width, height=height, rule=rule,
+            starting_line=starting_line)]
+
+
+def _reference_bounded_grid(lower, width, height, rule, starting_line,
+                            boundary):
+    '''Step a list of cells one neighbourhood at a time.'''
+    if starting_line is None:
+        starting_line = eca.a_single_cell
+    row = [bool(starting_line(x)) for x in range(lower, lower + width)]
+    rows = []
+    for _ in range(height):
+        rows.append(eca.cells_to_packed(row))
+        if boundary == eca.PERIODIC:
+            padded = row[-1:] + row + row[:1]
+        else:
+            padded = [False] + row + [False]
+        row = [
+            bool(rule >> eca.neighbours_to_int(padded[x:x + 3]) & 1)
+            for x in range(width)]
+    return rows
+
+
+def _centred_lower(width, height):
+    if width is None:
+        width = eca.width_at_given_generation(generation=height)
+    return width, eca.find_x_coordinates(width=width).start
+
+
+def _packed_grid(width, height, rule, starting_line):
+    return list(eca.calc_packed_grid(
+        width=width, height=height, rule=rule, starting_line=starting_line))
+
+
+def _symmetric(width, height, rule, starting_line):
+    width, lower = _centred_lower(width, height)
+    return list(rule_symmetry.calc_packed_window(
+        lower=lower, width=width, height=height, rule=rule,
+        starting_line=starting_line))
+
+
+def _generalised(width, height, rule, starting_line):
+    return [
+        eca.cells_to_packed(row)
+        for row in generalised_rules.calc_grid(
+            width=width, height=height, rule=rule,
+            starting_line=starting_line)]
+
+
+def _view(width, height, rule, starting_line):
+    width, lower = _centred_lower(width, height)
+    window = views.view(
+        rule, seed=starting_line, x_range=range(lower, lower + width),
+        y_range=range(height))
+    return list(window.packed_rows())
+
+
+def _sparse(width, height, rule, starting_line):
+    width, lower = _centred_lower(width, height)
+    return list(sparse.calc_packed_window(
+        lower=lower, width=width, height=height, rule=rule,
+        starting_line=starting_line))
+
+
+def _buffers(width, height, rule, starting_line):
+    return list(buffers.calc_grid(
+        width=width, height=height, rule=rule,
+        starting_line=starting_line).packed_rows)
+
+
+def _batch(width, height, rule, starting_line):
+    if starting_line is not None:
+        return None
+    job = batch.Job(
+        line=1, rule=rule, generations=height, width=width,
+        radius=generalised_rules.DEFAULT_RADIUS,
+        states=generalised_rules.DEFAULT_STATES, boundary=eca.INFINITE,
+        seed=None, output='-')
+    return [eca.cells_to_packed(row) for row in batch.calc_job_grid(job)]
+
+
+def _engine(width, height, rule, starting_line):
+    return list(_ENGINE.calc_packed_grid(
+        width=width, height=height, rule=rule, starting_line=starting_line))
+
+
+_INFINITE_ENGINES = {
+    'calc_packed_grid': _packed_grid,
+    'rule_symmetry': _symmetric,
+    'generalised_rules': _generalised,
+    'views': _view,
+    'sparse': _sparse,
+    'buffers': _buffers,
+    'batch': _batch,
+    'engine': _engine,
+}
+
+
+def _bounded_packed(lower, width, height, rule, starting_line, boundary):
+    return list(eca.calc_packed_window(
+        lower=lower, width=width, height=height, rule=rule,
+        starting_line=starting_line, boundary=boundary))
+
+
+def _bounded_generalised(lower, width, height, rule, starting_line,
+                         boundary):
+    return list(generalised_rules.calc_window(
+        lower=lower, width=width, height=height, rule=rule,
+        starting_line=starting_line, boundary=boundary))
+
+
+def _bounded_sparse(lower, width, height, rule, starting_line, boundary):
+    return list(sparse.calc_packed_window(
+        lower=lower, width=width, height=height, rule=rule,
+        starting_line=starting_line, boundary=boundary))
+
+
+def _bounded_damage(lower, width, height, rule, starting_line, boundary):
+    if lower != eca.find_x_coordinates(width=width).start:
+        return None
+    run = damage.DamageRun(
+        width=width, rule=rule, flips=(), starting_line=starting_line,
+        boundary=boundary)
+    return [step.row for step in run.steps(height)]
+
+
+def _bounded_engine(lower, width, height, rule, starting_line, boundary):
+    return list(_ENGINE.calc_packed_window(
+        lower=lower, width=width, height=height, rule=rule,
+        starting_line=starting_line, boundary=boundary))
+
+
+def _bounded_ether(lower, width, height, rule, starting_line, boundary):
+    if boundary != eca.PERIODIC:
+        return None
+    return list(ether.calc_packed_window(
+        lower=lower, width=width, height=height, rule=rule,
+        starting_line=starting_line, min_gap=2, split_every=1))
+
+
+_BOUNDED_ENGINES = {
+    'calc_packed_window': _bounded_packed,
+    'generalised_rules': _bounded_generalised,
+    'sparse': _bounded_sparse,
+    'damage': _bounded_damage,
+    'engine': _bounded_engine,
+    'ether': _bounded_ether,
+}
+
+
+def golden_digest(rule, boundary):
+    '''The SHA-256 of a square grid as packed bits, row by row.'''
+    starting_line = None
+    if boundary != eca.INFINITE:
+        starting_line = _random_starting_line(
+            random.Random(_GOLDEN_SEED), _GOLDEN_SIZE // 2)
+    digest = hashlib.sha256()
+    for row in eca.calc_packed_grid(
+            width=_GOLDEN_SIZE, height=_GOLDEN_SIZE, rule=rule,
+            starting_line=starting_line, boundary=boundary):
+        digest.update(buffers.packed_to_bits(row, _GOLDEN_SIZE))
+    return digest.hexdigest()
+
+
+def _golden_boundaries():
+    return (eca.INFINITE, eca.PERIODIC)
+
+
+def write_golden_digests():
+    digests = {
+        boundary: [
+            golden_digest(rule, boundary) for rule in eca.WOLFRAM_CODES]
+        for boundary in _golden_boundaries()}
+    with open(_GOLDEN_DIGESTS, 'w') as f:
+        json.dump({'size': _GOLDEN_SIZE, 'seed': _GOLDEN_SEED,
+                   'digests': digests}, f, indent=1)
+        f.write('\n')
+
+
+class TestInfiniteConformance(unittest.TestCase):
+    def test_default_starting_line(self):
+        for rule in eca.WOLFRAM_CODES:
+            expected = _reference_grid(None, 8, rule, None)
+            for name, calc in _INFINITE_ENGINES.items():
+                with self.subTest(rule=rule, engine=name):
+                    self.assertEqual(calc(None, 8, rule, None), expected)
+
+    def test_fuzz(self):
+        rng = random.Random(_GOLDEN_SEED)
+        for rule in eca.WOLFRAM_CODES:
+            for _ in range(_TRIALS_PER_RULE):
+                width, height, starting_line = _random_case(rng)
+                expected = _reference_grid(
+                    width, height, rule, starting_line)
+                for name, calc in _INFINITE_ENGINES.items():
+                    actual = calc(width, height, rule, starting_line)
+                    if actual is None:
+                        continue
+                    with self.subTest(rule=rule, engine=name, width=width,
+                                      height=height):
+                        self.assertEqual(actual, expected)
+
+
+class TestBoundedConformance(unittest.TestCase):
+    def test_fuzz(self):
+        rng = random.Random(_GOLDEN_SEED)
+        for boundary in [eca.PERIODIC, eca.FIXED]:
+            for rule in eca.WOLFRAM_CODES:
+                width = rng.randrange(1, 36)
+                height = rng.randrange(0, 16)
+                lower = rng.choice(
+                    [eca.find_x_coordinates(width=width).start,
+                     rng.randrange(-width, 1)])
+                starting_line = _random_starting_line(rng, width)
+                expected = _reference_bounded_grid(
+                    lower, width, height, rule, starting_line, boundary)
+                for name, calc in _BOUNDED_ENGINES.items():
+                    actual = calc(
+                        lower, width, height, rule, starting_line, boundary)
+                    if actual is None:
+                        continue
+                    with self.subTest(rule=rule, engine=name,
+                                      boundary=boundary):
+                        self.assertEqual(actual, expected)
+
+
+class TestGoldenDigests(unittest.TestCase):
+    def test(self):
+        with open(_GOLDEN_DIGESTS) as f:
+            golden = json.load(f)
+        self.assertEqual(golden['size'], _GOLDEN_SIZE)
+        self.assertEqual(golden['seed'], _GOLDEN_SEED)
+        for boundary in _golden_boundaries():
+            for rule in eca.WOLFRAM_CODES:
+                with self.subTest(rule=rule, boundary=boundary):
+                    self.assertEqual(
+                        golden_digest(rule, boundary),
+                        golden['digests'][boundary][rule])
@@ -0,0 +1,79 @@
+import random
+import unittest
+
+import damage
+import elementary_cellular_automaton as eca
+
+
+class TestPopcount(unittest.TestCase):
+    def test(self):
+        self.assertEqual(damage.popcount(0), 0)
+        self.assertEqual(damage.popcount(0b1011), 3)
+
+
+class TestDamageBounds(unittest.TestCase):
+    def test(self):
+        self.assertIsNone(damage.damage_bounds(0))
+        self.assertEqual(damage.damage_bounds(0b0110100), (2, 6))
+
+
+class TestDamageRun(unittest.TestCase):
+    def test_damage_is_xor_of_separate_runs(self):
+        rng = random.Random(35)
+        cells = {x for x in range(-10, 10) if rng.getrandbits(1)}
+
+        def starting_line(x):
+            return x in cells
+
+        for rule in [30, 90, 110, 150]:
+            run = damage.DamageRun(
+                width=21, rule=rule, flips=(-3, 0, 4),
+                starting_line=starting_line)
+            steps = list(run.steps(15))
+            base = list(eca.calc_packed_grid(
+                width=21, height=15, rule=rule,
+                starting_line=starting_line, boundary=eca.PERIODIC))
+            self.assertEqual([step.row for step in steps], base)
+            for index, flip in enumerate((-3, 0, 4)):
+                perturbed = list(eca.calc_packed_grid(
+                    width=21, height=15, rule=rule,
+                    starting_line=lambda x: (x in cells) != (x == flip),
+                    boundary=eca.PERIODIC))
+                self.assertEqual(
+                    [step.damages[index] for step in steps],
+                    [a ^ b for a, b in zip(base, perturbed)])
+
+    def test_rule_90_is_linear(self):
+        # Damage in an additive rule evolves like a single cell seed.
+        steps = list(damage.DamageRun(width=41, rule=90).steps(10))
+        self.assertEqual(
+            [step.damages[0] for step in steps],
+            list(eca.calc_packed_grid(
+                width=41, height=10, rule=90, boundary=eca.PERIODIC)))
+
+    def test_metrics(self):
+        [metrics] = damage.measure_damage(width=101, generations=30, rule=90)
+        self.assertEqual(metrics.flip, 0)
+        self.assertEqual(metrics.left_speed, 1.0)
+        self.assertEqual(metrics.right_speed, 1.0)
+        self.assertIsNone(metrics.extinct_at)
+        self.assertGreater(metrics.lyapunov, 0)
+
+    def test_extinction(self):
+        [metrics] = damage.measure_damage(width=11, generations=5, rule=0)
+        self.assertEqual(metrics.extinct_at, 1)
+        self.assertEqual(metrics.final, 0)
+        self.assertEqual(metrics.peak, 1)
+        self.assertEqual(metrics.lyapunov, 0.0)
+
+    def test_not_iterated(self):
+        with self.assertRaises(ValueError):
+            damage.DamageRun(width=5).metrics()
+
+    def test_flip_outside_lattice(self):
+        with self.assertRaises(ValueError):
+            damage.DamageRun(width=5, flips=(3,))
+
+    def test_infinite_boundary(self):
+        with self.assertRaises(ValueError):
+            damage.DamageRun(width=5, boundary=eca.INFINITE)
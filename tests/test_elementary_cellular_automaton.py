@@ -775,11 +775,106 @@ class TestGrid(unittest.TestCase):
             ]))
 
 
+class TestPacking(unittest.TestCase):
+    def test_cells_to_packed(self):
+        self.assertEqual(eca.cells_to_packed((True, False, False, True)), 9)
+
+    def test_packed_to_cells(self):
+        self.assertEqual(
+            tuple(eca.packed_to_cells(9, 5)),
+            (True, False, False, True, False))
+
+    def test_reverse_packed(self):
+        self.assertEqual(eca.reverse_packed(0b0011, 4), 0b1100)
+
+
+class TestStepPackedRow(unittest.TestCase):
+    def test_rule30(self):
+        self.assertEqual(
+            eca.step_packed_row(0b00100, width=5, rule=30), 0b111)
+
+    def test_too_narrow(self):
+        self.assertEqual(eca.step_packed_row(0b11, width=2, rule=255), 0)
+
+
+class TestCalcPackedGrid(unittest.TestCase):
+    def test_matches_calc_grid(self):
+        for rule in eca.WOLFRAM_CODES:
+            for width, height in [(11, 6), (10, 7), (1, 3)]:
+                expected = list(map(eca.cells_to_packed, eca.calc_grid(
+                    width=width, height=height, rule=rule)))
+                actual = list(eca.calc_packed_grid(
+                    width=width, height=height, rule=rule))
+                self.assertEqual(actual, expected, f'rule {rule}')
+
+    def test_default_width(self):
+        actual = eca.grid_to_text(eca.packed_grid_to_grid(
+            eca.calc_packed_grid(width=None, height=3), 7))
+        expected = '\n'.join([
+            '   #   ',
+            '  ###  ',
+            ' ##  # ',
+        ])
+        self.assertEqual(actual, expected)
+
+
+class TestPadPacked(unittest.TestCase):
+    def test_fixed(self):
+        self.assertEqual(eca.pad_packed(0b111, 3, 1, eca.FIXED), 0b01110)
+
+    def test_periodic(self):
+        self.assertEqual(eca.pad_packed(0b001, 3, 1, eca.PERIODIC), 0b10010)
+        self.assertEqual(eca.pad_packed(0b100, 3, 1, eca.PERIODIC), 0b01001)
+
+    def test_periodic_wider_than_row(self):
+        self.assertEqual(
+            eca.pad_packed(0b01, 2, 3, eca.PERIODIC), 0b10101010)
+
+    def test_infinite(self):
+        with self.assertRaises(ValueError):
+            eca.pad_packed(0b1, 1, 1, eca.INFINITE)
+
+
+class TestBoundaries(unittest.TestCase):
+    def test_periodic(self):
+        rows = list(eca.calc_packed_grid(
+            width=5, height=4, rule=30, boundary=eca.PERIODIC))
+        actual = eca.grid_to_text(eca.packed_grid_to_grid(rows, 5))
+        expected = '\n'.join([
+            '  #  ',
+            ' ### ',
+            '##  #',
+            '  ###',
+        ])
+        self.assertEqual(actual, expected)
+
+    def test_fixed(self):
+        rows = list(eca.calc_packed_grid(
+            width=5, height=4, rule=30, boundary=eca.FIXED))
+        actual = eca.grid_to_text(eca.packed_grid_to_grid(rows, 5))
+        expected = '\n'.join([
+            '  #  ',
+            ' ### ',
+            '##  #',
+            '# ###',
+        ])
+        self.assertEqual(actual, expected)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            list(eca.calc_packed_grid(
+                width=5, height=4, rule=30, boundary='sticky'))
+
+
 class TestToSVG(unittest.TestCase):
     def test_negative_side_length(self):
         with self.assertRaises(ValueError):
             list(eca.to_svg(data=[], side=-1))
 
+    def test_empty(self):
+        actual = list(eca.to_svg(data=[]))
+        self.assertIn('width="0px" height="0px">', actual[2])
+
     def test_normal(self):
         # Rule 30
         given_data = [
@@ -816,3 +911,26 @@ class TestToSVG(unittest.TestCase):
         self.maxDiff = None
         actual = '\n'.join(eca.to_svg(data=given_data))
         self.assertEqual(actual, expected)
+
+
+class TestBackground(unittest.TestCase):
+    def test_step_background(self):
+        self.assertFalse(eca.step_background(False, 30))
+        self.assertTrue(eca.step_background(False, 1))
+        self.assertFalse(eca.step_background(True, 1))
+
+    def test_background_after(self):
+        for rule in eca.WOLFRAM_CODES:
+            for start in [False, True]:
+                background = start
+                for generations in range(7):
+                    self.assertEqual(
+                        eca.background_after(start, rule, generations),
+                        background)
+                    background = eca.step_background(background, rule)
+
+    def test_step_packed_in_background(self):
+        self.assertEqual(
+            eca.step_packed_in_background(0b1, 1, 30, False), 0b111)
+        self.assertEqual(
+            eca.step_packed_in_background(0b0, 1, 160, True), 0b010)
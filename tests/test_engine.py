@@ -0,0 +1,161 @@
+import random
+import sys
+import threading
+import time
+import unittest
+
+import elementary_cellular_automaton as eca
+import engine
+import rule_symmetry
+
+_THREADS = 16
+
+
+def _jobs(seed, count):
+    rng = random.Random(seed)
+    jobs = []
+    for _ in range(count):
+        cells = {x for x in range(-4, 5) if rng.getrandbits(1)}
+        jobs.append({
+            'width': rng.choice([None, 31, 64]),
+            'height': rng.randrange(1, 40),
+            'rule': rng.choice(eca.WOLFRAM_CODES),
+            'starting_line': rng.choice(
+                [None, eca.starting_line_from_cells(cells)]),
+            'boundary': rng.choice(eca.BOUNDARIES),
+        })
+    return jobs
+
+
+def _expected(job):
+    return tuple(eca.calc_packed_grid(**job))
+
+
+class TestEngine(unittest.TestCase):
+    def test_matches_calc_packed_grid(self):
+        instance = engine.Engine()
+        for job in _jobs(40, 200):
+            self.assertEqual(instance.calc_packed_grid(**job), _expected(job))
+
+    def test_find_cell_value(self):
+        instance = engine.Engine()
+        for rule in [30, 90, 110]:
+            for y in range(-1, 6):
+                for x in range(-6, 7):
+                    self.assertEqual(
+                        instance.find_cell_value(x, y, rule),
+                        eca.find_cell_value(x, y, rule))
+
+    def test_mirrored_rules_share_the_cache(self):
+        # 86 is the mirror image of 30 and a single cell is symmetric.
+        instance = engine.Engine()
+        for rule in [30, 86]:
+            instance.calc_packed_grid(width=None, height=10, rule=rule)
+        self.assertEqual(instance.cache_info().misses, 1)
+        self.assertEqual(instance.cache_info().hits, 1)
+
+    def test_bounded_cache(self):
+        instance = engine.Engine(max_windows=2)
+        for rule in [0, 1, 2, 3]:
+            instance.calc_packed_grid(
+                width=5, height=3, rule=rule, boundary=eca.PERIODIC)
+        self.assertEqual(instance.cache_info().size, 2)
+        instance.cache_clear()
+        self.assertEqual(
+            instance.cache_info(), engine.CacheInfo(0, 0, 0, 2))
+
+    def test_instances_are_separate(self):
+        first = engine.Engine()
+        second = engine.Engine()
+        first.calc_packed_grid(width=None, height=5)
+        self.assertEqual(second.cache_info().size, 0)
+
+    def test_invalid(self):
+        instance = engine.Engine()
+        with self.assertRaises(ValueError):
+            instance.calc_packed_grid(width=5, height=3, rule=256)
+        with self.assertRaises(ValueError):
+            instance.run_many([], workers=0)
+
+
+class TestConcurrency(unittest.TestCase):
+    def test_run_many_is_deterministic(self):
+        jobs = _jobs(41, 300)
+        expected = list(map(_expected, jobs))
+        for workers in [1, _THREADS]:
+            self.assertEqual(
+                engine.Engine().run_many(jobs, workers=workers), expected)
+
+    def test_stress(self):
+        # Every thread asks for the same windows at once, each being given
+        # the one copy that the cache keeps.
+        instance = engine.Engine(max_windows=64)
+        jobs = _jobs(42, 100)
+        barrier = threading.Barrier(_THREADS)
+        results = [None] * _THREADS
+        errors = []
+
+        def work(index):
+            try:
+                barrier.wait()
+                results[index] = [
+                    instance.calc_packed_grid(**job) for job in jobs]
+            except Exception as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=work, args=(index,))
+            for index in range(_THREADS)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(errors, [])
+        expected = list(map(_expected, jobs))
+        for result in results:
+            self.assertEqual(result, expected)
+        info = instance.cache_info()
+        self.assertEqual(info.hits + info.misses, _THREADS * len(jobs))
+        self.assertLessEqual(info.size, 64)
+        self.assertLess(elapsed, 60)
+
+    def test_throughput_scaling(self):
+        if getattr(sys, '_is_gil_enabled', lambda: True)():
+            self.skipTest('Threads only scale without the GIL.')
+        rng = random.Random(43)
+        jobs = [{
+            'width': 1001,
+            'height': 400,
+            'rule': rng.choice(eca.WOLFRAM_CODES),
+            'starting_line': eca.starting_line_from_cells(
+                rng.sample(range(-50, 50), 20)),
+        } for _ in range(4 * _THREADS)]
+
+        def timed(workers):
+            start = time.perf_counter()
+            engine.Engine().run_many(jobs, workers=workers)
+            return time.perf_counter() - start
+
+        speedup = timed(1) / timed(_THREADS)
+        self.assertGreater(
+            speedup, 1.5,
+            f'{_THREADS} threads ran {speedup:.2f} times as fast as one.')
+
+    def test_starting_line_caches_are_bounded(self):
+        for cache in [eca._live_cells_starting_line,
+                      rule_symmetry.mirrored_starting_line,
+                      rule_symmetry.complemented_starting_line]:
+            self.assertEqual(
+                cache.cache_info().maxsize, eca.STARTING_LINE_CACHE_SIZE)
+        instance = engine.Engine(max_windows=8)
+        for x in range(eca.STARTING_LINE_CACHE_SIZE + 10):
+            starting_line = eca.starting_line_from_cells([x, x + 1])
+            instance.calc_packed_grid(
+                width=9, height=2, rule=86, starting_line=starting_line)
+        self.assertLessEqual(
+            rule_symmetry.mirrored_starting_line.cache_info().currsize,
+            eca.STARTING_LINE_CACHE_SIZE)
+        self.assertLessEqual(instance.cache_info().size, 8)
@@ -0,0 +1,130 @@
+import contextlib
+import io
+import random
+import unittest
+
+import elementary_cellular_automaton as eca
+import ether
+
+# One phase of the rule 110 ether, which repeats every 14 cells and every
+# 7 generations.
+_ETHER_110 = eca.cells_to_packed(c == '1' for c in '00010011011111')
+
+
+def _dense_rows(row, width, rule, height):
+    return list(eca.calc_packed_window(
+        lower=0, width=width, height=height, rule=rule,
+        starting_line=lambda x: bool(row >> x & 1), boundary=eca.PERIODIC))
+
+
+def _with_defects(tile, period, width, starts, rng):
+    row = ether.background_window(tile, period, 0, width)
+    for start in starts:
+        row ^= rng.getrandbits(24) << start
+    return row & ((1 << width) - 1)
+
+
+class TestBackgroundWindow(unittest.TestCase):
+    def test(self):
+        self.assertEqual(ether.background_window(0b011, 3, 0, 7), 0b1011011)
+        self.assertEqual(ether.background_window(0b011, 3, 1, 4), 0b1101)
+        self.assertEqual(ether.background_window(0b011, 3, -1, 4), 0b0110)
+        self.assertEqual(ether.background_window(0b011, 3, 5, 0), 0)
+
+
+class TestDetectEther(unittest.TestCase):
+    def test_rule_110_ether(self):
+        rng = random.Random(43)
+        row = _with_defects(_ETHER_110, 14, 14 * 50, [100, 400], rng)
+        self.assertEqual(
+            ether.detect_ether(row, 14 * 50, ring=True), (_ETHER_110, 14))
+
+    def test_alignment(self):
+        row = ether.background_window(_ETHER_110, 14, 5, 14 * 10)
+        self.assertEqual(
+            ether.detect_ether(row, 14 * 10, lower=5), (_ETHER_110, 14))
+
+    def test_constant_background(self):
+        self.assertEqual(ether.detect_ether(0, 20, ring=True), (0, 1))
+        self.assertEqual(ether.detect_ether(0b1, 1), (1, 1))
+
+    def test_tile_orbit(self):
+        self.assertEqual(ether.tile_orbit(_ETHER_110, 14, 110), (0, 7))
+
+
+class TestEtherRun(unittest.TestCase):
+    def test_matches_dense_stepping(self):
+        rng = random.Random(43)
+        for rule, tile, period in [(110, _ETHER_110, 14), (54, 0, 1),
+                                   (54, 0b1100, 4)]:
+            width = period * 60
+            row = _with_defects(
+                tile, period, width, [3, width // 2, width - 20], rng)
+            expected = _dense_rows(row, width, rule, 120)
+            run = ether.EtherRun.from_row(rule, row, width, min_gap=8)
+            actual = [run.window(0, width)]
+            for _ in range(119):
+                run.step()
+                actual.append(run.window(0, width))
+            self.assertEqual(actual, expected, f'rule {rule}')
+
+    def test_skips_the_ether(self):
+        rng = random.Random(44)
+        width = 14 * 10**4
+        row = _with_defects(_ETHER_110, 14, width, [1000, 70000], rng)
+        run = ether.EtherRun.from_row(110, row, width)
+        self.assertEqual(len(run.defects()), 2)
+        run.step(200)
+        self.assertLess(
+            sum(upper - lower for lower, upper in run.defects()), 2000)
+        dense = row
+        for _ in range(200):
+            dense = eca.step_packed_bounded(dense, width, 110, eca.PERIODIC)
+        self.assertEqual(run.window(0, width), dense)
+
+    def test_defects_heal(self):
+        run = ether.EtherRun(0, 0, 1, [ether.Defect(10, 12, 0b11)])
+        run.step()
+        self.assertEqual(run.defects(), [])
+
+    def test_infinite_lattice(self):
+        run = ether.EtherRun(90, 0, 1, [ether.Defect(0, 1, 1)])
+        run.step(3)
+        self.assertEqual(run.window(-3, 7), 0b1010101)
+        self.assertEqual(run.defects(), [(-3, 4)])
+        self.assertTrue(run.cell(3))
+        self.assertFalse(run.cell(2))
+
+    def test_wrapping_defect_goes_dense(self):
+        width = 8
+        run = ether.EtherRun(
+            30, 0, 1, [ether.Defect(0, 1, 1)], lattice_width=width,
+            min_gap=2, split_every=1)
+        rows = [run.window(0, width)]
+        for _ in range(11):
+            run.step()
+            rows.append(run.window(0, width))
+        self.assertEqual(rows, _dense_rows(1, width, 30, 12))
+
+    def test_ring_must_hold_the_ether(self):
+        with self.assertRaises(ValueError):
+            ether.EtherRun(110, _ETHER_110, 14, lattice_width=20)
+
+
+class TestMain(unittest.TestCase):
+    def test_ether(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            eca.main(['-r', '90', '-g', '4', '--boundary', 'periodic',
+                      '--ether'])
+        self.assertEqual(output.getvalue().splitlines(), [
+            '    #    ',
+            '   # #   ',
+            '  #   #  ',
+            ' # # # # ',
+        ])
+
+    def test_needs_a_periodic_boundary(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                eca.main(['--ether'])
@@ -0,0 +1,149 @@
+import random
+import unittest
+
+import elementary_cellular_automaton as eca
+import generalised_rules
+
+
+def naive_grid(width, height, rule, radius, states, starting_line):
+    '''Recompute every neighbourhood from scratch as a reference.'''
+    table = generalised_rules.compile_rule(rule, radius, states)
+    margin = (height - 1) * radius
+    lower = eca.find_x_coordinates(width=width).start - margin
+    row = [int(starting_line(x)) for x in range(lower, lower + width + margin*2)]
+    grid = []
+    for y in range(height):
+        start = margin - y*radius
+        grid.append(tuple(row[start:start + width]))
+        neighbourhoods = [
+            row[i:i + radius*2 + 1] for i in range(len(row) - radius*2)]
+        if generalised_rules.is_totalistic(states):
+            row = [table[sum(n)] for n in neighbourhoods]
+        else:
+            row = [table[eca.bool_sequence_to_int(n)] for n in neighbourhoods]
+    return grid
+
+
+def normalise(grid):
+    return [tuple(map(int, row)) for row in grid]
+
+
+class TestNumberOfRules(unittest.TestCase):
+    def test_elementary(self):
+        self.assertEqual(generalised_rules.number_of_rules(), 256)
+
+    def test_radius_2(self):
+        self.assertEqual(generalised_rules.number_of_rules(radius=2), 2**32)
+
+    def test_totalistic(self):
+        self.assertEqual(generalised_rules.number_of_rules(states=3), 3**7)
+
+
+class TestEnsureRuleIsValid(unittest.TestCase):
+    def test_too_high(self):
+        with self.assertRaises(ValueError):
+            generalised_rules.ensure_rule_is_valid(256)
+
+    def test_radius_2(self):
+        generalised_rules.ensure_rule_is_valid(256, radius=2)
+
+    def test_bad_shape(self):
+        with self.assertRaises(ValueError):
+            generalised_rules.ensure_rule_is_valid(0, radius=0)
+        with self.assertRaises(ValueError):
+            generalised_rules.ensure_rule_is_valid(0, states=1)
+
+
+class TestCompileRule(unittest.TestCase):
+    def test_binary(self):
+        self.assertEqual(
+            generalised_rules.compile_rule(30),
+            bytes([0, 1, 1, 1, 1, 0, 0, 0]))
+
+    def test_totalistic(self):
+        # 777 is 1001210 in base 3
+        self.assertEqual(
+            generalised_rules.compile_rule(777, states=3),
+            bytes([0, 1, 2, 1, 0, 0, 1]))
+
+
+class TestCalcGrid(unittest.TestCase):
+    def test_elementary(self):
+        for rule in eca.WOLFRAM_CODES:
+            expected = normalise(eca.calc_grid(width=11, height=6, rule=rule))
+            actual = normalise(generalised_rules.calc_grid(
+                width=11, height=6, rule=rule))
+            self.assertEqual(actual, expected, f'rule {rule}')
+
+    def test_larger_radius(self):
+        rng = random.Random(27)
+        for radius in [2, 3]:
+            for _ in range(20):
+                rule = rng.randrange(generalised_rules.number_of_rules(radius))
+                expected = naive_grid(
+                    15, 8, rule, radius, 2, eca.a_single_cell)
+                actual = normalise(generalised_rules.calc_grid(
+                    width=15, height=8, rule=rule, radius=radius))
+                self.assertEqual(actual, expected, f'rule {rule}')
+
+    def test_totalistic(self):
+        rng = random.Random(27)
+        for radius, states in [(1, 3), (2, 3), (1, 4)]:
+            for _ in range(20):
+                rule = rng.randrange(
+                    generalised_rules.number_of_rules(radius, states))
+                seed = {x: rng.randrange(states) for x in range(-2, 3)}
+
+                def starting_line(x):
+                    return seed.get(x, 0)
+
+                expected = naive_grid(
+                    14, 7, rule, radius, states, starting_line)
+                actual = normalise(generalised_rules.calc_grid(
+                    width=14, height=7, rule=rule, radius=radius,
+                    states=states, starting_line=starting_line))
+                self.assertEqual(actual, expected, f'rule {rule}')
+
+    def test_invalid_starting_state(self):
+        with self.assertRaises(ValueError):
+            list(generalised_rules.calc_grid(
+                width=3, height=2, rule=0, states=3,
+                starting_line=lambda x: 3))
+
+    def test_default_width(self):
+        rows = list(generalised_rules.calc_grid(
+            width=None, height=3, rule=0, radius=2))
+        self.assertEqual(len(list(rows[0])), 13)
+
+
+class TestGridToText(unittest.TestCase):
+    def test(self):
+        self.assertEqual(
+            generalised_rules.grid_to_text([[0, 1, 2], [3, 0, 1]]),
+            ' #2\n3 #')
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            generalised_rules.state_to_char(-1)
+
+
+class TestBoundaries(unittest.TestCase):
+    def test_binary_matches_elementary(self):
+        for boundary in [eca.PERIODIC, eca.FIXED]:
+            for rule in eca.WOLFRAM_CODES:
+                expected = list(eca.calc_packed_window(
+                    lower=-4, width=9, height=8, rule=rule,
+                    boundary=boundary))
+                actual = list(generalised_rules.calc_window(
+                    lower=-4, width=9, height=8, rule=rule,
+                    boundary=boundary))
+                self.assertEqual(actual, expected, f'rule {rule}')
+
+    def test_pad_totalistic_row(self):
+        row = bytes([1, 0, 0])
+        self.assertEqual(
+            generalised_rules.pad_totalistic_row(row, 1, eca.PERIODIC),
+            bytes([0, 1, 0, 0, 1]))
+        self.assertEqual(
+            generalised_rules.pad_totalistic_row(row, 2, eca.FIXED),
+            bytes([0, 0, 1, 0, 0, 0, 0]))
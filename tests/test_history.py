@@ -0,0 +1,144 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import elementary_cellular_automaton as eca
+import history
+
+
+def _write(rows, width, **kwargs):
+    f = io.BytesIO()
+    writer = history.HistoryWriter(f, width, **kwargs)
+    writer.extend(rows)
+    writer.close()
+    f.seek(0)
+    return f
+
+
+class TestHistory(unittest.TestCase):
+    def test_round_trip(self):
+        for codec in history.CODECS:
+            for block_rows in [1, 7, 256]:
+                rows = list(eca.calc_packed_grid(
+                    width=50, height=40, rule=110, boundary=eca.PERIODIC))
+                reader = history.HistoryReader(
+                    _write(rows, 50, block_rows=block_rows, codec=codec))
+                self.assertEqual(len(reader), 40)
+                self.assertEqual(reader.width, 50)
+                self.assertEqual(reader.codec, codec)
+                self.assertEqual(list(reader), rows)
+
+    def test_random_access(self):
+        rows = list(eca.calc_packed_grid(width=None, height=100, rule=30))
+        reader = history.HistoryReader(
+            _write(rows, 201, block_rows=16))
+        for generation in [99, 0, 15, 16, 17, 50, -1]:
+            self.assertEqual(reader[generation], rows[generation])
+        with self.assertRaises(IndexError):
+            reader[100]
+
+    def test_grid(self):
+        rows = list(eca.calc_packed_grid(width=None, height=6, rule=90))
+        reader = history.HistoryReader(_write(rows, 13))
+        self.assertEqual(
+            list(map(list, reader.grid())),
+            list(map(list, eca.calc_grid(width=None, height=6, rule=90))))
+
+    def test_empty(self):
+        self.assertEqual(list(history.HistoryReader(_write([], 5))), [])
+        self.assertEqual(
+            list(history.HistoryReader(_write([0, 0, 0], 0))), [0, 0, 0])
+
+    def test_small_deltas_compress(self):
+        # Rule 184 traffic settles into a few moving jams.
+        rows = list(eca.calc_packed_grid(
+            width=1000, height=2000, rule=184,
+            starting_line=eca.starting_line_from_cells(range(-300, 100)),
+            boundary=eca.PERIODIC))
+        size = len(_write(rows, 1000).getvalue())
+        self.assertLess(size * 10, len(rows) * 1000 // 8)
+
+    def test_row_too_wide(self):
+        writer = history.HistoryWriter(io.BytesIO(), 3)
+        with self.assertRaises(ValueError):
+            writer.append(0b1000)
+
+    def test_invalid_codec(self):
+        with self.assertRaises(ValueError):
+            history.HistoryWriter(io.BytesIO(), 3, codec='bz2')
+
+    def test_not_a_history(self):
+        with self.assertRaises(ValueError):
+            history.HistoryReader(io.BytesIO(b'P5\n2 1\n255\n\x10\x20'))
+
+    def test_incomplete(self):
+        f = io.BytesIO()
+        history.HistoryWriter(f, 3).extend([1, 2, 3])
+        f.seek(0)
+        with self.assertRaises(ValueError):
+            history.HistoryReader(f)
+
+    def test_bad_index(self):
+        f = _write([1, 2, 3], 3)
+        data = bytearray(f.getvalue())
+        data[-16:-8] = (len(data)).to_bytes(8, 'big')
+        with self.assertRaises(ValueError):
+            history.HistoryReader(io.BytesIO(bytes(data)))
+
+    def test_open_closes_on_failure(self):
+        opened = []
+
+        def spy(*args):
+            f = open(*args)
+            opened.append(f)
+            return f
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'a.ecah')
+            with open(filename, 'wb') as f:
+                f.write(b'not a history')
+            history.open = spy
+            try:
+                with self.assertRaises(ValueError):
+                    history.open_history(filename)
+            finally:
+                del history.open
+        self.assertTrue(opened[0].closed)
+
+
+class TestMain(unittest.TestCase):
+    def test_save_and_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'rule90.ecah')
+            eca.main(['-r', '90', '-g', '4', '--codec', 'lzma',
+                      '-o', output])
+            text = io.StringIO()
+            with contextlib.redirect_stdout(text):
+                eca.main(['--replay', output])
+        self.assertEqual(text.getvalue().splitlines(), [
+            '    #    ',
+            '   # #   ',
+            '  #   #  ',
+            ' # # # # ',
+        ])
+
+    def test_totalistic_history(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                eca.main(['--states', '3', '-r', '10', '-o', 'a.ecah'])
+
+    def test_replay_errors(self):
+        with tempfile.TemporaryDirectory() as directory:
+            not_history = os.path.join(directory, 'a.ecah')
+            with open(not_history, 'wb') as f:
+                f.write(b'text')
+            missing = os.path.join(directory, 'missing.ecah')
+            for filename in [not_history, missing]:
+                with self.subTest(filename=filename):
+                    with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                        with self.assertRaises(SystemExit):
+                            eca.main(['--replay', filename])
+                    self.assertIn(f'Cannot replay {filename}',
+                                  stderr.getvalue())
@@ -0,0 +1,84 @@
+import contextlib
+import io
+import threading
+import time
+import unittest
+
+import elementary_cellular_automaton as eca
+import pipeline
+
+
+def _slow(rows, seconds):
+    for row in rows:
+        time.sleep(seconds)
+        yield row
+
+
+class TestPrefetcher(unittest.TestCase):
+    def test_rows_in_order(self):
+        rows = list(eca.calc_packed_grid(width=None, height=300, rule=30))
+        for depth, batch_size in [(1, 1), (2, 7), (8, 64), (1, 1000)]:
+            prefetcher = pipeline.Prefetcher(
+                eca.calc_packed_grid(width=None, height=300, rule=30),
+                depth=depth, batch_size=batch_size)
+            self.assertEqual(list(prefetcher), rows)
+            stats = prefetcher.stats()
+            self.assertEqual(stats.rows, 300)
+            self.assertEqual(stats.batches, -(-300 // batch_size))
+
+    def test_empty(self):
+        self.assertEqual(list(pipeline.Prefetcher([])), [])
+
+    def test_errors_are_raised_by_the_consumer(self):
+        def failing():
+            yield 1
+            raise ValueError('bad row')
+
+        with self.assertRaisesRegex(ValueError, 'bad row'):
+            list(pipeline.Prefetcher(failing(), batch_size=1))
+
+    def test_stopping_early_stops_the_producer(self):
+        threads = threading.active_count()
+        rows = iter(pipeline.Prefetcher(iter(int, 1), depth=1, batch_size=1))
+        self.assertEqual(next(rows), 0)
+        rows.close()
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_only_iterated_once(self):
+        prefetcher = pipeline.Prefetcher([1, 2])
+        list(prefetcher)
+        with self.assertRaises(ValueError):
+            list(prefetcher)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            pipeline.Prefetcher([], depth=0)
+
+    def test_slow_output_is_the_bottleneck(self):
+        prefetcher = pipeline.Prefetcher(range(20), depth=1, batch_size=1)
+        for _ in _slow(prefetcher, 0.01):
+            pass
+        self.assertEqual(prefetcher.stats().bottleneck, pipeline.OUTPUT)
+
+    def test_slow_compute_is_the_bottleneck(self):
+        prefetcher = pipeline.Prefetcher(
+            _slow(range(20), 0.01), depth=4, batch_size=1)
+        list(prefetcher)
+        self.assertEqual(prefetcher.stats().bottleneck, pipeline.COMPUTE)
+
+
+class TestMain(unittest.TestCase):
+    def test_prefetch(self):
+        output = io.StringIO()
+        errors = io.StringIO()
+        with contextlib.redirect_stdout(output), \
+                contextlib.redirect_stderr(errors):
+            eca.main(['-r', '90', '-g', '4', '--prefetch', '2'])
+        self.assertEqual(output.getvalue().splitlines(), [
+            '    #    ',
+            '   # #   ',
+            '  #   #  ',
+            ' # # # # ',
+        ])
+        self.assertIn('4 rows in 1 batches', errors.getvalue())
+        self.assertIn('bottleneck', errors.getvalue())
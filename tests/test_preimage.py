@@ -0,0 +1,94 @@
+import random
+import unittest
+
+import elementary_cellular_automaton as eca
+import preimage
+
+
+def _brute_force(row, width, rule, boundary):
+    if boundary == eca.INFINITE:
+        return sorted(
+            candidate for candidate in range(1 << (width + 2))
+            if eca.step_packed_row(candidate, width + 2, rule) == row)
+    return sorted(
+        candidate for candidate in range(1 << width)
+        if eca.step_packed_bounded(candidate, width, rule, boundary) == row)
+
+
+class TestPreimages(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(37)
+        for boundary in eca.BOUNDARIES:
+            for rule in eca.WOLFRAM_CODES:
+                width = rng.randrange(0, 9)
+                row = rng.getrandbits(width) if width else 0
+                expected = _brute_force(row, width, rule, boundary)
+                with self.subTest(rule=rule, boundary=boundary, width=width):
+                    self.assertEqual(
+                        preimage.count_preimages(row, width, rule, boundary),
+                        len(expected))
+                    self.assertEqual(
+                        sorted(preimage.preimages(
+                            row, width, rule, boundary)),
+                        expected)
+
+    def test_wide_row(self):
+        # Rule 90 is surjective, every row of n cells having four
+        # predecessors of n+2.
+        rng = random.Random(90)
+        row = rng.getrandbits(1000)
+        self.assertEqual(preimage.count_preimages(row, 1000, 90), 4)
+        for predecessor in preimage.preimages(row, 1000, 90):
+            self.assertEqual(
+                eca.step_packed_row(predecessor, 1002, 90), row)
+
+    def test_enumeration_is_lazy(self):
+        predecessors = preimage.preimages(0, 200, 0)
+        self.assertEqual(preimage.count_preimages(0, 200, 0), 1 << 202)
+        self.assertEqual(next(predecessors), 0)
+
+    def test_garden_of_eden(self):
+        # 01010 is the shortest orphan of rule 110.
+        self.assertTrue(preimage.is_garden_of_eden(0b01010, 5, 110))
+        self.assertFalse(preimage.is_garden_of_eden(0b0101, 4, 110))
+        self.assertTrue(preimage.is_garden_of_eden(0b1, 1, 0))
+        self.assertFalse(preimage.is_garden_of_eden(0b1, 1, 30))
+
+    def test_empty_lattice(self):
+        self.assertEqual(preimage.count_preimages(0, 0, 30, eca.PERIODIC), 1)
+        self.assertEqual(list(preimage.preimages(0, 0, 30, eca.FIXED)), [0])
+        self.assertEqual(preimage.count_preimages(0, 0, 30), 4)
+
+    def test_invalid_row(self):
+        with self.assertRaises(ValueError):
+            preimage.count_preimages(0b100, 2, 30)
+
+
+class TestSamplePreimage(unittest.TestCase):
+    def test_samples_are_predecessors(self):
+        rng = random.Random(37)
+        for boundary in eca.BOUNDARIES:
+            for rule in [30, 54, 110, 150]:
+                row = rng.getrandbits(64)
+                predecessor = preimage.sample_preimage(
+                    row, 64, rule, boundary, rng=rng)
+                if predecessor is None:
+                    self.assertTrue(preimage.is_garden_of_eden(
+                        row, 64, rule, boundary))
+                elif boundary == eca.INFINITE:
+                    self.assertEqual(
+                        eca.step_packed_row(predecessor, 66, rule), row)
+                else:
+                    self.assertEqual(eca.step_packed_bounded(
+                        predecessor, 64, rule, boundary), row)
+
+    def test_uniform(self):
+        rng = random.Random(37)
+        expected = _brute_force(0b0110, 4, 30, eca.INFINITE)
+        seen = {
+            preimage.sample_preimage(0b0110, 4, 30, rng=rng)
+            for _ in range(40 * len(expected))}
+        self.assertEqual(sorted(seen), expected)
+
+    def test_garden_of_eden(self):
+        self.assertIsNone(preimage.sample_preimage(0b1, 1, 0))
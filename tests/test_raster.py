@@ -0,0 +1,177 @@
+import contextlib
+import io
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+import elementary_cellular_automaton as eca
+import raster
+
+
+def _read_png(data):
+    '''The width, height and pixel rows of an unfiltered greyscale PNG.'''
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    position = 8
+    compressed = b''
+    while position < len(data):
+        length, = struct.unpack('>I', data[position:position + 4])
+        kind = data[position + 4:position + 8]
+        body = data[position + 8:position + 8 + length]
+        crc, = struct.unpack(
+            '>I', data[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(kind + body)
+        if kind == b'IHDR':
+            width, height, depth, colour = struct.unpack('>IIBB', body[:10])
+            assert (depth, colour) == (8, 0)
+        elif kind == b'IDAT':
+            compressed += body
+        position += 12 + length
+    pixels = zlib.decompress(compressed)
+    stride = width + 1
+    rows = [pixels[y*stride:(y + 1)*stride] for y in range(height)]
+    assert all(row[0] == 0 for row in rows)
+    return width, height, [row[1:] for row in rows]
+
+
+def _read_pgm(data):
+    header, width, height, maximum, pixels = data.split(maxsplit=4)
+    assert (header, maximum) == (b'P5', b'255')
+    width, height = int(width), int(height)
+    return width, height, [
+        pixels[y*width:(y + 1)*width] for y in range(height)]
+
+
+def _expected_densities(grid, downsample, row_stride):
+    grid = [list(map(int, row)) for row in grid][::row_stride]
+    width = len(grid[0])
+    rows = []
+    for top in range(0, len(grid), downsample):
+        block_rows = grid[top:top + downsample]
+        row = []
+        for left in range(0, width, downsample):
+            cells = [
+                cell for block_row in block_rows
+                for cell in block_row[left:left + downsample]]
+            row.append(255 - 255 * sum(cells) // len(cells))
+        rows.append(bytes(row))
+    return rows
+
+
+class TestRasterSize(unittest.TestCase):
+    def test(self):
+        self.assertEqual(raster.raster_size(10, 7), (10, 7))
+        self.assertEqual(raster.raster_size(10, 7, downsample=3), (4, 3))
+        self.assertEqual(raster.raster_size(10, 7, row_stride=2), (10, 4))
+        self.assertEqual(
+            raster.raster_size(10**3, 10**6, 4, 100), (250, 2500))
+
+    def test_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            raster.raster_size(10, 7, downsample=0)
+
+
+class TestDensityRows(unittest.TestCase):
+    def test_full_resolution(self):
+        rows = list(raster.density_rows([0b101, 0b010], 3))
+        self.assertEqual(rows, [b'\x00\xff\x00', b'\xff\x00\xff'])
+
+    def test_matches_blocks_of_the_grid(self):
+        for downsample, row_stride in [(1, 3), (3, 1), (4, 2), (7, 5)]:
+            rows = list(eca.calc_packed_grid(width=41, height=50, rule=30))
+            self.assertEqual(
+                list(raster.density_rows(rows, 41, downsample, row_stride)),
+                _expected_densities(
+                    eca.packed_grid_to_grid(rows, 41),
+                    downsample, row_stride),
+                f'downsample {downsample} stride {row_stride}')
+
+    def test_states(self):
+        rows = list(raster.density_rows([b'\x00\x01\x02\x02'], 4, 2,
+                                        states=3))
+        self.assertEqual(rows, [bytes((255 - 255 // 4, 0))])
+
+    def test_wide_blocks(self):
+        rows = list(raster.density_rows([1] * 300, 1, downsample=300))
+        self.assertEqual(rows, [b'\x00'])
+
+
+class TestWriters(unittest.TestCase):
+    def test_png(self):
+        f = io.BytesIO()
+        writer = raster.PngWriter(f, 3, 2)
+        writer.row(b'\x00\x80\xff')
+        writer.row(b'\xff\x80\x00')
+        writer.close()
+        self.assertEqual(
+            _read_png(f.getvalue()),
+            (3, 2, [b'\x00\x80\xff', b'\xff\x80\x00']))
+
+    def test_pgm(self):
+        f = io.BytesIO()
+        writer = raster.PgmWriter(f, 2, 1)
+        writer.row(b'\x10\x20')
+        writer.close()
+        self.assertEqual(f.getvalue(), b'P5\n2 1\n255\n\x10\x20')
+
+    def test_missing_rows(self):
+        writer = raster.PngWriter(io.BytesIO(), 3, 2)
+        writer.row(b'\x00\x80\xff')
+        with self.assertRaises(ValueError):
+            writer.close()
+
+    def test_wrong_width(self):
+        writer = raster.PgmWriter(io.BytesIO(), 3, 2)
+        with self.assertRaises(ValueError):
+            writer.row(b'\x00')
+
+
+class TestSaveRaster(unittest.TestCase):
+    def test_png_and_pgm_agree(self):
+        with tempfile.TemporaryDirectory() as directory:
+            png = os.path.join(directory, 'rule30.png')
+            pgm = os.path.join(directory, 'rule30.pgm')
+            self.assertEqual(
+                raster.save_raster(png, 200, downsample=4, row_stride=2),
+                (101, 25))
+            raster.save_raster(pgm, 200, downsample=4, row_stride=2)
+            with open(png, 'rb') as f:
+                png_image = _read_png(f.read())
+            with open(pgm, 'rb') as f:
+                self.assertEqual(_read_pgm(f.read()), png_image)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'rule90.png')
+            eca.main(['-r', '90', '-g', '64', '--row-stride', '2',
+                      '--downsample', '2', '-o', output])
+            with open(output, 'rb') as f:
+                width, height, rows = _read_png(f.read())
+        self.assertEqual((width, height), (65, 16))
+
+    def test_main_empty_image(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, args in [('a.png', ['-g', '0']),
+                               ('a.pgm', ['-g', '0']),
+                               ('a.png', ['-w', '0'])]:
+                output = os.path.join(directory, name)
+                with self.subTest(name=name, args=args):
+                    with contextlib.redirect_stderr(io.StringIO()):
+                        with self.assertRaises(SystemExit):
+                            eca.main(args + ['-o', output])
+                    self.assertFalse(os.path.exists(output))
+
+    def test_main_downsample_needs_an_image(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                eca.main(['--downsample', '2'])
+
+    def test_main_row_stride_text(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            eca.main(['-r', '90', '-g', '4', '--row-stride', '2'])
+        self.assertEqual(output.getvalue().splitlines(), [
+            '    #    ',
+            '  #   #  ',
+        ])
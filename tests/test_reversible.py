@@ -0,0 +1,83 @@
+import random
+import unittest
+
+import elementary_cellular_automaton as eca
+import reversible
+
+
+def naive_rows(width, height, rule, previous, current, boundary):
+    rows = []
+    for _ in range(height):
+        rows.append(tuple(current))
+        padded = [current[-1], *current, current[0]] \
+            if boundary == eca.PERIODIC else [False, *current, False]
+        following = [
+            bool(eca.index_to_num(eca.neighbours_to_int(padded[i:i + 3])) & rule)
+            for i in range(width)]
+        previous, current = current, [f != p for f, p in zip(following, previous)]
+    return rows
+
+
+class TestSteps(unittest.TestCase):
+    def test_backward_undoes_forward(self):
+        rng = random.Random(28)
+        for rule in eca.WOLFRAM_CODES:
+            previous = rng.getrandbits(20)
+            current = rng.getrandbits(20)
+            stepped = reversible.step_forward(previous, current, 20, rule)
+            self.assertEqual(
+                reversible.step_backward(*stepped, 20, rule),
+                (previous, current))
+
+
+class TestSecondOrderRun(unittest.TestCase):
+    def test_matches_naive(self):
+        rng = random.Random(28)
+        for boundary in [eca.PERIODIC, eca.FIXED]:
+            for rule in [30, 90, 110, 150, 204]:
+                cells = [bool(rng.getrandbits(1)) for _ in range(9)]
+                xs = list(eca.find_x_coordinates(9))
+                run = reversible.SecondOrderRun(
+                    width=9, rule=rule, boundary=boundary,
+                    starting_line=lambda x: cells[xs.index(x)])
+                expected = naive_rows(
+                    9, 12, rule, [False]*9, cells, boundary)
+                actual = [tuple(row) for row in run.rows(12)]
+                self.assertEqual(actual, expected, f'rule {rule}')
+
+    def test_rewind(self):
+        run = reversible.SecondOrderRun(width=31, rule=30)
+        start = (run.previous, run.current)
+        rows = list(run.packed_rows(50))
+        self.assertEqual(run.generation, 49)
+
+        rewound = [run.current]
+        for _ in range(49):
+            rewound.append(run.backward())
+        self.assertEqual(rewound[::-1], rows)
+        self.assertEqual((run.previous, run.current), start)
+        self.assertEqual(run.generation, 0)
+
+    def test_negative_steps(self):
+        run = reversible.SecondOrderRun(width=11, rule=150)
+        run.backward(-3)
+        self.assertEqual(run.generation, 3)
+        run.forward(-3)
+        self.assertEqual(run.generation, 0)
+
+    def test_infinite_boundary(self):
+        with self.assertRaises(ValueError):
+            reversible.SecondOrderRun(width=5, boundary=eca.INFINITE)
+
+
+class TestCalcGrid(unittest.TestCase):
+    def test_rule_90(self):
+        actual = eca.grid_to_text(reversible.calc_grid(
+            width=7, height=4, rule=90))
+        expected = '\n'.join([
+            '   #   ',
+            '  # #  ',
+            ' # # # ',
+            '# # # #',
+        ])
+        self.assertEqual(actual, expected)
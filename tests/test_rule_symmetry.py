@@ -0,0 +1,64 @@
+import unittest
+
+import elementary_cellular_automaton as eca
+import rule_symmetry
+
+
+class TestMirrorRule(unittest.TestCase):
+    def test(self):
+        self.assertEqual(rule_symmetry.mirror_rule(30), 86)
+        self.assertEqual(rule_symmetry.mirror_rule(110), 124)
+
+    def test_symmetric(self):
+        self.assertEqual(rule_symmetry.mirror_rule(90), 90)
+
+
+class TestComplementRule(unittest.TestCase):
+    def test(self):
+        self.assertEqual(rule_symmetry.complement_rule(30), 135)
+        self.assertEqual(rule_symmetry.complement_rule(110), 137)
+
+
+class TestCanonicalRule(unittest.TestCase):
+    def test(self):
+        self.assertEqual(
+            rule_symmetry.canonical_rule(149),
+            (30, rule_symmetry.MIRROR_COMPLEMENT))
+
+    def test_round_trip(self):
+        for rule in eca.WOLFRAM_CODES:
+            canonical, transform = rule_symmetry.canonical_rule(rule)
+            self.assertLessEqual(canonical, rule)
+            self.assertEqual(
+                rule_symmetry.apply_transform(canonical, transform), rule)
+
+
+class TestEquivalenceClasses(unittest.TestCase):
+    def test_count(self):
+        self.assertEqual(len(rule_symmetry.equivalence_classes()), 88)
+
+    def test_rule_class(self):
+        self.assertEqual(rule_symmetry.rule_class(30), (30, 86, 135, 149))
+
+
+class TestCalcPackedGrids(unittest.TestCase):
+    def f(self, width, height, starting_line=None):
+        actual = rule_symmetry.calc_packed_grids(
+            width=width, height=height, starting_line=starting_line)
+        for rule in eca.WOLFRAM_CODES:
+            expected = tuple(map(eca.cells_to_packed, eca.calc_grid(
+                width=width, height=height,
+                rule=rule, starting_line=starting_line)))
+            self.assertEqual(actual[rule], expected, f'rule {rule}')
+
+    def test_odd_width(self):
+        self.f(width=11, height=6)
+
+    def test_even_width(self):
+        self.f(width=10, height=7)
+
+    def test_asymmetric_starting_line(self):
+        def two_cells(x):
+            return x in [-1, 2]
+
+        self.f(width=9, height=5, starting_line=two_cells)
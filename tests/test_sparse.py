@@ -0,0 +1,80 @@
+import random
+import unittest
+
+import elementary_cellular_automaton as eca
+import sparse
+
+
+class TestTrimPacked(unittest.TestCase):
+    def test_dead_background(self):
+        self.assertEqual(
+            eca.trim_packed(0b0110100, 10, 17, False), (0b1101, 12, 16))
+
+    def test_live_background(self):
+        self.assertEqual(
+            eca.trim_packed(0b1101111, 10, 17, True), (0b0, 14, 15))
+
+    def test_all_background(self):
+        self.assertEqual(eca.trim_packed(0b111, 0, 3, True), (0, 0, 0))
+
+
+class TestEvolveActive(unittest.TestCase):
+    def test_infinite_matches_calc_grid(self):
+        window = range(-8, 9)
+        for rule in eca.WOLFRAM_CODES:
+            expected = list(eca.calc_packed_window(
+                lower=-8, width=17, height=9, rule=rule))
+            rows = sparse.evolve_active(rule)
+            actual = [next(rows).to_packed(window) for _ in range(9)]
+            self.assertEqual(actual, expected, f'rule {rule}')
+
+    def test_finite_boundaries(self):
+        rng = random.Random(30)
+        for boundary in [eca.PERIODIC, eca.FIXED]:
+            for rule in eca.WOLFRAM_CODES:
+                cells = {x for x in range(-3, 3) if rng.getrandbits(1)}
+                lower = rng.randrange(-12, -3)
+                width = rng.randrange(6, 20)
+
+                def starting_line(x):
+                    return x in cells
+
+                expected = list(eca.calc_packed_window(
+                    lower=lower, width=width, height=16, rule=rule,
+                    starting_line=starting_line, boundary=boundary))
+                actual = list(sparse.calc_packed_window(
+                    lower=lower, width=width, height=16, rule=rule,
+                    starting_line=starting_line, boundary=boundary,
+                    seed_support=(-3, 3)))
+                self.assertEqual(
+                    actual, expected, f'{boundary} rule {rule}')
+
+    def test_unknown_support_on_infinite_lattice(self):
+        def alternating(x):
+            return x % 2 == 0
+
+        expected = list(eca.calc_packed_window(
+            lower=0, width=10, height=6, rule=110,
+            starting_line=alternating))
+        actual = list(sparse.calc_packed_window(
+            lower=0, width=10, height=6, rule=110,
+            starting_line=alternating))
+        self.assertEqual(actual, expected)
+        with self.assertRaises(ValueError):
+            next(sparse.evolve_active(110, starting_line=alternating))
+
+    def test_wide_lattice_stays_narrow(self):
+        lattice = range(-5*10**6, 5*10**6)
+        rows = sparse.evolve_active(
+            30, lattice=lattice, boundary=eca.PERIODIC)
+        for generation in range(100):
+            row = next(rows)
+        self.assertEqual((row.lower, row.upper), (-99, 100))
+        self.assertTrue(row.cell(-99))
+        self.assertFalse(row.cell(10**6))
+
+    def test_dies_out(self):
+        rows = sparse.evolve_active(
+            128, starting_line=lambda x: abs(x) <= 2, seed_support=(-2, 3))
+        lengths = [len(next(rows)) for _ in range(5)]
+        self.assertEqual(lengths, [5, 3, 1, 0, 0])
@@ -0,0 +1,82 @@
+'''The command line is spawned many times over by batch scripts, so
+importing the module must stay cheap.
+'''
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import elementary_cellular_automaton as eca
+
+MODULE = eca.__name__
+REPO = os.path.dirname(os.path.abspath(eca.__file__))
+
+# Generous compared to the few milliseconds typically measured, to allow
+# for slow or busy machines.
+IMPORT_BUDGET_MICROSECONDS = 25000
+
+
+def run_python(*args, env=None):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=REPO, env=env, check=True,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+
+
+def cumulative_import_time(stderr, module):
+    '''From the output of python -X importtime.'''
+    for line in stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise ValueError(f'{module} was not imported.')
+
+
+class TestStartup(unittest.TestCase):
+    def test_argparse_is_deferred(self):
+        result = run_python(
+            '-c', f'import sys, {MODULE}; print("argparse" in sys.modules)')
+        self.assertEqual(result.stdout.strip(), 'False')
+
+    def test_tables_are_built_lazily(self):
+        tables = ('NEIGHBOURHOODS', 'NEIGHBOURHOOD_CONFIGURATIONS')
+        result = run_python('-c', '; '.join([
+            f'import {MODULE} as module',
+            f'print([name in vars(module) for name in {tables!r}])',
+            'module.NEIGHBOURHOODS, module.NEIGHBOURHOOD_CONFIGURATIONS',
+            f'print([name in vars(module) for name in {tables!r}])',
+        ]))
+        self.assertEqual(
+            result.stdout.splitlines(), ['[False, False]', '[True, True]'])
+
+        self.assertEqual(
+            eca.NEIGHBOURHOODS[0], (True, True, True))
+        self.assertEqual(
+            eca.NEIGHBOURHOODS[-1], (False, False, False))
+        with self.assertRaises(AttributeError):
+            eca.NO_SUCH_TABLE
+
+    def test_import_time(self):
+        with tempfile.TemporaryDirectory() as cache:
+            env = dict(os.environ, PYTHONPYCACHEPREFIX=cache)
+            env.pop('PYTHONDONTWRITEBYTECODE', None)
+            # The first import compiles the module; time the next ones.
+            run_python('-c', f'import {MODULE}', env=env)
+            times = [
+                cumulative_import_time(
+                    run_python(
+                        '-X', 'importtime', '-c', f'import {MODULE}',
+                        env=env).stderr,
+                    MODULE)
+                for _ in range(3)]
+        self.assertLess(min(times), IMPORT_BUDGET_MICROSECONDS)
+
+
+class TestValidation(unittest.TestCase):
+    def test_constant_time_membership(self):
+        self.assertIsInstance(eca.WOLFRAM_CODES, range)
+        self.assertTrue(eca.is_wolfram_code_valid(255))
+        self.assertFalse(eca.is_wolfram_code_valid(256))
+        self.assertFalse(eca.is_wolfram_code_valid(-1))
@@ -0,0 +1,116 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from xml.dom import minidom
+
+import elementary_cellular_automaton as eca
+import svg
+
+_XLINK = 'http://www.w3.org/1999/xlink'
+
+
+def _read_svg(text):
+    '''The size in pixels, cell side and live (x, y) cells of an SVG.'''
+    document = minidom.parseString(text)
+    root = document.documentElement
+    group = root.getElementsByTagName('g')[0]
+    side = int(group.getAttribute('transform')[len('scale('):-1])
+    cells = {
+        (int(use.getAttribute('x')), int(use.getAttribute('y')))
+        for use in group.getElementsByTagName('use')
+        if use.getAttributeNS(_XLINK, 'href') == '#c'}
+    return root.getAttribute('width'), root.getAttribute('height'), side, \
+        cells
+
+
+def _live(grid):
+    return {
+        (x, y)
+        for y, row in enumerate(grid)
+        for x, cell in enumerate(row) if cell}
+
+
+class TestSvgWriter(unittest.TestCase):
+    def write(self, rows, width, height, **kwargs):
+        f = io.StringIO()
+        writer = svg.SvgWriter(f, width, height, **kwargs)
+        for row in rows:
+            writer.row(row)
+        writer.close()
+        return f.getvalue()
+
+    def test_packed_rows(self):
+        grid = eca.calc_grid(width=7, height=3)
+        text = self.write(eca.calc_packed_grid(width=7, height=3), 7, 3)
+        self.assertEqual(
+            _read_svg(text), ('70px', '30px', 10, _live(grid)))
+
+    def test_cell_rows(self):
+        grid = [[0, 2, 0], [1, 0, 1]]
+        text = self.write(grid, 3, 2, side=4, foreground='#ff0000')
+        self.assertEqual(
+            _read_svg(text), ('12px', '8px', 4, {(1, 0), (0, 1), (2, 1)}))
+        self.assertIn('fill="#ff0000"', text)
+
+    def test_chunks(self):
+        width = 401
+        rows = list(eca.calc_packed_grid(width=width, height=200))
+        f = io.StringIO()
+        writes = []
+        f.write = lambda text, write=f.write: writes.append(
+            write(text))
+        writer = svg.SvgWriter(f, width, len(rows))
+        for row in rows:
+            writer.row(row)
+        writer.close()
+        self.assertLess(len(writes), len(rows))
+        self.assertEqual(
+            _read_svg(f.getvalue())[3],
+            _live(eca.rows_to_grid(rows, width)))
+
+    def test_empty(self):
+        self.assertEqual(
+            _read_svg(self.write([], 0, 0)), ('0px', '0px', 10, set()))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            svg.SvgWriter(io.StringIO(), 3, 3, side=0)
+        writer = svg.SvgWriter(io.StringIO(), 3, 1)
+        with self.assertRaises(ValueError):
+            writer.row(0b1000)
+        with self.assertRaises(ValueError):
+            writer.row([0, 1])
+        with self.assertRaises(ValueError):
+            writer.close()
+        writer.row(0b101)
+        with self.assertRaises(ValueError):
+            writer.row(0b101)
+
+
+class TestWriteSvg(unittest.TestCase):
+    def test_svg_and_svgz_agree(self):
+        rows = list(eca.calc_packed_grid(width=21, height=10, rule=110))
+        with tempfile.TemporaryDirectory() as directory:
+            plain = os.path.join(directory, 'rule110.svg')
+            compressed = os.path.join(directory, 'rule110.svgz')
+            svg.write_svg(iter(rows), plain, 21, 10)
+            svg.write_svg(iter(rows), compressed, 21, 10)
+            with open(plain, encoding='utf-8') as f:
+                text = f.read()
+            with gzip.open(compressed, 'rt', encoding='utf-8') as f:
+                self.assertEqual(f.read(), text)
+        self.assertEqual(
+            _read_svg(text)[3], _live(eca.rows_to_grid(rows, 21)))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'rule90.svgz')
+            eca.main(['-r', '90', '-g', '8', '--row-stride', '2',
+                      '-o', output])
+            with gzip.open(output, 'rt', encoding='utf-8') as f:
+                text = f.read()
+        rows = list(eca.calc_packed_grid(width=17, height=8, rule=90))
+        grid = eca.rows_to_grid(rows[::2], 17)
+        self.assertEqual(_read_svg(text), ('170px', '40px', 10, _live(grid)))
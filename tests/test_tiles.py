@@ -0,0 +1,160 @@
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+
+import elementary_cellular_automaton as eca
+import tiles
+from tests.test_raster import _read_png
+
+
+def _read_tile(directory, zoom, x, y):
+    with open(os.path.join(directory, str(zoom), str(x), f'{y}.png'),
+              'rb') as f:
+        width, height, rows = _read_png(f.read())
+    return width, height, [bytes(row) for row in rows]
+
+
+def _naive_halve(image):
+    '''The level above an image, doubling its last row and column if odd.
+    '''
+    if len(image) % 2:
+        image = image + image[-1:]
+    image = [row + row[-1:] if len(row) % 2 else row for row in image]
+    return [
+        bytes((upper[x] + upper[x + 1] + lower[x] + lower[x + 1] + 2) >> 2
+              for x in range(0, len(upper), 2))
+        for upper, lower in zip(image[::2], image[1::2])]
+
+
+def _assemble(directory, zoom, width, height, tile_size):
+    '''A zoom level of the pyramid, put back together from its tiles.'''
+    columns = -(-width // tile_size)
+    image = []
+    for y in range(-(-height // tile_size)):
+        band = [b''] * tile_size
+        for x in range(columns):
+            size, _, rows = _read_tile(directory, zoom, x, y)
+            assert size == tile_size
+            band = [whole + part for whole, part in zip(band, rows)]
+        image.extend(band)
+    return [row[:width] for row in image[:height]]
+
+
+class TestHalve(unittest.TestCase):
+    def test_matches_naive(self):
+        rng = random.Random(45)
+        for width in range(1, 20):
+            upper = bytes(rng.randrange(256) for _ in range(width))
+            lower = bytes(rng.randrange(256) for _ in range(width))
+            self.assertEqual(
+                tiles._halve(upper, lower), _naive_halve([upper, lower])[0])
+
+
+class TestSizes(unittest.TestCase):
+    def test_max_zoom(self):
+        self.assertEqual(tiles.max_zoom(1, 1), 0)
+        self.assertEqual(tiles.max_zoom(256, 100), 0)
+        self.assertEqual(tiles.max_zoom(257, 100), 1)
+        self.assertEqual(tiles.max_zoom(10, 1025), 3)
+        self.assertEqual(tiles.max_zoom(100000, 100000), 9)
+
+    def test_level_size(self):
+        self.assertEqual(tiles.level_size(401, 200, 2, 2), (401, 200))
+        self.assertEqual(tiles.level_size(401, 200, 1, 2), (201, 100))
+        self.assertEqual(tiles.level_size(401, 200, 0, 2), (101, 50))
+
+
+class TestWriteTiles(unittest.TestCase):
+    def test_pyramid(self):
+        width, height, tile_size = 41, 30, 8
+        rows = list(eca.calc_packed_grid(width=width, height=height))
+        with tempfile.TemporaryDirectory() as directory:
+            pyramid = tiles.write_tiles(
+                iter(rows), directory, width, height, workers=3,
+                tile_size=tile_size)
+            self.assertEqual(pyramid.max_zoom, 3)
+
+            image = [
+                bytes(0 if cell else 0xff for cell in row)
+                for row in eca.rows_to_grid(rows, width)]
+            count = 0
+            for zoom in range(pyramid.max_zoom, -1, -1):
+                level_width, level_height = tiles.level_size(
+                    width, height, zoom, pyramid.max_zoom)
+                self.assertEqual(
+                    _assemble(directory, zoom, level_width, level_height,
+                              tile_size),
+                    image)
+                columns = os.listdir(os.path.join(directory, str(zoom)))
+                count += len(columns) * -(-level_height // tile_size)
+                image = _naive_halve(image)
+            self.assertEqual(pyramid.tiles, count)
+            self.assertEqual(pyramid.tiles, 6*4 + 3*2 + 2 + 1)
+
+    def test_padding_and_states(self):
+        with tempfile.TemporaryDirectory() as directory:
+            tiles.write_tiles(
+                [[0, 1, 2]], directory, 3, 1, states=3, tile_size=4)
+            self.assertEqual(_read_tile(directory, 0, 0, 0), (4, 4, [
+                bytes([0xff, 0x80, 0x00, 0xff]),
+                bytes([0xff] * 4),
+                bytes([0xff] * 4),
+                bytes([0xff] * 4),
+            ]))
+
+    def test_missing_rows(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                tiles.write_tiles([0, 0], directory, 3, 3)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            tiles.write_tiles([], '.', 0, 1)
+        with self.assertRaises(ValueError):
+            tiles.write_tiles([0], '.', 1, 1, workers=0)
+
+
+class TestSaveTiles(unittest.TestCase):
+    def test_invalidation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            kwargs = {'tile_size': 4, 'workers': 2}
+            pyramid = tiles.save_tiles(directory, 10, **kwargs)
+            self.assertEqual(pyramid.max_zoom, 3)
+            self.assertIsNone(tiles.save_tiles(directory, 10, **kwargs))
+            self.assertIsNotNone(
+                tiles.save_tiles(directory, 10, force=True, **kwargs))
+
+            tiles.save_tiles(directory, 4, width=4, seed=[1], **kwargs)
+            self.assertEqual(
+                sorted(os.listdir(directory)), ['0', tiles.MANIFEST])
+            grid = eca.calc_grid(
+                width=4, height=4,
+                starting_line=eca.starting_line_from_cells([1]))
+            self.assertEqual(_read_tile(directory, 0, 0, 0)[2], [
+                bytes(0 if cell else 0xff for cell in row) for row in grid])
+            for changed in [{'seed': [0]}, {'rule': 90},
+                            {'boundary': eca.PERIODIC}]:
+                settings = dict({'width': 4, 'seed': [1]}, **changed)
+                self.assertIsNotNone(
+                    tiles.save_tiles(directory, 4, **settings, **kwargs))
+                self.assertIsNone(
+                    tiles.save_tiles(directory, 4, **settings, **kwargs))
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                tiles.main([directory, '-g', '300', '-r', '90',
+                            '--seed', '0', '--seed', '4'])
+                tiles.main([directory, '-g', '300', '-r', '90',
+                            '--seed', '4', '--seed', '0'])
+            self.assertEqual(output.getvalue().splitlines(), [
+                '9 tiles over zoom levels 0 to 2.',
+                f'The tiles in {directory} are up to date.',
+            ])
+            self.assertEqual(
+                _read_tile(directory, 2, 1, 0)[2][0][42:50],
+                bytes([0xff, 0xff, 0, 0xff, 0xff, 0xff, 0, 0xff]))
@@ -0,0 +1,81 @@
+import random
+import unittest
+
+import elementary_cellular_automaton as eca
+import views
+
+
+def expected_rows(rule, x_range, y_range, starting_line=None):
+    rows = list(eca.calc_packed_window(
+        lower=x_range.start, width=len(x_range), height=y_range.stop,
+        rule=rule, starting_line=starting_line))
+    return rows[y_range.start:]
+
+
+class TestView(unittest.TestCase):
+    def test_default_window_matches_calc_grid(self):
+        expected = eca.grid_to_text(eca.calc_grid(width=13, height=6))
+        self.assertEqual(eca.grid_to_text(views.view(30)), expected)
+
+    def test_random_windows(self):
+        rng = random.Random(29)
+        for rule in eca.WOLFRAM_CODES:
+            x_start = rng.randrange(-20, 20)
+            y_start = rng.randrange(0, 10)
+            x_range = range(x_start, x_start + rng.randrange(0, 15))
+            y_range = range(y_start, y_start + rng.randrange(0, 8))
+            actual = list(views.view(
+                rule, x_range=x_range, y_range=y_range).packed_rows())
+            self.assertEqual(
+                actual, expected_rows(rule, x_range, y_range),
+                f'rule {rule} {x_range} {y_range}')
+
+    def test_seed_support(self):
+        def cells(x):
+            return x in [3, 5, 6]
+
+        for rule in eca.WOLFRAM_CODES:
+            actual = list(views.view(
+                rule, seed=cells, seed_support=(3, 7),
+                x_range=(-4, 9), y_range=(2, 9)).packed_rows())
+            self.assertEqual(
+                actual,
+                expected_rows(rule, range(-4, 9), range(2, 9), cells),
+                f'rule {rule}')
+
+    def test_without_seed_support(self):
+        def alternating(x):
+            return x % 2 == 0
+
+        actual = list(views.view(
+            110, seed=alternating,
+            x_range=(0, 10), y_range=(3, 7)).packed_rows())
+        self.assertEqual(
+            actual,
+            expected_rows(110, range(0, 10), range(3, 7), alternating))
+
+    def test_far_outside_light_cone(self):
+        window = views.view(
+            rule=1,
+            x_range=range(10**6, 10**6 + 200),
+            y_range=range(5*10**5, 5*10**5 + 100))
+        rows = list(window.packed_rows())
+        self.assertEqual(len(rows), 100)
+        mask = (1 << 200) - 1
+        # Rule 1 turns an all dead background live and back again, so the
+        # even generations are dead.
+        self.assertEqual(rows[0], 0)
+        self.assertEqual(rows[1], mask)
+
+    def test_lengths(self):
+        window = views.view(30, x_range=range(5, 12), y_range=range(4, 6))
+        self.assertEqual((window.width, window.height), (7, 2))
+        self.assertEqual(len(window), 2)
+
+    def test_negative_generation(self):
+        with self.assertRaises(ValueError):
+            views.view(30, y_range=range(-1, 3))
+
+    def test_stepped_range(self):
+        with self.assertRaises(ValueError):
+            views.view(30, x_range=range(0, 10, 2))
@@ -0,0 +1,359 @@
+'''Tile pyramids of evolutions, for viewers that zoom and pan.
+
+http://wiki.openstreetmap.org/wiki/Slippy_map_tilenames
+
+The deepest zoom level draws one cell to a pixel, white where it is dead
+through to black where it is in the highest state, and every level above
+it halves the one below, each pixel being the mean of the two by two
+pixels under it, until a single tile holds the whole evolution. Tiles are
+256 pixels square, padded with white beyond the edges, and written as
+directory/z/x/y.png, x counting columns of tiles and y generations.
+
+Rows are consumed once, as the engine produces them. Each level holds only
+the band of rows of the tiles it is filling and a row waiting to be paired
+with the next, so memory stays proportional to the width however many
+generations are drawn, and whole bands are handed to a pool of threads to
+compress (zlib releases the GIL) while the engine carries on.
+
+A manifest written once every tile is in place records what was drawn.
+Rendering the same rule, seed, boundary and size again leaves the tiles
+as they are, anything else replaces them.
+'''
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import hashlib
+import json
+from itertools import islice
+import os
+import shutil
+import sys
+
+import buffers
+import elementary_cellular_automaton as eca
+import raster
+
+TILE_SIZE = 256
+MANIFEST = 'tiles.json'
+
+_WHITE = 0xff
+
+Pyramid = namedtuple('Pyramid', 'width height max_zoom tiles')
+
+
+def _ceiling_division(numerator, denominator):
+    return -(-numerator // denominator)
+
+
+def max_zoom(width, height, tile_size=TILE_SIZE):
+    '''The deepest zoom level, at which one cell is one pixel.'''
+    zoom = 0
+    while max(width, height) > tile_size << zoom:
+        zoom += 1
+    return zoom
+
+
+def level_size(width, height, zoom, deepest):
+    '''The width and height in pixels of a zoom level.'''
+    scale = 1 << (deepest - zoom)
+    return (_ceiling_division(width, scale),
+            _ceiling_division(height, scale))
+
+
+@lru_cache(maxsize=None)
+def _greys(states):
+    return bytes(
+        _WHITE - _WHITE * min(state, states - 1) // (states - 1)
+        for state in range(256))
+
+
+def _pixels(row, width, states):
+    if isinstance(row, int):
+        row = buffers.packed_to_cell_bytes(row, width)
+    return bytes(row).translate(_greys(states))
+
+
+@lru_cache(maxsize=64)
+def _pair_masks(pairs):
+    '''The low halves, and a two to round with, of pairs 4 byte fields.'''
+    return (int.from_bytes(b'\xff\xff\x00\x00' * pairs, 'little'),
+            int.from_bytes(b'\x02\x00\x00\x00' * pairs, 'little'))
+
+
+def _widen(pixels):
+    fields = bytearray(2 * len(pixels))
+    fields[::2] = pixels
+    return int.from_bytes(fields, 'little')
+
+
+def _halve(upper, lower):
+    '''The row of the level above two rows of pixels, each pixel being the
+    mean of two by two, the last column doubled if the width is odd.
+    '''
+    if len(upper) % 2:
+        upper += upper[-1:]
+        lower += lower[-1:]
+    pairs = len(upper) // 2
+    low_halves, twos = _pair_masks(pairs)
+    # Two byte fields of the column sums, added to their neighbours in
+    # four byte fields.
+    sums = _widen(upper) + _widen(lower)
+    sums = (sums & low_halves) + ((sums >> 16) & low_halves)
+    means = (sums + twos) >> 2
+    return means.to_bytes(4 * pairs, 'little')[::4]
+
+
+def _write_tile(filename, rows, tile_size):
+    blank = bytes([_WHITE]) * tile_size
+    with open(filename, 'wb') as f:
+        writer = raster.PngWriter(f, tile_size, tile_size)
+        for pixels in rows:
+            writer.row(pixels + blank[len(pixels):])
+        for _ in range(tile_size - len(rows)):
+            writer.row(blank)
+        writer.close()
+
+
+class _Level:
+    '''The band of rows of one zoom level being gathered into tiles.'''
+    __slots__ = ('zoom', 'width', 'parent', 'band', 'band_index',
+                 'pending', '_tiler')
+
+    def __init__(self, tiler, zoom, width, parent):
+        self._tiler = tiler
+        self.zoom = zoom
+        self.width = width
+        self.parent = parent
+        self.band = []
+        self.band_index = 0
+        self.pending = None
+
+    def add(self, pixels):
+        self.band.append(pixels)
+        if len(self.band) == self._tiler.tile_size:
+            self._flush()
+        if self.parent is not None:
+            if self.pending is None:
+                self.pending = pixels
+            else:
+                self.parent.add(_halve(self.pending, pixels))
+                self.pending = None
+
+    def _flush(self):
+        tile_size = self._tiler.tile_size
+        for x, start in enumerate(range(0, self.width, tile_size)):
+            self._tiler.submit(
+                self.zoom, x, self.band_index,
+                [pixels[start:start + tile_size] for pixels in self.band])
+        self.band = []
+        self.band_index += 1
+
+    def finish(self):
+        if self.band:
+            self._flush()
+        if self.parent is not None:
+            if self.pending is not None:
+                self.parent.add(_halve(self.pending, self.pending))
+                self.pending = None
+            self.parent.finish()
+
+
+class _Tiler:
+    __slots__ = ('directory', 'tile_size', 'tiles', '_executor',
+                 '_in_flight', '_max_in_flight')
+
+    def __init__(self, directory, tile_size, executor, max_in_flight):
+        self.directory = directory
+        self.tile_size = tile_size
+        self.tiles = 0
+        self._executor = executor
+        self._in_flight = deque()
+        self._max_in_flight = max_in_flight
+
+    def submit(self, zoom, x, y, rows):
+        folder = os.path.join(self.directory, str(zoom), str(x))
+        os.makedirs(folder, exist_ok=True)
+        while len(self._in_flight) >= self._max_in_flight:
+            self._in_flight.popleft().result()
+        self._in_flight.append(self._executor.submit(
+            _write_tile, os.path.join(folder, f'{y}.png'), rows,
+            self.tile_size))
+        self.tiles += 1
+
+    def wait(self):
+        while self._in_flight:
+            self._in_flight.popleft().result()
+
+
+def write_tiles(rows, directory, width, height, states=2, workers=None,
+                tile_size=TILE_SIZE):
+    '''Draw the first height rows, packed ints or sequences of states, as
+    a pyramid of tiles under the directory.
+    '''
+    if width < 1 or height < 1:
+        raise ValueError('A pyramid must be at least one cell across.')
+    if tile_size < 1:
+        raise ValueError('tile_size must be strictly positive')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError('At least one worker is needed.')
+
+    deepest = max_zoom(width, height, tile_size)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        tiler = _Tiler(directory, tile_size, executor, 4 * workers)
+        level = None
+        for zoom in range(deepest + 1):
+            level_width, _ = level_size(width, height, zoom, deepest)
+            level = _Level(tiler, zoom, level_width, level)
+        drawn = 0
+        for row in islice(rows, height):
+            level.add(_pixels(row, width, states))
+            drawn += 1
+        if drawn != height:
+            raise ValueError(f'{drawn} rows were drawn of {height}.')
+        level.finish()
+        tiler.wait()
+    return Pyramid(width, height, deepest, tiler.tiles)
+
+
+def tiles_key(rule, seed, boundary, width, generations,
+              tile_size=TILE_SIZE):
+    '''What the tiles of an elementary rule were drawn from, as a mapping
+    to record in the manifest.
+    '''
+    return {
+        'rule': rule,
+        'seed': sorted(set(seed)),
+        'boundary': boundary,
+        'width': width,
+        'generations': generations,
+        'tile_size': tile_size,
+    }
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _remove_tiles(directory, manifest):
+    os.remove(os.path.join(directory, MANIFEST))
+    for zoom in range(manifest.get('max_zoom', -1) + 1):
+        shutil.rmtree(os.path.join(directory, str(zoom)), ignore_errors=True)
+
+
+def save_tiles(directory, generations, width=None, rule=eca._DEFAULT_RULE,
+               seed=None, boundary=eca.INFINITE, workers=None, force=False,
+               tile_size=TILE_SIZE):
+    '''Draw an elementary rule, as calc_grid would lay it out, as a pyramid
+    of tiles, seed being the x coordinates of the live cells of the first
+    row (by default just the one at x=0).
+
+    Gives None if the directory already holds the tiles of the same
+    evolution, unless forced to draw them again, otherwise the Pyramid.
+    '''
+    eca.ensure_wolfram_code_is_valid(rule)
+    eca.ensure_boundary_is_valid(boundary)
+    if width is None:
+        width = eca.width_at_given_generation(generation=generations)
+    if seed is None:
+        seed = (0,)
+    key = tiles_key(rule, seed, boundary, width, generations, tile_size)
+    digest = hashlib.sha256(
+        json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+    manifest = _read_manifest(directory)
+    if manifest is not None:
+        if manifest.get('digest') == digest and not force:
+            return None
+        _remove_tiles(directory, manifest)
+
+    rows = eca.calc_packed_grid(
+        width=width, height=generations, rule=rule,
+        starting_line=eca.starting_line_from_cells(seed), boundary=boundary)
+    os.makedirs(directory, exist_ok=True)
+    pyramid = write_tiles(
+        rows, directory, width, generations, workers=workers,
+        tile_size=tile_size)
+
+    with open(os.path.join(directory, MANIFEST), 'w') as f:
+        json.dump(dict(key, digest=digest, max_zoom=pyramid.max_zoom), f,
+                  sort_keys=True, indent=4)
+    return pyramid
+
+
+def _make_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Draw an elementary rule as a pyramid of 256 pixel '
+        'PNG tiles, laid out as DIRECTORY/z/x/y.png.')
+    parser.add_argument(
+        'directory',
+        help='Where to write the tiles.')
+    parser.add_argument(
+        '-g', '--generations',
+        type=eca._validate_positive,
+        default=eca._DEFAULT_GENERATIONS,
+        help='How many generations to draw '
+        f'(default: {eca._DEFAULT_GENERATIONS}).')
+    parser.add_argument(
+        '-w', '--width',
+        type=eca._validate_positive,
+        help='Width of the view '
+        '(default: dependent on the generations/height).')
+    parser.add_argument(
+        '-r', '--rule',
+        type=eca._validate_rule_code,
+        default=eca._DEFAULT_RULE,
+        help='Which of the Wolfram codes (i.e. rules) to use '
+        f'(default: {eca._DEFAULT_RULE}).')
+    parser.add_argument(
+        '--seed',
+        type=int,
+        action='append',
+        metavar='X',
+        help='The x coordinate of a live cell on the first row, which may '
+        'be given more than once (default: 0).')
+    parser.add_argument(
+        '--boundary',
+        choices=eca.BOUNDARIES,
+        default=eca.INFINITE,
+        help=f'How the edges of the view behave (default: {eca.INFINITE}).')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of threads to compress tiles on '
+        '(default: the number of CPUs).')
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Draw the tiles again even if they are up to date.')
+    return parser
+
+
+def main(args=None):
+    parser = _make_parser()
+    settings = parser.parse_args(args)
+    if settings.workers is not None and settings.workers < 1:
+        parser.error('At least one worker is needed.')
+
+    pyramid = save_tiles(
+        settings.directory, settings.generations, width=settings.width,
+        rule=settings.rule, seed=settings.seed, boundary=settings.boundary,
+        workers=settings.workers, force=settings.force)
+    if pyramid is None:
+        print(f'The tiles in {settings.directory} are up to date.')
+    else:
+        print(f'{pyramid.tiles} tiles over zoom levels 0 to '
+              f'{pyramid.max_zoom}.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+'''Views of an arbitrary rectangle of an evolution, computing only the
+cells that rectangle depends on.
+
+A cell at generation y depends on the cells within y of it on the first
+row. When the first row differs from its background only within a known
+interval (one cell for the default single cell) everything outside the
+light cone of that interval is just the evolving background, so is never
+computed either; nor is any part of the cone that has settled back into
+the background.
+'''
+import elementary_cellular_automaton as eca
+
+
+def _as_range(values):
+    if isinstance(values, range):
+        if values.step != 1:
+            raise ValueError('Only contiguous ranges can be viewed.')
+        return values
+    start, stop = values
+    return range(start, stop)
+
+
+class WindowView:
+    '''The cells of x_range over the generations of y_range, evolved lazily
+    on each iteration.
+    '''
+    __slots__ = (
+        'rule', 'starting_line', 'x_range', 'y_range',
+        'seed_support', 'background')
+
+    def __init__(self, rule, starting_line, x_range, y_range,
+                 seed_support, background):
+        self.rule = rule
+        self.starting_line = starting_line
+        self.x_range = x_range
+        self.y_range = y_range
+        self.seed_support = seed_support
+        self.background = background
+
+    @property
+    def width(self):
+        return len(self.x_range)
+
+    @property
+    def height(self):
+        return len(self.y_range)
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        return eca.packed_grid_to_grid(self.packed_rows(), self.width)
+
+    def packed_rows(self):
+        if not self.y_range:
+            return
+        xs = self.x_range
+        last = self.y_range.stop - 1
+        lower, upper = self.seed_support
+
+        # The part of the first row both in the window's light cone and
+        # differing from the background; either both overlap at every
+        # generation or at none.
+        lower = max(lower, xs.start - last)
+        upper = min(upper, xs.stop + last)
+        if lower >= upper:
+            for y in self.y_range:
+                background = eca.background_after(
+                    self.background, self.rule, y)
+                yield eca.window_of_packed(0, 0, 0, background, xs)
+            return
+
+        background = self.background
+        packed = eca.cells_to_packed(
+            self.starting_line(x) for x in range(lower, upper))
+        for y in range(last + 1):
+            if y >= self.y_range.start:
+                yield eca.window_of_packed(
+                    packed, lower, upper, background, xs)
+            if y == last:
+                break
+
+            packed = eca.step_packed_in_background(
+                packed, upper - lower, self.rule, background)
+            background = eca.step_background(background, self.rule)
+            margin = last - y - 1
+            new_lower = max(lower - 1, xs.start - margin)
+            new_upper = max(min(upper + 1, xs.stop + margin), new_lower)
+            packed, lower, upper = eca.trim_packed(
+                packed >> (new_lower - lower + 1),
+                new_lower, new_upper, background)
+
+
+def view(rule, seed=None, x_range=None, y_range=None, seed_support=None,
+         background=False):
+    '''A lazily evaluated window of an evolution over an infinite lattice.
+
+    The seed is a starting line function, by default a single cell.
+    seed_support is the interval, as a range or a (start, stop) pair,
+    outside which the seed is always the background; without it the whole
+    light cone of the window is computed from the seed. The window defaults
+    to that of calc_grid for the default number of generations.
+    '''
+    eca.ensure_wolfram_code_is_valid(rule)
+    if y_range is None:
+        y_range = eca.find_y_coordinates(eca._DEFAULT_GENERATIONS)
+    y_range = _as_range(y_range)
+    if x_range is None:
+        x_range = eca.find_x_coordinates(
+            eca.width_at_given_generation(len(y_range)))
+    x_range = _as_range(x_range)
+    if y_range.start < 0:
+        raise ValueError('Generations before the first cannot be viewed.')
+
+    if seed is None or seed is eca.a_single_cell:
+        seed = eca.a_single_cell
+        if seed_support is None:
+            seed_support = range(0, 1)
+            background = False
+    if seed_support is None:
+        last = max(y_range.stop - 1, 0)
+        seed_support = range(x_range.start - last, x_range.stop + last)
+    seed_support = _as_range(seed_support)
+
+    return WindowView(
+        rule=rule, starting_line=seed,
+        x_range=x_range, y_range=y_range,
+        seed_support=(seed_support.start, seed_support.stop),
+        background=bool(background))